@@ -0,0 +1,47 @@
+"""Cascade reservation deletes and add table archiving
+
+Revision ID: 21f2ad7977d0
+Revises: 96ca7d06045e
+Create Date: 2026-10-17 04:45:48.563895
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "21f2ad7977d0"
+down_revision: Union[str, None] = "96ca7d06045e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Deleting a table removes its reservations in the database instead of
+    # loading them into the ORM. The cascade finds them by table_id through
+    # the GiST index of excl_reservations_table_id_period.
+    op.drop_constraint("reservations_table_id_fkey", "reservations", type_="foreignkey")
+    op.create_foreign_key(
+        "reservations_table_id_fkey",
+        "reservations",
+        "tables",
+        ["table_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    op.add_column(
+        "tables", sa.Column("archived_at", sa.DateTime(timezone=True), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("tables", "archived_at")
+    op.drop_constraint("reservations_table_id_fkey", "reservations", type_="foreignkey")
+    op.create_foreign_key(
+        "reservations_table_id_fkey", "reservations", "tables", ["table_id"], ["id"]
+    )
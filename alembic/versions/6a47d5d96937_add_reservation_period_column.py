@@ -0,0 +1,53 @@
+"""Add reservation period column
+
+Revision ID: 6a47d5d96937
+Revises: 8a799297df38
+Create Date: 2026-10-17 04:39:11.068296
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6a47d5d96937"
+down_revision: Union[str, None] = "8a799297df38"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PERIOD_SQL = (
+    "tstzrange(reservation_time, GREATEST(reservation_time, "
+    "(reservation_time AT TIME ZONE 'UTC' + make_interval(mins => duration_minutes)) "
+    "AT TIME ZONE 'UTC'), '[)')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    # Stored generated column: existing rows are backfilled by the table rewrite.
+    op.add_column(
+        "reservations",
+        sa.Column(
+            "period",
+            postgresql.TSTZRANGE(),
+            sa.Computed(PERIOD_SQL, persisted=True),
+        ),
+    )
+    op.create_index(
+        "ix_reservations_table_id_period",
+        "reservations",
+        ["table_id", "period"],
+        unique=False,
+        postgresql_using="gist",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_reservations_table_id_period", table_name="reservations")
+    op.drop_column("reservations", "period")
@@ -0,0 +1,33 @@
+"""Add reservation time keyset index
+
+Revision ID: 8a799297df38
+Revises: 4b975280303d
+Create Date: 2026-10-17 04:38:12.595203
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8a799297df38"
+down_revision: Union[str, None] = "4b975280303d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_reservations_reservation_time_id",
+        "reservations",
+        ["reservation_time", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_reservations_reservation_time_id", table_name="reservations")
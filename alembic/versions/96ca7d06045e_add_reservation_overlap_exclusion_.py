@@ -0,0 +1,65 @@
+"""Add reservation overlap exclusion constraint
+
+Revision ID: 96ca7d06045e
+Revises: 6a47d5d96937
+Create Date: 2026-10-17 04:40:16.017398
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "96ca7d06045e"
+down_revision: Union[str, None] = "6a47d5d96937"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    overlaps = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                """
+                SELECT a.id, b.id
+                FROM reservations a
+                JOIN reservations b
+                  ON a.table_id = b.table_id AND a.id < b.id AND a.period && b.period
+                LIMIT 20
+                """
+            )
+        )
+        .all()
+    )
+    if overlaps:
+        raise RuntimeError(
+            "Cannot add the exclusion constraint, overlapping reservations "
+            f"(id pairs): {overlaps}"
+        )
+
+    # The constraint is backed by its own GiST index on (table_id, period).
+    op.drop_index("ix_reservations_table_id_period", table_name="reservations")
+    op.create_exclude_constraint(
+        "excl_reservations_table_id_period",
+        "reservations",
+        ("table_id", "="),
+        ("period", "&&"),
+        using="gist",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint("excl_reservations_table_id_period", "reservations")
+    op.create_index(
+        "ix_reservations_table_id_period",
+        "reservations",
+        ["table_id", "period"],
+        unique=False,
+        postgresql_using="gist",
+    )
@@ -0,0 +1,106 @@
+"""Insert pending series occurrences
+
+Revision ID: b20ac3b38be6
+Revises: cc840228d210
+Create Date: 2026-10-17 05:49:16.816232
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b20ac3b38be6"
+down_revision: Union[str, None] = "cc840228d210"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Occurrences of every series not inserted into reservations yet. Steps
+# are fixed hours, so occurrences are computed in UTC like the application
+# does.
+PENDING_OCCURRENCES = """
+    SELECT s.id AS series_id, s.customer_name, s.table_id, s.duration_minutes,
+           o.reservation_time
+    FROM reservation_series s
+    CROSS JOIN LATERAL generate_series(
+        s.reservation_time,
+        s.ends_at,
+        CASE s.frequency
+            WHEN 'daily' THEN interval '24 hours'
+            ELSE interval '168 hours'
+        END
+    ) AS o(reservation_time)
+    WHERE o.reservation_time >= s.materialized_until
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Occurrences beyond the old horizon were only protected by the series
+    # rules. They are inserted now, so the exclusion constraint guards them
+    # on every booking path; none of them is dropped.
+    conflicts = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                f"""
+                SELECT p.series_id, p.reservation_time, r.id
+                FROM ({PENDING_OCCURRENCES}) p
+                JOIN reservations r
+                  ON r.table_id = p.table_id
+                 AND r.period && tstzrange(
+                     p.reservation_time,
+                     p.reservation_time + make_interval(mins => p.duration_minutes),
+                     '[)'
+                 )
+                ORDER BY p.series_id, p.reservation_time
+                LIMIT 20
+                """
+            )
+        )
+        .all()
+    )
+    if conflicts:
+        raise RuntimeError(
+            "Cannot insert the pending occurrences of reservation series, they "
+            "overlap existing reservations (series id, occurrence, reservation "
+            f"id): {conflicts}"
+        )
+
+    op.execute(
+        f"""
+        INSERT INTO reservations
+            (customer_name, table_id, reservation_time, duration_minutes)
+        SELECT customer_name, table_id, reservation_time, duration_minutes
+        FROM ({PENDING_OCCURRENCES}) p
+        ORDER BY table_id, reservation_time
+        """
+    )
+    op.drop_index(
+        "ix_reservation_series_materialized_until_ends_at",
+        table_name="reservation_series",
+    )
+    op.drop_column("reservation_series", "materialized_until")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column(
+        "reservation_series",
+        sa.Column("materialized_until", sa.DateTime(timezone=True), nullable=True),
+    )
+    # Every occurrence is inserted.
+    op.execute(
+        "UPDATE reservation_series SET materialized_until = ends_at + interval '1 second'"
+    )
+    op.alter_column("reservation_series", "materialized_until", nullable=False)
+    op.create_index(
+        "ix_reservation_series_materialized_until_ends_at",
+        "reservation_series",
+        ["materialized_until", "ends_at"],
+        unique=False,
+    )
@@ -0,0 +1,37 @@
+"""Add covering reservation listing index
+
+Revision ID: cc840228d210
+Revises: d660350d0e14
+Create Date: 2026-10-17 05:04:52.757246
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "cc840228d210"
+down_revision: Union[str, None] = "d660350d0e14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Listings filtered by table and time read only this index.
+    op.create_index(
+        "ix_reservations_table_id_reservation_time_id",
+        "reservations",
+        ["table_id", "reservation_time", "id"],
+        unique=False,
+        postgresql_include=["customer_name", "duration_minutes"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_reservations_table_id_reservation_time_id", table_name="reservations"
+    )
@@ -0,0 +1,59 @@
+"""Add reservation series
+
+Revision ID: d660350d0e14
+Revises: 21f2ad7977d0
+Create Date: 2026-10-17 05:01:20.463544
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d660350d0e14"
+down_revision: Union[str, None] = "21f2ad7977d0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Recurrence rules; their occurrences are inserted into reservations
+    # for a rolling horizon only.
+    op.create_table(
+        "reservation_series",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("customer_name", sa.String(), nullable=False),
+        sa.Column("table_id", sa.Integer(), nullable=False),
+        sa.Column("reservation_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("duration_minutes", sa.Integer(), nullable=False),
+        sa.Column("frequency", sa.String(), nullable=False),
+        sa.Column("until", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("count", sa.Integer(), nullable=True),
+        sa.Column("ends_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("materialized_until", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["table_id"], ["tables.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_reservation_series_id"), "reservation_series", ["id"], unique=False
+    )
+    op.create_index(
+        "ix_reservation_series_materialized_until_ends_at",
+        "reservation_series",
+        ["materialized_until", "ends_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_reservation_series_materialized_until_ends_at",
+        table_name="reservation_series",
+    )
+    op.drop_index(op.f("ix_reservation_series_id"), table_name="reservation_series")
+    op.drop_table("reservation_series")
@@ -1,16 +1,154 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import logging
+import time
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from src.config import settings
+from src.db_pool import InstrumentedQueuePool, enable_idle_ping
+from src.metrics import instrument_engine
 from sqlalchemy.orm import declarative_base
 
+logger = logging.getLogger(__name__)
+
 Base = declarative_base()
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+REPLICA_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+
+def get_async_url(url: str) -> str:
+    """
+    Convert a database URL to use the asyncpg driver.
+
+    Args:
+        url: The database URL from the settings.
+
+    Returns:
+        The same URL with the ``postgresql+asyncpg`` driver.
+    """
+
+    return (
+        make_url(url)
+        .set(drivername="postgresql+asyncpg")
+        .render_as_string(hide_password=False)
+    )
+
+
+def create_db_engine(url: str) -> AsyncEngine:
+    """
+    Create an async engine with the configured connection pool.
+
+    Args:
+        url: The database URL from the settings.
+
+    Returns:
+        The async engine.
+    """
+
+    db_engine = create_async_engine(
+        get_async_url(url),
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_use_lifo=settings.DB_POOL_USE_LIFO,
+    )
+    enable_idle_ping(db_engine.sync_engine, settings.DB_POOL_PING_IDLE_SECONDS)
+    return db_engine
+
+
+class ReplicaLagMonitor:
+    """Tracks whether the read replica is close enough to the primary."""
+
+    def __init__(self, replica: AsyncEngine, max_lag: float, check_interval: float):
+        self.replica = replica
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._checked_at = float("-inf")
+        self._usable = False
+
+    async def is_usable(self) -> bool:
+        """
+        Check whether reads may be served by the replica.
+
+        The replication lag is queried at most once per ``check_interval``;
+        between checks the last result is reused.
+
+        Returns:
+            True if the replica lag is within ``max_lag``.
+        """
+
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return self._usable
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        try:
+            async with self.replica.connect() as conn:
+                lag = await conn.scalar(REPLICA_LAG_QUERY)
+            self._usable = lag is not None and float(lag) <= self.max_lag
+            if not self._usable:
+                logger.warning(f"Read replica lag {lag}s, reading from primary.")
+        except SQLAlchemyError as e:
+            logger.warning(f"Read replica unavailable, reading from primary: {e}")
+            self._usable = False
 
+        self._checked_at = time.monotonic()
+        return self._usable
 
-def get_db():
+
+async def use_autocommit(db: AsyncSession) -> None:
+    """
+    Run the next statement of the session in autocommit mode.
+
+    Used by writes that consist of a single statement, so that no separate
+    BEGIN and COMMIT round trips are needed. An already open transaction is
+    left untouched.
+
+    Args:
+        db: The database session.
+    """
+
+    if not db.in_transaction():
+        await db.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+
+
+engine = create_db_engine(settings.DATABASE_URL)
+instrument_engine(engine.sync_engine, "primary")
+
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+if settings.READ_DATABASE_URL:
+    read_engine = create_db_engine(settings.READ_DATABASE_URL)
+    instrument_engine(read_engine.sync_engine, "replica")
+    replica_monitor = ReplicaLagMonitor(
+        read_engine,
+        max_lag=settings.READ_REPLICA_MAX_LAG_SECONDS,
+        check_interval=settings.READ_REPLICA_LAG_CHECK_SECONDS,
+    )
+else:
+    read_engine = engine
+    replica_monitor = None
+
+ReadSessionLocal = async_sessionmaker(
+    bind=read_engine, autoflush=False, expire_on_commit=False
+)
+
+
+async def get_db():
     """
     Get database session
 
@@ -21,4 +159,25 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
+
+
+async def get_read_db():
+    """
+    Get database session for read-only queries.
+
+    The read replica is used when it is configured and its lag is within
+    ``READ_REPLICA_MAX_LAG_SECONDS``, otherwise the primary is used.
+
+    :return:
+    """
+
+    factory = SessionLocal
+    if replica_monitor is not None and await replica_monitor.is_usable():
+        factory = ReadSessionLocal
+
+    db = factory()
+    try:
+        yield db
+    finally:
+        await db.close()
@@ -0,0 +1,134 @@
+import logging
+import time
+from typing import Any, Dict
+
+from sqlalchemy import Engine, event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    """Counters collected while checking connections out of the pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def observe_wait(self, seconds: float) -> None:
+        """
+        Record the time spent waiting for a connection.
+
+        Args:
+            seconds: Checkout wait time in seconds.
+        """
+
+        self.checkouts += 1
+        self.wait_total += seconds
+        if seconds > self.wait_max:
+            self.wait_max = seconds
+
+    def reset(self) -> None:
+        """Reset all counters."""
+
+        self.__init__()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that records checkout wait time and timeouts."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self) -> PoolProxiedConnection:
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            logger.warning(
+                "Connection pool exhausted: size=%d, overflow=%d, timeout=%.2fs",
+                self.size(),
+                self.overflow(),
+                self._timeout,
+            )
+            raise
+        finally:
+            self.stats.observe_wait(time.perf_counter() - start)
+
+
+def enable_idle_ping(engine: Engine, idle_seconds: float) -> None:
+    """
+    Ping pooled connections on checkout only after they have been idle.
+
+    Unlike ``pool_pre_ping``, connections checked out again shortly after
+    being returned skip the extra ``SELECT 1`` round trip. A failed ping
+    invalidates the whole pool, the same way ``pool_pre_ping`` does.
+
+    Args:
+        engine: The engine whose pool should be checked.
+        idle_seconds: Idle time after which a connection is pinged. A negative
+            value disables the check.
+    """
+
+    if idle_seconds < 0:
+        return
+
+    dialect = engine.dialect
+
+    @event.listens_for(engine.pool, "connect")
+    def _stamp_new(dbapi_connection, connection_record):
+        connection_record.info["last_used"] = time.monotonic()
+
+    @event.listens_for(engine.pool, "checkin")
+    def _stamp_checkin(dbapi_connection, connection_record):
+        connection_record.info["last_used"] = time.monotonic()
+
+    @event.listens_for(engine.pool, "checkout")
+    def _ping_idle(dbapi_connection, connection_record, connection_proxy):
+        last_used = connection_record.info.get("last_used")
+        if last_used is not None and time.monotonic() - last_used < idle_seconds:
+            return
+
+        try:
+            alive = dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            if not dialect.is_disconnect(e, dbapi_connection, None):
+                raise
+            alive = False
+
+        if not alive:
+            raise exc.InvalidatePoolError()
+        connection_record.info["last_used"] = time.monotonic()
+
+
+def get_pool_status(pool: InstrumentedQueuePool) -> Dict[str, Any]:
+    """
+    Get a snapshot of the connection pool state.
+
+    Args:
+        pool: The instrumented connection pool.
+
+    Returns:
+        A dictionary with pool gauges and checkout counters.
+    """
+
+    stats = pool.stats
+    return {
+        "pool_size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "checkouts": stats.checkouts,
+        "timeouts": stats.timeouts,
+        "wait_avg_ms": (
+            round(stats.wait_total / stats.checkouts * 1000, 3)
+            if stats.checkouts
+            else 0.0
+        ),
+        "wait_max_ms": round(stats.wait_max * 1000, 3),
+    }
@@ -1,12 +1,19 @@
+import asyncio
 import logging.config
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 # Импортируем settings
 from src.config import settings
+from src.database import SessionLocal, engine, read_engine
+from src.db_pool import get_pool_status
 from src.logging_config import setup_logging
+from src.metrics import MetricsMiddleware, render_metrics
+from src.reservation.exceptions import ReservationConflictError
+from src.reservation.interval_index import reservation_index
 from src.reservation.router import router as reservation_router
 from src.tables.router import router as table_router
 
@@ -28,9 +35,23 @@ async def lifespan(app: FastAPI):
     """
 
     logger.info("Application startup sequence initiated.")
+
+    refresh_task = None
+    if settings.RESERVATION_INDEX_ENABLED:
+        await reservation_index.refresh(SessionLocal)
+        refresh_task = asyncio.create_task(
+            reservation_index.run_refresh(
+                SessionLocal, settings.RESERVATION_INDEX_REFRESH_SECONDS
+            )
+        )
+
     yield
     logger.info("Application shutdown sequence initiated.")
 
+    if refresh_task is not None:
+        refresh_task.cancel()
+    reservation_index.clear()
+
 
 # Используем настройки из settings
 app = FastAPI(
@@ -43,6 +64,8 @@ app = FastAPI(
     redoc_url=f"{settings.API_PREFIX}/redoc",  # Путь для ReDoc
 )
 
+app.add_middleware(MetricsMiddleware)
+
 # Используем settings.API_PREFIX
 app.include_router(table_router, prefix=settings.API_PREFIX)
 app.include_router(reservation_router, prefix=settings.API_PREFIX)
@@ -64,6 +87,28 @@ def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
 
 
+@app.exception_handler(ReservationConflictError)
+def reservation_conflict_handler(request: Request, exc: ReservationConflictError):
+    """Handler for double bookings, adding the suggested free slots.
+
+    Args:
+        request (Request): The request object.
+        exc (ReservationConflictError): The exception object.
+
+    Returns:
+        JSONResponse: The response object.
+    """
+
+    logger.error(f"HTTP Exception: {exc.status_code} - {exc.detail}")
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={
+            "detail": exc.detail,
+            "suggestions": jsonable_encoder(exc.suggestions),
+        },
+    )
+
+
 @app.exception_handler(Exception)
 def global_exception_handler(request: Request, exc: Exception):
     """
@@ -92,6 +137,25 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/health/db-pool", tags=["Health"])
+def db_pool_health():
+    """Connection pool saturation and checkout statistics."""
+
+    return get_pool_status(engine.sync_engine.pool)
+
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def metrics():
+    """Request, query and connection pool metrics in the Prometheus format."""
+
+    pools = {"primary": engine.sync_engine.pool}
+    if read_engine is not engine:
+        pools["replica"] = read_engine.sync_engine.pool
+    return PlainTextResponse(
+        render_metrics(pools), media_type="text/plain; version=0.0.4"
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
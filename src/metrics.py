@@ -0,0 +1,342 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.db_pool import InstrumentedQueuePool, get_pool_status
+
+# Metrics are updated only from the event loop thread: the middleware and
+# the engine events of async engines run there, so plain counters need no
+# locks. Rendering copies the values first, so a scrape from another thread
+# never iterates a dict that is growing.
+
+Labels = Tuple[str, ...]
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Queries run by the current request, if any.
+request_queries: ContextVar[Optional[List[int]]] = ContextVar(
+    "request_queries", default=None
+)
+
+
+def format_labels(names: Sequence[str], values: Labels) -> str:
+    """
+    Format label pairs in the Prometheus text format.
+
+    Args:
+        names: The label names.
+        values: The label values.
+
+    Returns:
+        ``{name="value",...}``, or an empty string without labels.
+    """
+
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    """Monotonic counter, per combination of label values."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop all values."""
+
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        """
+        Increase the value.
+
+        Args:
+            labels: The label values.
+            amount: The increment.
+        """
+
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        """Render the metric in the Prometheus text format."""
+
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for labels, value in list(self.values.items()):
+            lines.append(f"{self.name}{format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that goes up and down, per combination of label values."""
+
+    type = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        """
+        Decrease the value.
+
+        Args:
+            labels: The label values.
+            amount: The decrement.
+        """
+
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+
+class Histogram:
+    """Distribution of observations in cumulative buckets."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Labels = (),
+        buckets: Sequence[float] = (),
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop all observations."""
+
+        # Per labels: the count of every bucket, then of +Inf, then the sum.
+        self.series: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        """
+        Record an observation.
+
+        Args:
+            value: The observed value.
+            labels: The label values.
+        """
+
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        """Render the metric in the Prometheus text format."""
+
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        bucket_names = self.labelnames + ("le",)
+        bounds = [repr(float(bound)) for bound in self.buckets] + ["+Inf"]
+        for labels, series in list(self.series.items()):
+            series = list(series)
+            count = 0
+            for bound, bucket_count in zip(bounds, series):
+                count += bucket_count
+                bucket_labels = format_labels(bucket_names, labels + (bound,))
+                lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+            series_labels = format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{series_labels} {series[-1]}")
+            lines.append(f"{self.name}_count{series_labels} {count}")
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency until the response is sent.",
+    ("method", "route", "status"),
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being served.", ("method",)
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database queries per HTTP request.",
+    ("method", "route"),
+    (0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Database query latency.",
+    ("database",),
+    (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+COMMITS = Counter("db_commits_total", "Committed transactions.", ("database",))
+ROLLBACKS = Counter(
+    "db_rollbacks_total",
+    "Rolled back transactions, including those ended by closing a session.",
+    ("database",),
+)
+
+METRICS = (
+    REQUEST_DURATION,
+    REQUESTS_IN_PROGRESS,
+    REQUEST_QUERIES,
+    QUERY_DURATION,
+    COMMITS,
+    ROLLBACKS,
+)
+
+POOL_GAUGES = {
+    "db_pool_size": ("pool_size", "Connections kept in the pool."),
+    "db_pool_checked_in": ("checked_in", "Idle connections in the pool."),
+    "db_pool_checked_out": ("checked_out", "Connections in use."),
+    "db_pool_overflow": ("overflow", "Connections opened beyond the pool size."),
+    "db_pool_max_overflow": (
+        "max_overflow",
+        "Maximum connections beyond the pool size.",
+    ),
+}
+
+
+def instrument_engine(engine: Engine, database: str) -> None:
+    """
+    Collect query, commit and rollback metrics of an engine.
+
+    Args:
+        engine: The engine, ``AsyncEngine.sync_engine`` for async engines.
+        database: The ``database`` label of its metrics.
+    """
+
+    labels = (database,)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_query(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end_query(conn, cursor, statement, parameters, context, executemany):
+        QUERY_DURATION.observe(time.perf_counter() - context._query_start, labels)
+        queries = request_queries.get()
+        if queries is not None:
+            queries[0] += 1
+
+    @event.listens_for(engine, "commit")
+    def _commit(conn):
+        COMMITS.inc(labels)
+
+    @event.listens_for(engine, "rollback")
+    def _rollback(conn):
+        ROLLBACKS.inc(labels)
+
+
+def render_pools(pools: Dict[str, InstrumentedQueuePool]) -> List[str]:
+    """
+    Render the connection pool state in the Prometheus text format.
+
+    Args:
+        pools: The pools, by ``database`` label.
+
+    Returns:
+        The metric lines.
+    """
+
+    statuses = {database: get_pool_status(pool) for database, pool in pools.items()}
+    samples = {
+        name: ("gauge", documentation, key)
+        for name, (key, documentation) in POOL_GAUGES.items()
+    }
+    samples["db_pool_checkouts_total"] = (
+        "counter",
+        "Connection checkouts.",
+        "checkouts",
+    )
+    samples["db_pool_timeouts_total"] = (
+        "counter",
+        "Checkouts that timed out waiting for a connection.",
+        "timeouts",
+    )
+
+    lines = []
+    for name, (metric_type, documentation, key) in samples.items():
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for database, status in statuses.items():
+            lines.append(f'{name}{{database="{database}"}} {status[key]}')
+
+    name = "db_pool_checkout_wait_seconds"
+    lines.append(f"# HELP {name} Time spent waiting for a connection.")
+    lines.append(f"# TYPE {name} summary")
+    for database, pool in pools.items():
+        lines.append(f'{name}_sum{{database="{database}"}} {pool.stats.wait_total}')
+        lines.append(f'{name}_count{{database="{database}"}} {pool.stats.checkouts}')
+    return lines
+
+
+def render_metrics(pools: Dict[str, InstrumentedQueuePool]) -> str:
+    """
+    Render all metrics in the Prometheus text format.
+
+    Args:
+        pools: The connection pools, by ``database`` label.
+
+    Returns:
+        The exposition text.
+    """
+
+    lines = [line for metric in METRICS for line in metric.render()]
+    lines.extend(render_pools(pools))
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency, in-flight requests and the
+    number of database queries of every request.
+
+    Requests are labelled by route template, e.g.
+    ``/api/v1/reservations/{reservation_id}``, not by path.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        queries = [0]
+        token = request_queries.set(queries)
+        REQUESTS_IN_PROGRESS.inc((method,))
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_PROGRESS.dec((method,))
+            request_queries.reset(token)
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            REQUEST_DURATION.observe(elapsed, (method, route, str(status_code)))
+            REQUEST_QUERIES.observe(queries[0], (method, route))
@@ -0,0 +1,97 @@
+import base64
+import binascii
+import json
+from typing import Any, Callable, List, Optional, Sequence
+
+from fastapi import HTTPException, Response, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode the sort key of the last returned row into an opaque cursor.
+
+    Args:
+        values: JSON-serializable sort key values.
+
+    Returns:
+        The URL-safe cursor string.
+    """
+
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> List[Any]:
+    """
+    Decode a cursor created by ``encode_cursor``.
+
+    Args:
+        cursor: The cursor string.
+        types: The expected type of each sort key value.
+
+    Returns:
+        The sort key values.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        values = None
+
+    if (
+        not isinstance(values, list)
+        or len(values) != len(types)
+        or not all(isinstance(v, t) for v, t in zip(values, types))
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор пагинации.",
+        )
+    return values
+
+
+def validate_pagination(skip: int, cursor: Optional[str]) -> None:
+    """
+    Check that offset and cursor pagination are not mixed.
+
+    Args:
+        skip: The number of records to skip.
+        cursor: The cursor of the previous page.
+
+    Raises:
+        HTTPException: If both ``skip`` and ``cursor`` are given.
+    """
+
+    if skip and cursor is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Параметры skip и cursor нельзя использовать одновременно.",
+        )
+
+
+def set_next_cursor(
+    response: Response,
+    items: Sequence[Any],
+    limit: int,
+    key: Callable[[Any], Sequence[Any]],
+) -> None:
+    """
+    Add the cursor of the next page to the response headers.
+
+    The header is only set when the page is full, i.e. more rows may follow.
+
+    Args:
+        response: The outgoing response.
+        items: The returned page.
+        limit: The requested page size.
+        key: Function returning the sort key of a row.
+    """
+
+    if limit and len(items) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key(items[-1]))
@@ -1,42 +1,129 @@
-from datetime import timedelta, datetime, timezone
+from datetime import datetime, timezone
+from typing import List, Optional, Union
 
 from fastapi import HTTPException, status
-from sqlalchemy import exists, and_, func
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
 
-from src.reservation import models, schemas
-from src.tables.models import Table
+from src.config import settings
+from src.reservation import schemas
 
+EXCLUSION_VIOLATION = "23P01"
+FOREIGN_KEY_VIOLATION = "23503"
 
-def validate_table_exists(db: Session, table_id: int) -> None:
+TABLE_NOT_FOUND_DETAIL = "Стол с ID {table_id} не найден."
+
+
+class ReservationConflictError(HTTPException):
+    """409 Conflict raised for a double booking, with free slot suggestions."""
+
+    def __init__(self, suggestions: Optional[List[schemas.FreeSlot]] = None):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Конфликт бронирования: столик уже занят в указанный временной слот.",
+        )
+        self.suggestions = suggestions or []
+
+
+def create_conflict_error(
+    suggestions: Optional[List[schemas.FreeSlot]] = None,
+) -> ReservationConflictError:
     """
-    Checks if a table with the given ID exists in the database.
+    Create the HTTPException returned when a table is already booked.
 
     Args:
-        db: The database session.
-        table_id: The ID of the table to check.
+        suggestions: The nearest free slots, if they were computed.
 
-    Raises:
-        HTTPException: If the table is not found.
+    Returns:
+        A 409 Conflict HTTPException.
     """
 
-    table = db.get(Table, table_id)
-    if not table:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Стол с ID {table_id} не найден.",
-        )
+    return ReservationConflictError(suggestions)
 
 
-def validate_reservation_data(reservation_data: schemas.ReservationCreate) -> None:
+def create_table_not_found_error(table_id: int) -> HTTPException:
     """
-    Checks if the reservation data is valid.
+    Create the HTTPException returned when the reserved table does not exist.
+
+    Args:
+        table_id: The ID of the missing table.
+
+    Returns:
+        A 404 Not Found HTTPException.
+    """
+
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=TABLE_NOT_FOUND_DETAIL.format(table_id=table_id),
+    )
+
+
+def create_no_free_table_error() -> HTTPException:
+    """
+    Create the HTTPException returned when no table can seat a party.
+
+    Returns:
+        A 409 Conflict HTTPException.
+    """
+
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Нет свободных столиков на указанное время.",
+    )
+
+
+def get_pgcode(error: SQLAlchemyError) -> Optional[str]:
+    """
+    Get the PostgreSQL SQLSTATE of a database error.
+
+    Args:
+        error: The database error.
+
+    Returns:
+        The SQLSTATE code, if the driver reported one.
+    """
+
+    return getattr(getattr(error, "orig", None), "pgcode", None)
+
+
+def is_reservation_conflict(error: SQLAlchemyError) -> bool:
+    """
+    Checks if an error was raised by the no-double-booking constraint.
+
+    Args:
+        error: The database error raised on insert.
+
+    Returns:
+        True if the error is an exclusion constraint violation.
+    """
+
+    return get_pgcode(error) == EXCLUSION_VIOLATION
+
+
+def is_missing_table(error: SQLAlchemyError) -> bool:
+    """
+    Checks if an error was raised because the referenced table does not exist.
+
+    Args:
+        error: The database error raised on insert.
+
+    Returns:
+        True if the error is a foreign key violation.
+    """
+
+    return get_pgcode(error) == FOREIGN_KEY_VIOLATION
+
+
+def validate_duration(
+    reservation_data: Union[schemas.ReservationCreate, schemas.ReservationAutoCreate],
+) -> None:
+    """
+    Checks if the reservation duration is positive.
 
     Args:
         reservation_data: The reservation data to validate.
 
     Raises:
-        HTTPException: If the reservation data is not valid.
+        HTTPException: If the duration is not positive.
     """
 
     if reservation_data.duration_minutes <= 0:
@@ -45,50 +132,60 @@ def validate_reservation_data(reservation_data: schemas.ReservationCreate) -> No
             detail="Продолжительность бронирования должна быть больше нуля.",
         )
 
-    if reservation_data.reservation_time < datetime.now(timezone.utc):
+
+def validate_reservation_data(
+    reservation_data: Union[schemas.ReservationCreate, schemas.ReservationAutoCreate],
+) -> None:
+    """
+    Checks if the reservation data is valid.
+
+    Args:
+        reservation_data: The reservation data to validate.
+
+    Raises:
+        HTTPException: If the reservation data is not valid.
+    """
+
+    validate_duration(reservation_data)
+
+    reservation_time = reservation_data.reservation_time
+    if reservation_time.tzinfo is None:
+        # Naive times are stored as UTC by the driver.
+        reservation_time = reservation_time.replace(tzinfo=timezone.utc)
+
+    if reservation_time < datetime.now(timezone.utc):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Время бронирования не может быть в прошлом.",
         )
 
 
-def check_reservation_conflicts(
-    db: Session, reservation_data: schemas.ReservationCreate
-) -> None:
+def validate_recurrence(rule: schemas.RecurrenceRule, occurrences: int) -> None:
     """
-    Checks for conflicts between existing reservations and the new reservation.
+    Checks if a recurrence rule is valid.
 
     Args:
-        db: The database session.
-        reservation_data: The new reservation data.
+        rule: The recurrence rule to validate.
+        occurrences: The number of occurrences the rule expands to.
 
     Raises:
-        HTTPException: If a conflict is found.
-    """
-
-    new_start = reservation_data.reservation_time
-    new_end = new_start + timedelta(minutes=reservation_data.duration_minutes)
-
-    conflict_subquery = (
-        exists()
-        .where(
-            and_(
-                models.Reservation.table_id == reservation_data.table_id,
-                models.Reservation.reservation_time < new_end,
-                (
-                    models.Reservation.reservation_time
-                    + func.make_interval(
-                        0, 0, 0, 0, 0, models.Reservation.duration_minutes
-                    )
-                )
-                > new_start,
-            )
+        HTTPException: If the rule is not valid.
+    """
+
+    if (rule.until is None) == (rule.count is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Укажите ровно одно из полей until или count.",
         )
-        .select()
-    )
 
-    if db.scalar(conflict_subquery):
+    if occurrences == 0:
         raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Конфликт бронирования: столик уже занят в указанный временной слот.",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Окончание повторений не может быть раньше первого бронирования.",
+        )
+
+    if occurrences > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Слишком много повторений: не более {settings.BULK_MAX_ITEMS}.",
         )
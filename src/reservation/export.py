@@ -0,0 +1,103 @@
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator, Literal, Optional, Sequence
+
+from pydantic import TypeAdapter
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.reservation import models, schemas
+from src.reservation.utils import filter_reservations
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+reservation_row = TypeAdapter(schemas.ReservationRow)
+
+
+def encode_ndjson(rows: Sequence[Row]) -> bytes:
+    """
+    Encode rows as newline-delimited JSON objects.
+
+    Args:
+        rows: Reservation rows with the columns of ``schemas.ReservationRow``.
+
+    Returns:
+        One JSON line per row.
+    """
+
+    return b"".join(reservation_row.dump_json(row._asdict()) + b"\n" for row in rows)
+
+
+def encode_csv(rows: Sequence[Row], header: bool = False) -> bytes:
+    """
+    Encode rows as CSV records.
+
+    Values are formatted as in the JSON responses, e.g. times in ISO 8601.
+
+    Args:
+        rows: Reservation rows with the columns of ``schemas.ReservationRow``.
+        header: Start with a header record.
+
+    Returns:
+        One CSV record per row, in UTF-8.
+    """
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(schemas.RESERVATION_FIELDS)
+    for row in rows:
+        writer.writerow(
+            reservation_row.dump_python(row._asdict(), mode="json").values()
+        )
+    return buffer.getvalue().encode("utf-8")
+
+
+async def export_reservations(
+    db: AsyncSession,
+    export_format: ExportFormat,
+    batch_size: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Stream reservations ordered by time through a server-side cursor.
+
+    Rows are fetched ``batch_size`` at a time and every batch is encoded
+    into one chunk, so memory use does not depend on the number of rows.
+    The next batch is fetched only after the previous chunk is consumed.
+    The session is closed when the stream ends or is abandoned.
+
+    Args:
+        db: The database session.
+        export_format: The output format, ``ndjson`` or ``csv``.
+        batch_size: The number of rows fetched and encoded at once.
+        start: Only reservations starting at or after this time, if given.
+        end: Only reservations starting before this time, if given.
+
+    Yields:
+        Encoded chunks of reservations.
+    """
+
+    stmt = filter_reservations(
+        select(
+            *(getattr(models.Reservation, name) for name in schemas.RESERVATION_FIELDS)
+        ).order_by(models.Reservation.reservation_time, models.Reservation.id),
+        start=start,
+        end=end,
+    ).execution_options(yield_per=batch_size)
+
+    try:
+        if export_format == "csv":
+            yield encode_csv([], header=True)
+        result = await db.stream(stmt)
+        async for rows in result.partitions():
+            if export_format == "csv":
+                yield encode_csv(rows)
+            else:
+                yield encode_ndjson(rows)
+    finally:
+        await db.close()
@@ -0,0 +1,472 @@
+import argparse
+import asyncio
+import csv
+import io
+import json
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import IO, AsyncIterable, Iterator, List, Literal, Optional, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    Select,
+    String,
+    Table,
+    Update,
+    and_,
+    any_,
+    bindparam,
+    case,
+    exists,
+    func,
+    literal,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+from src.reservation import models, schemas
+from src.reservation.exceptions import (
+    TABLE_NOT_FOUND_DETAIL,
+    create_conflict_error,
+    validate_duration,
+)
+from src.reservation.interval_index import reservation_index
+from src.reservation.utils import find_batch_overlaps, to_utc
+from src.tables.models import Table as TableModel
+
+ImportFormat = Literal["ndjson", "csv"]
+
+# (line, customer_name, table_id, reservation_time, end_at, duration_minutes,
+# detail); rejected records have only the line and the detail.
+ImportRecord = Tuple[
+    int,
+    Optional[str],
+    Optional[int],
+    Optional[datetime],
+    Optional[datetime],
+    Optional[int],
+    Optional[str],
+]
+
+IMPORT_OVERLAP_DETAIL = (
+    "Конфликт бронирования: пересекается с предыдущей записью импорта на тот же столик."
+)
+
+# Dropped with the transaction of the import.
+staging = Table(
+    "reservation_import",
+    MetaData(),
+    Column("line", Integer, primary_key=True, autoincrement=False),
+    Column("customer_name", String),
+    Column("table_id", Integer),
+    Column("reservation_time", DateTime(timezone=True)),
+    Column("end_at", DateTime(timezone=True)),
+    Column("duration_minutes", Integer),
+    Column("detail", String),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+reservation_create = TypeAdapter(schemas.ReservationCreate)
+
+
+def parse_record(line: int, data: object) -> ImportRecord:
+    """
+    Validate one imported record.
+
+    Records are validated like new reservations, except that past times
+    are allowed. Naive times are taken as UTC.
+
+    Args:
+        line: The line of the record in the file.
+        data: The decoded record.
+
+    Returns:
+        The staging row of the record.
+    """
+
+    try:
+        reservation = reservation_create.validate_python(data)
+        validate_duration(reservation)
+    except ValidationError as e:
+        fields = ", ".join(
+            ".".join(str(part) for part in error["loc"]) for error in e.errors()
+        )
+        return line, None, None, None, None, None, f"Некорректные поля: {fields}."
+    except HTTPException as e:
+        return line, None, None, None, None, None, e.detail
+
+    start = to_utc(reservation.reservation_time)
+    return (
+        line,
+        reservation.customer_name,
+        reservation.table_id,
+        start,
+        start + timedelta(minutes=reservation.duration_minutes),
+        reservation.duration_minutes,
+        None,
+    )
+
+
+def read_records(file: IO[str], import_format: ImportFormat) -> Iterator[ImportRecord]:
+    """
+    Read and validate the records of an import file.
+
+    CSV files need a header with the reservation fields. Empty NDJSON lines
+    are skipped.
+
+    Args:
+        file: The text file.
+        import_format: The file format, ``ndjson`` or ``csv``.
+
+    Yields:
+        The staging row of every record.
+    """
+
+    if import_format == "csv":
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield parse_record(reader.line_num, row)
+        return
+
+    for line, text in enumerate(file, start=1):
+        if not text.strip():
+            continue
+        try:
+            data = json.loads(text)
+        except ValueError:
+            yield line, None, None, None, None, None, "Некорректный JSON."
+            continue
+        yield parse_record(line, data)
+
+
+def build_import_validation() -> Update:
+    """
+    Build the statement that rejects staged records which cannot be inserted.
+
+    Records of missing or archived tables are found by an anti-join with
+    ``tables``, and records overlapping existing reservations by the GiST
+    index on ``(table_id, period)``.
+
+    Returns:
+        The UPDATE setting ``detail`` of the rejected records.
+    """
+
+    detail = case(
+        (
+            TableModel.id.is_(None),
+            func.format(
+                TABLE_NOT_FOUND_DETAIL.format(table_id="%s"), staging.c.table_id
+            ),
+        ),
+        (
+            exists().where(
+                models.Reservation.table_id == staging.c.table_id,
+                models.Reservation.period.op("&&")(
+                    func.tstzrange(staging.c.reservation_time, staging.c.end_at, "[)")
+                ),
+            ),
+            literal(create_conflict_error().detail),
+        ),
+    )
+    checks = (
+        select(staging.c.line, detail.label("detail"))
+        .select_from(
+            staging.outerjoin(
+                TableModel,
+                and_(
+                    TableModel.id == staging.c.table_id,
+                    TableModel.archived_at.is_(None),
+                ),
+            )
+        )
+        .where(staging.c.detail.is_(None))
+        .subquery()
+    )
+    return (
+        update(staging)
+        .where(staging.c.line == checks.c.line, checks.c.detail.is_not(None))
+        .values(detail=checks.c.detail)
+    )
+
+
+def build_import_overlaps_query() -> Select:
+    """
+    Build the query returning the valid staged records of the tables whose
+    records overlap each other.
+
+    A table has no overlapping records if every record starts at or after
+    the end of the previous one, in order of start time. Only the records
+    of the other tables have to be swept.
+
+    Returns:
+        A query returning ``(line, table_id, reservation_time, end_at)`` in
+        order of table, start time and line.
+    """
+
+    order = (staging.c.reservation_time, staging.c.line)
+    previous_end = func.lag(staging.c.end_at).over(
+        partition_by=staging.c.table_id, order_by=order
+    )
+    clashes = (
+        select(
+            staging.c.table_id,
+            (staging.c.reservation_time < previous_end).label("clash"),
+        )
+        .where(staging.c.detail.is_(None))
+        .subquery()
+    )
+    return (
+        select(
+            staging.c.line,
+            staging.c.table_id,
+            staging.c.reservation_time,
+            staging.c.end_at,
+        )
+        .where(
+            staging.c.detail.is_(None),
+            staging.c.table_id.in_(
+                select(clashes.c.table_id).where(clashes.c.clash).distinct()
+            ),
+        )
+        .order_by(staging.c.table_id, *order)
+    )
+
+
+def build_import_overlap_rejection(lines: List[int]) -> Update:
+    """
+    Build the statement that rejects records overlapping earlier ones.
+
+    Args:
+        lines: The lines of the rejected records.
+
+    Returns:
+        The UPDATE setting ``detail`` of the records.
+    """
+
+    return (
+        update(staging)
+        .where(staging.c.line == any_(bindparam("lines", lines, type_=ARRAY(Integer))))
+        .values(detail=IMPORT_OVERLAP_DETAIL)
+    )
+
+
+def build_import_merge(window_start: datetime, window_end: datetime) -> Select:
+    """
+    Build the statement that inserts the valid staged records at once.
+
+    Slots booked concurrently since the validation are skipped and their
+    records rejected by the same statement.
+
+    Args:
+        window_start: Return inserted reservations ending after this time.
+        window_end: Return inserted reservations starting before this time.
+
+    Returns:
+        The statement returning the inserted reservations of the window.
+    """
+
+    columns = ["customer_name", "table_id", "reservation_time", "duration_minutes"]
+    inserted = (
+        insert(models.Reservation)
+        .from_select(
+            columns,
+            select(*(staging.c[name] for name in columns)).where(
+                staging.c.detail.is_(None)
+            ),
+        )
+        .on_conflict_do_nothing()
+        .returning(
+            models.Reservation.id,
+            models.Reservation.table_id,
+            models.Reservation.reservation_time,
+            models.Reservation.duration_minutes,
+            models.Reservation.period,
+        )
+        .cte("inserted")
+    )
+    skipped = (
+        update(staging)
+        .where(
+            staging.c.detail.is_(None),
+            ~exists().where(
+                inserted.c.table_id == staging.c.table_id,
+                inserted.c.reservation_time == staging.c.reservation_time,
+            ),
+        )
+        .values(detail=create_conflict_error().detail)
+        .returning(staging.c.line)
+        .cte("skipped")
+    )
+    return (
+        select(
+            inserted.c.id,
+            inserted.c.table_id,
+            inserted.c.reservation_time,
+            inserted.c.duration_minutes,
+        )
+        .where(
+            inserted.c.period.op("&&")(func.tstzrange(window_start, window_end, "[)"))
+        )
+        .add_cte(skipped)
+    )
+
+
+async def import_reservations(
+    db: AsyncSession, file: IO[str], import_format: ImportFormat, batch_size: int
+) -> schemas.ReservationImportResult:
+    """
+    Import reservations from a file in one transaction.
+
+    Records are validated in memory one by one and streamed to a temporary
+    staging table by ``COPY`` in batches. They are then checked against
+    tables and reservations by one UPDATE. Records overlapping an earlier
+    kept record of the same table are rejected; only the tables with such
+    overlaps are read back to be swept. The rest is merged into
+    ``reservations`` by one INSERT ... SELECT. Past times are allowed.
+
+    Args:
+        db: The database session.
+        file: The text file.
+        import_format: The file format, ``ndjson`` or ``csv``.
+        batch_size: The number of records sent by one ``COPY``.
+
+    Returns:
+        The number of imported records and the rejected ones, by line.
+
+    Raises:
+        HTTPException: If the file is not UTF-8 or the import fails.
+    """
+
+    records = read_records(file, import_format)
+    total = 0
+    try:
+        conn = await db.connection()
+        await conn.run_sync(staging.create)
+        driver = (await conn.get_raw_connection()).driver_connection
+        while batch := list(islice(records, batch_size)):
+            await driver.copy_records_to_table(
+                staging.name, records=batch, columns=list(staging.c.keys())
+            )
+            total += len(batch)
+
+        await db.execute(build_import_validation())
+        candidates = (await db.execute(build_import_overlaps_query())).all()
+        if candidates:
+            lines, table_ids, starts, ends = zip(*candidates)
+            overlapping = [
+                line
+                for line, overlaps in zip(
+                    lines, find_batch_overlaps(table_ids, starts, ends)
+                )
+                if overlaps
+            ]
+            await db.execute(build_import_overlap_rejection(overlapping))
+        created = (
+            await db.execute(
+                build_import_merge(
+                    reservation_index.window_start, reservation_index.window_end
+                )
+            )
+        ).all()
+        errors = [
+            schemas.ReservationImportError(line=line, detail=detail)
+            for line, detail in await db.execute(
+                select(staging.c.line, staging.c.detail)
+                .where(staging.c.detail.is_not(None))
+                .order_by(staging.c.line)
+            )
+        ]
+        await db.commit()
+
+    except UnicodeDecodeError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Файл импорта должен быть в кодировке UTF-8.",
+        )
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Ошибка импорта бронирований: {str(e)}",
+        )
+
+    for reservation in created:
+        reservation_index.add(reservation)
+    return schemas.ReservationImportResult(
+        imported=total - len(errors), rejected=len(errors), errors=errors
+    )
+
+
+async def spool_text(chunks: AsyncIterable[bytes]) -> IO[str]:
+    """
+    Buffer an uploaded file, on disk when it is large.
+
+    Args:
+        chunks: The body of the upload.
+
+    Returns:
+        The file as UTF-8 text, rewound; a byte order mark is skipped.
+    """
+
+    spool = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+    async for chunk in chunks:
+        spool.write(chunk)
+    spool.seek(0)
+    return io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+
+
+async def main(argv: Optional[list] = None) -> int:
+    """
+    Import a file from the command line and print the rejected records.
+
+    Args:
+        argv: The command line arguments.
+
+    Returns:
+        The exit code: 0 if every record was imported, 1 otherwise.
+    """
+
+    from src.database import SessionLocal
+
+    parser = argparse.ArgumentParser(
+        prog="python -m src.reservation.importer",
+        description="Import reservations from a CSV or NDJSON file.",
+    )
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["ndjson", "csv"])
+    parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+    import_format = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+
+    with open(args.path, encoding="utf-8-sig", newline="") as file:
+        async with SessionLocal() as db:
+            try:
+                result = await import_reservations(
+                    db, file, import_format, args.batch_size
+                )
+            except HTTPException as e:
+                print(e.detail, file=sys.stderr)
+                return 2
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["line", "detail"])
+    writer.writerows((error.line, error.detail) for error in result.errors)
+    print(f"Imported: {result.imported}, rejected: {result.rejected}.", file=sys.stderr)
+    return 1 if result.rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
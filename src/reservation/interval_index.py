@@ -0,0 +1,294 @@
+import asyncio
+import logging
+from bisect import bisect_right, insort
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config import settings
+from src.reservation.models import Reservation
+from src.tables import schemas as table_schemas
+from src.tables.models import Table
+
+logger = logging.getLogger(__name__)
+
+Slot = Tuple[datetime, datetime, int]
+
+
+def reservation_slot(reservation: Reservation) -> Slot:
+    """
+    Get the time slot of a reservation.
+
+    Args:
+        reservation: The reservation.
+
+    Returns:
+        A ``(start, end, id)`` tuple with timezone-aware times.
+    """
+
+    start = reservation.reservation_time
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    end = start + timedelta(minutes=max(reservation.duration_minutes, 0))
+    return start, end, reservation.id
+
+
+class ReservationIndex:
+    """
+    In-process index of upcoming reservations per table.
+
+    Reservations ending after the load time and starting before
+    ``load time + horizon`` are kept per table in a list sorted by start
+    time. The exclusion constraint keeps the reservations of a table
+    disjoint, so an overlap lookup is a single bisect.
+
+    The index only answers questions about the covered window and returns
+    None otherwise, so callers fall back to the database. It is a pre-check:
+    the database stays authoritative for inserts. Changes made by other
+    processes become visible after the next ``refresh``.
+    """
+
+    def __init__(self, horizon: timedelta):
+        self.horizon = horizon
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop all data; the index answers nothing until loaded again."""
+
+        self.loaded = False
+        self.window_start = self.window_end = datetime.min.replace(tzinfo=timezone.utc)
+        self._tables: Dict[int, table_schemas.Table] = {}
+        self._slots: Dict[int, List[Slot]] = {}
+        self._pending: Optional[List[Tuple[str, object]]] = None
+
+    async def load(self, db: AsyncSession) -> None:
+        """
+        Replace the index contents with the current database state.
+
+        Changes recorded while the queries run are applied on top of the
+        loaded snapshot.
+
+        Args:
+            db: The database session.
+        """
+
+        window_start = datetime.now(timezone.utc)
+        window_end = window_start + self.horizon
+        self._pending = []
+        try:
+            tables = (
+                await db.scalars(select(Table).where(Table.archived_at.is_(None)))
+            ).all()
+            reservations = (
+                await db.scalars(
+                    select(Reservation).where(
+                        Reservation.period.op("&&")(
+                            func.tstzrange(window_start, window_end, "[)")
+                        )
+                    )
+                )
+            ).all()
+        except BaseException:
+            self._pending = None
+            raise
+
+        pending, self._pending = self._pending, None
+        self._tables = {t.id: table_schemas.Table.model_validate(t) for t in tables}
+        self._slots = {}
+        for reservation in reservations:
+            self._insert(reservation.table_id, reservation_slot(reservation))
+        self.window_start, self.window_end = window_start, window_end
+        self.loaded = True
+
+        for method, arg in pending:
+            getattr(self, method)(arg)
+
+    async def refresh(self, session_factory: async_sessionmaker) -> bool:
+        """
+        Reload the index in a new session.
+
+        Args:
+            session_factory: Factory of database sessions.
+
+        Returns:
+            True if the index was loaded.
+        """
+
+        try:
+            async with session_factory() as db:
+                await self.load(db)
+        except (SQLAlchemyError, OSError) as e:
+            logger.warning(f"Reservation index was not loaded: {e}")
+            return False
+
+        logger.info(
+            f"Reservation index loaded: {len(self._tables)} tables, "
+            f"{sum(len(s) for s in self._slots.values())} reservations."
+        )
+        return True
+
+    async def run_refresh(
+        self, session_factory: async_sessionmaker, interval: float
+    ) -> None:
+        """
+        Reload the index every ``interval`` seconds, forever.
+
+        Args:
+            session_factory: Factory of database sessions.
+            interval: Seconds between reloads.
+        """
+
+        while True:
+            await asyncio.sleep(interval)
+            await self.refresh(session_factory)
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        """
+        Check whether the index can answer for a time slot.
+
+        Args:
+            start: The timezone-aware start of the slot.
+            end: The timezone-aware end of the slot.
+
+        Returns:
+            True if the slot lies inside the loaded window.
+        """
+
+        return self.loaded and self.window_start <= start and end <= self.window_end
+
+    def conflicts(
+        self, table_id: int, start: datetime, end: datetime
+    ) -> Optional[bool]:
+        """
+        Check whether a table is booked during a time slot.
+
+        Args:
+            table_id: The ID of the table.
+            start: The timezone-aware start of the slot.
+            end: The timezone-aware end of the slot.
+
+        Returns:
+            Whether a known reservation overlaps, or None if the slot is not
+            covered by the index.
+        """
+
+        if not self.covers(start, end):
+            return None
+        return self._overlaps(self._slots.get(table_id, ()), start, end)
+
+    def available_tables(
+        self,
+        start: datetime,
+        end: datetime,
+        seats: int = 1,
+        location: Optional[str] = None,
+        limit: int = 100,
+    ) -> Optional[List[table_schemas.Table]]:
+        """
+        Find tables free for a whole time slot, best fit first.
+
+        Args:
+            start: The timezone-aware start of the slot.
+            end: The timezone-aware end of the slot.
+            seats: The minimum number of seats.
+            location: Only tables at this location, if given.
+            limit: The maximum number of tables to return.
+
+        Returns:
+            The free tables ordered by (seats, id), or None if the slot is not
+            covered by the index.
+        """
+
+        if not self.covers(start, end):
+            return None
+
+        free = [
+            table
+            for table in self._tables.values()
+            if table.seats >= seats
+            and (location is None or table.location == location)
+            and not self._overlaps(self._slots.get(table.id, ()), start, end)
+        ]
+        free.sort(key=lambda table: (table.seats, table.id))
+        return free[:limit]
+
+    def add(self, reservation: Reservation) -> None:
+        """
+        Record a created reservation.
+
+        Args:
+            reservation: The created reservation.
+        """
+
+        if self._pending is not None:
+            self._pending.append(("add", reservation))
+        if not self.loaded:
+            return
+
+        slot = reservation_slot(reservation)
+        if slot[1] <= self.window_start or slot[0] >= self.window_end:
+            return
+        if slot not in self._slots.get(reservation.table_id, ()):
+            self._insert(reservation.table_id, slot)
+
+    def discard(self, reservation: Reservation) -> None:
+        """
+        Forget a deleted reservation.
+
+        Args:
+            reservation: The deleted reservation.
+        """
+
+        if self._pending is not None:
+            self._pending.append(("discard", reservation))
+        if not self.loaded:
+            return
+
+        slots = self._slots.get(reservation.table_id)
+        slot = reservation_slot(reservation)
+        if slots and slot in slots:
+            slots.remove(slot)
+
+    def add_table(self, table: Table) -> None:
+        """
+        Record a created table.
+
+        Args:
+            table: The created table.
+        """
+
+        if self._pending is not None:
+            self._pending.append(("add_table", table))
+        if self.loaded:
+            self._tables[table.id] = table_schemas.Table.model_validate(table)
+
+    def discard_table(self, table_id: int) -> None:
+        """
+        Forget a deleted or archived table and its reservations.
+
+        Args:
+            table_id: The ID of the table.
+        """
+
+        if self._pending is not None:
+            self._pending.append(("discard_table", table_id))
+        self._tables.pop(table_id, None)
+        self._slots.pop(table_id, None)
+
+    def _insert(self, table_id: int, slot: Slot) -> None:
+        insort(self._slots.setdefault(table_id, []), slot)
+
+    @staticmethod
+    def _overlaps(slots: List[Slot], start: datetime, end: datetime) -> bool:
+        # Slots of a table are disjoint, so sorting by start also sorts the
+        # ends: the first slot ending after ``start`` is the only candidate.
+        i = bisect_right(slots, start, key=lambda slot: slot[1])
+        return i < len(slots) and slots[i][0] < end
+
+
+reservation_index = ReservationIndex(
+    timedelta(days=settings.RESERVATION_INDEX_HORIZON_DAYS)
+)
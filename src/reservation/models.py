@@ -1,16 +1,28 @@
 from sqlalchemy import (
+    DDL,
     Column,
+    Computed,
     Integer,
     String,
     DateTime,
     ForeignKey,
     Index,
+    event,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSTZRANGE, ExcludeConstraint
+from sqlalchemy.orm import backref, relationship
 import datetime
 
 from src.database import Base
 
+# End time is computed in UTC wall time so that the expression stays IMMUTABLE,
+# as required for a generated column. Non-positive durations give an empty range.
+RESERVATION_PERIOD_SQL = (
+    "tstzrange(reservation_time, GREATEST(reservation_time, "
+    "(reservation_time AT TIME ZONE 'UTC' + make_interval(mins => duration_minutes)) "
+    "AT TIME ZONE 'UTC'), '[)')"
+)
+
 
 class Reservation(Base):
     """Model for reservations."""
@@ -18,20 +30,37 @@ class Reservation(Base):
     __tablename__ = "reservations"
 
     __table_args__ = (
-        Index("ix_table_id_reservation_time", "table_id", "reservation_time"),
+        # Covers filtered listings, so they run as index-only scans.
+        Index(
+            "ix_reservations_table_id_reservation_time_id",
+            "table_id",
+            "reservation_time",
+            "id",
+            postgresql_include=["customer_name", "duration_minutes"],
+        ),
+        Index("ix_reservations_reservation_time_id", "reservation_time", "id"),
+        ExcludeConstraint(
+            ("table_id", "="),
+            ("period", "&&"),
+            name="excl_reservations_table_id_period",
+            using="gist",
+        ),
     )
 
     id = Column(Integer, primary_key=True, index=True)
     customer_name = Column(String, nullable=False)
-    table_id = Column(Integer, ForeignKey("tables.id"), nullable=False)
+    table_id = Column(
+        Integer, ForeignKey("tables.id", ondelete="CASCADE"), nullable=False
+    )
     reservation_time = Column(
         DateTime(timezone=True),
         nullable=False,
         default=lambda: datetime.datetime.now(datetime.UTC),
     )
     duration_minutes = Column(Integer, nullable=False)
+    period = Column(TSTZRANGE, Computed(RESERVATION_PERIOD_SQL, persisted=True))
 
-    table = relationship("Table", backref="reservations")
+    table = relationship("Table", backref=backref("reservations", passive_deletes=True))
 
     def __repr__(self):
         return (
@@ -39,3 +68,39 @@ class Reservation(Base):
             f"table_id={self.table_id}, reservation_time={self.reservation_time}, "
             f"duration_minutes={self.duration_minutes})>"
         )
+
+
+class ReservationSeries(Base):
+    """Model for recurring reservations.
+
+    All occurrences are inserted into ``reservations`` when the series is
+    created.
+    """
+
+    __tablename__ = "reservation_series"
+
+    id = Column(Integer, primary_key=True, index=True)
+    customer_name = Column(String, nullable=False)
+    table_id = Column(
+        Integer, ForeignKey("tables.id", ondelete="CASCADE"), nullable=False
+    )
+    reservation_time = Column(DateTime(timezone=True), nullable=False)
+    duration_minutes = Column(Integer, nullable=False)
+    frequency = Column(String, nullable=False)
+    until = Column(DateTime(timezone=True), nullable=True)
+    count = Column(Integer, nullable=True)
+    ends_at = Column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<ReservationSeries(id={self.id}, table_id={self.table_id}, "
+            f"reservation_time={self.reservation_time}, "
+            f"frequency='{self.frequency}', ends_at={self.ends_at})>"
+        )
+
+
+event.listen(
+    Reservation.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist"),
+)
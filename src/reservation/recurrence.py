@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from src.reservation import schemas
+from src.reservation.utils import to_utc
+
+FREQUENCY_STEPS = {"daily": timedelta(days=1), "weekly": timedelta(weeks=1)}
+
+
+def expand_occurrences(
+    start: datetime,
+    rule: schemas.RecurrenceRule,
+    window_start: Optional[datetime] = None,
+    window_end: Optional[datetime] = None,
+    limit: Optional[int] = None,
+) -> List[datetime]:
+    """
+    Expand a recurrence rule into occurrence start times.
+
+    Occurrences are ``start + n * step`` in UTC, for ``n`` below ``count``
+    and up to ``until`` inclusive.
+
+    Args:
+        start: The timezone-aware start of the first occurrence.
+        rule: The recurrence rule.
+        window_start: Skip occurrences starting before this time, if given.
+        window_end: Stop at occurrences starting at or after this time, if given.
+        limit: The maximum number of occurrences to return, if given.
+
+    Returns:
+        The occurrence start times in order.
+    """
+
+    step = FREQUENCY_STEPS[rule.frequency]
+    until = to_utc(rule.until) if rule.until is not None else None
+
+    n = 0
+    if window_start is not None and window_start > start:
+        n = -((start - window_start) // step)
+
+    occurrences = []
+    while limit is None or len(occurrences) < limit:
+        if rule.count is not None and n >= rule.count:
+            break
+        occurrence = start + n * step
+        if until is not None and occurrence > until:
+            break
+        if window_end is not None and occurrence >= window_end:
+            break
+        occurrences.append(occurrence)
+        n += 1
+    return occurrences
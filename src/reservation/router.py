@@ -1,39 +1,162 @@
-from typing import List
+from datetime import datetime
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database import get_db
-from src.reservation.schemas import Reservation, ReservationCreate
+from src.config import settings
+from src.database import get_db, get_read_db
+from src.pagination import set_next_cursor
+from src.reservation.export import (
+    EXPORT_MEDIA_TYPES,
+    ExportFormat,
+    export_reservations,
+)
+from src.reservation.importer import ImportFormat, import_reservations, spool_text
+from src.reservation.schemas import (
+    RESERVATION_FIELDS,
+    Reservation,
+    ReservationAutoCreate,
+    ReservationBulkCreate,
+    ReservationBulkResult,
+    ReservationCreate,
+    ReservationImportResult,
+    ReservationSeries,
+    ReservationSeriesCreate,
+    reservation_rows,
+)
 from src.reservation.service import (
+    count_reservations,
     get_reservations,
     create_reservation,
+    create_reservation_auto,
+    create_reservation_series,
+    create_reservations_bulk,
     delete_reservation,
 )
+from src.serialization import parse_fields, rows_response
+from src.totals import set_total
 
 router = APIRouter(prefix="/reservations", tags=["Reservations"])
 
 
 @router.get("/", response_model=List[Reservation])
-def read_reservations(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def read_reservations(
+    skip: int = Query(0, ge=0, deprecated=True),
+    limit: int = Query(100, ge=0, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    table_id: Optional[int] = None,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    location: Optional[str] = None,
+    ids: Optional[List[int]] = Query(None, max_length=settings.MAX_PAGE_SIZE),
+    total: Optional[Literal["auto", "exact"]] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
     """
-    Read reservations
+    Read reservations ordered by reservation time
+
+    The cursor of the next page is returned in the ``X-Next-Cursor`` header,
+    the total count of matching reservations, if requested, in
+    ``X-Total-Count``. Rows are encoded to JSON directly; ``response_model``
+    only documents the output.
 
     Args:
-        skip: The number of records to skip.
+        skip: The number of records to skip (deprecated, use ``cursor``).
         limit: The maximum number of records to return.
+        cursor: The cursor of the previous page.
+        table_id: Only reservations of this table, if given.
+        start: Only reservations starting at or after this time, if given.
+        end: Only reservations starting before this time, if given.
+        location: Only reservations of tables at this location, if given.
+        ids: Only reservations with these IDs (``?ids=1&ids=2``), if given.
+        total: Return the total count, estimated for large results (``auto``)
+            or always exact (``exact``).
+        fields: Return only these comma-separated fields, if given.
         db: The database session.
 
     Returns:
         A list of reservations.
     """
 
-    return get_reservations(db, skip, limit)
+    fields = parse_fields(fields, RESERVATION_FIELDS)
+    reservations = await get_reservations(
+        db,
+        skip,
+        limit,
+        cursor=cursor,
+        table_id=table_id,
+        start=start,
+        end=end,
+        location=location,
+        ids=ids,
+        fields=fields,
+    )
+    response = rows_response(reservation_rows, reservations, fields)
+    set_next_cursor(
+        response,
+        reservations,
+        limit,
+        lambda r: [r.reservation_time.isoformat(), r.id],
+    )
+    if total is not None:
+        set_total(
+            response,
+            *await count_reservations(
+                db,
+                exact=total == "exact",
+                table_id=table_id,
+                start=start,
+                end=end,
+                location=location,
+                ids=ids,
+            ),
+        )
+    return response
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_reservations_stream(
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    format: ExportFormat = "ndjson",
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Export reservations ordered by reservation time as a stream
+
+    Args:
+        start: Only reservations starting at or after this time, if given.
+        end: Only reservations starting before this time, if given.
+        format: The output format, ``ndjson`` or ``csv``.
+        db: The database session.
+
+    Returns:
+        The streamed reservations.
+    """
+
+    return StreamingResponse(
+        export_reservations(db, format, settings.EXPORT_BATCH_SIZE, start, end),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="reservations.{format}"'
+        },
+    )
 
 
 @router.post("/", response_model=Reservation, status_code=status.HTTP_201_CREATED)
-def create_new_reservation(
-    reservation_in: ReservationCreate, db: Session = Depends(get_db)
+async def create_new_reservation(
+    reservation_in: ReservationCreate, db: AsyncSession = Depends(get_db)
 ):
     """
     Create new reservation
@@ -46,11 +169,138 @@ def create_new_reservation(
         The created reservation.
     """
 
-    return create_reservation(db, reservation_in)
+    return await create_reservation(db, reservation_in)
+
+
+@router.post("/auto", response_model=Reservation, status_code=status.HTTP_201_CREATED)
+async def create_new_reservation_auto(
+    reservation_in: ReservationAutoCreate, db: AsyncSession = Depends(get_db)
+):
+    """
+    Create new reservation at the best-fit free table
+
+    Args:
+        reservation_in: The party size, time, duration and optional location.
+        db: The database session.
+
+    Returns:
+        The created reservation.
+    """
+
+    return await create_reservation_auto(db, reservation_in)
+
+
+@router.post(
+    "/bulk",
+    response_model=ReservationBulkResult,
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        status.HTTP_207_MULTI_STATUS: {"model": ReservationBulkResult},
+        status.HTTP_409_CONFLICT: {"model": ReservationBulkResult},
+    },
+)
+async def create_reservations_in_bulk(
+    bulk_in: ReservationBulkCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Create many reservations at once
+
+    Returns 201 if every reservation was created, 207 if only some were
+    created in ``partial`` mode and 409 if the batch was rejected in
+    ``atomic`` mode.
+
+    Args:
+        bulk_in: The reservations and the mode.
+        response: The outgoing response.
+        db: The database session.
+
+    Returns:
+        The result of every reservation.
+    """
+
+    result = await create_reservations_bulk(db, bulk_in)
+    if result.failed:
+        response.status_code = (
+            status.HTTP_207_MULTI_STATUS
+            if bulk_in.mode == "partial"
+            else status.HTTP_409_CONFLICT
+        )
+    return result
+
+
+@router.post(
+    "/import",
+    response_model=ReservationImportResult,
+    status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_207_MULTI_STATUS: {"model": ReservationImportResult}},
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                media_type: {"schema": {"type": "string"}}
+                for media_type in EXPORT_MEDIA_TYPES.values()
+            },
+        }
+    },
+)
+async def import_reservations_file(
+    request: Request,
+    response: Response,
+    format: ImportFormat = "ndjson",
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Import reservations from a CSV or NDJSON request body
+
+    Accepts the format of ``GET /reservations/export``; past times are
+    allowed. Returns 201 if every record was imported and 207 if some were
+    rejected.
+
+    Args:
+        request: The request with the file as its body.
+        response: The outgoing response.
+        format: The file format, ``ndjson`` or ``csv``.
+        db: The database session.
+
+    Returns:
+        The number of imported records and the rejected ones, by line.
+    """
+
+    with await spool_text(request.stream()) as file:
+        result = await import_reservations(db, file, format, settings.IMPORT_BATCH_SIZE)
+    if result.rejected:
+        response.status_code = status.HTTP_207_MULTI_STATUS
+    return result
+
+
+@router.post(
+    "/recurring",
+    response_model=ReservationSeries,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_recurring_reservation(
+    series_in: ReservationSeriesCreate, db: AsyncSession = Depends(get_db)
+):
+    """
+    Create new recurring reservation
+
+    Args:
+        series_in: The first occurrence and the recurrence rule.
+        db: The database session.
+
+    Returns:
+        The series with its occurrences.
+    """
+
+    return await create_reservation_series(db, series_in)
 
 
 @router.delete("/{reservation_id}", response_model=Reservation)
-def delete_existing_reservation(reservation_id: int, db: Session = Depends(get_db)):
+async def delete_existing_reservation(
+    reservation_id: int, db: AsyncSession = Depends(get_db)
+):
     """
     Delete existing reservation
 
@@ -62,7 +312,7 @@ def delete_existing_reservation(reservation_id: int, db: Session = Depends(get_d
         The deleted reservation.
     """
 
-    result = delete_reservation(db, reservation_id)
+    result = await delete_reservation(db, reservation_id)
     if result is None:
         raise HTTPException(
             status_code=404, detail=f"Бронирование с id={reservation_id} не найдено."
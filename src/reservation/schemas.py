@@ -1,6 +1,10 @@
 from datetime import datetime
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+from typing_extensions import TypedDict
+
+from src.config import settings
 
 
 class ReservationBase(BaseModel):
@@ -24,3 +28,98 @@ class Reservation(ReservationBase):
     """Reservation schema."""
 
     id: int
+
+
+class ReservationRow(TypedDict):
+    """Reservation result row; keys in the order of ``Reservation`` fields."""
+
+    customer_name: str
+    table_id: int
+    reservation_time: datetime
+    duration_minutes: int
+    id: int
+
+
+reservation_rows = TypeAdapter(List[ReservationRow])
+RESERVATION_FIELDS = tuple(ReservationRow.__annotations__)
+
+
+class ReservationAutoCreate(BaseModel):
+    """Reservation creation schema without a table: the server picks one."""
+
+    customer_name: str
+    party_size: int = Field(gt=0)
+    reservation_time: datetime
+    duration_minutes: int
+    location: Optional[str] = None
+
+
+class FreeSlot(BaseModel):
+    """A free start time suggested instead of a conflicting reservation."""
+
+    table_id: int
+    reservation_time: datetime
+
+
+class RecurrenceRule(BaseModel):
+    """Recurrence rule: ends after ``count`` occurrences or at ``until``."""
+
+    frequency: Literal["daily", "weekly"]
+    until: Optional[datetime] = None
+    count: Optional[int] = Field(None, gt=0)
+
+
+class ReservationSeriesCreate(ReservationCreate):
+    """Recurring reservation creation schema; the first occurrence is
+    at ``reservation_time``."""
+
+    recurrence: RecurrenceRule
+
+
+class ReservationSeries(ReservationBase):
+    """Recurring reservation schema."""
+
+    id: int
+    recurrence: RecurrenceRule
+    reservations: List[Reservation]
+
+
+class ReservationBulkCreate(BaseModel):
+    """Bulk reservation creation schema."""
+
+    items: List[ReservationCreate] = Field(
+        min_length=1, max_length=settings.BULK_MAX_ITEMS
+    )
+    mode: Literal["atomic", "partial"] = "atomic"
+
+
+class ReservationBulkItem(BaseModel):
+    """Result of a single reservation in a bulk request."""
+
+    index: int
+    status_code: int
+    reservation: Optional[Reservation] = None
+    detail: Optional[str] = None
+
+
+class ReservationBulkResult(BaseModel):
+    """Bulk reservation creation result schema."""
+
+    created: int
+    failed: int
+    results: List[ReservationBulkItem]
+
+
+class ReservationImportError(BaseModel):
+    """A rejected record of an import."""
+
+    line: int
+    detail: str
+
+
+class ReservationImportResult(BaseModel):
+    """Reservation import result schema."""
+
+    imported: int
+    rejected: int
+    errors: List[ReservationImportError]
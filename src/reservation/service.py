@@ -1,44 +1,272 @@
-from typing import List
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
 
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import Row, delete, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.config import settings
+from src.database import use_autocommit
+from src.pagination import decode_cursor, validate_pagination
 from src.reservation import models, schemas
 from src.reservation.exceptions import (
+    create_conflict_error,
+    create_no_free_table_error,
+    create_table_not_found_error,
+    is_missing_table,
+    is_reservation_conflict,
+    validate_recurrence,
     validate_reservation_data,
-    validate_table_exists,
-    check_reservation_conflicts,
 )
-from src.reservation.utils import get_reservation_by_id
+from src.reservation.interval_index import reservation_index
+from src.reservation.recurrence import expand_occurrences
+from src.reservation.utils import (
+    build_auto_reservation_insert,
+    build_bulk_check_query,
+    build_free_gaps_query,
+    build_reservation_insert,
+    filter_reservations,
+    find_batch_overlaps,
+    find_free_slots,
+    is_slot_booked,
+    parse_cursor_time,
+    to_utc,
+)
+from src.serialization import projected_fields
+from src.totals import count_rows
+
+logger = logging.getLogger(__name__)
+
+AUTO_SEATING_ATTEMPTS = 3
 
 
-def get_reservations(
-    db: Session, skip: int = 0, limit: int = 100
-) -> List[models.Reservation]:
+async def get_reservations(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    table_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    location: Optional[str] = None,
+    ids: Optional[List[int]] = None,
+    fields: Optional[List[str]] = None,
+) -> List[Row]:
     """
-    Get reservations with pagination
+    Get reservations ordered by time with keyset pagination
+
+    Filters are combined. Only the columns of ``schemas.ReservationRow`` are
+    selected, as plain rows: listings of one table are then served by the
+    covering (table_id, reservation_time, id) index as index-only scans.
+    With ``fields``, only those columns and the pagination keys are selected.
 
     Args:
         db: The database session.
-        skip: The number of records to skip.
+        skip: The number of records to skip (deprecated, use ``cursor``).
         limit: The maximum number of records to return.
+        cursor: The cursor of the previous page.
+        table_id: Only reservations of this table, if given.
+        start: Only reservations starting at or after this time, if given.
+        end: Only reservations starting before this time, if given.
+        location: Only reservations of tables at this location, if given.
+        ids: Only reservations with these IDs, looked up by one IN query.
+        fields: The fields to return, or None for all of them.
+
+    Returns:
+        A list of reservation rows.
+    """
+
+    validate_pagination(skip, cursor)
+
+    columns = projected_fields(
+        schemas.RESERVATION_FIELDS, fields, ("reservation_time", "id")
+    )
+    stmt = select(*(getattr(models.Reservation, name) for name in columns)).order_by(
+        models.Reservation.reservation_time, models.Reservation.id
+    )
+    stmt = filter_reservations(stmt, table_id, start, end, location, ids)
+
+    if cursor is not None:
+        last_time, last_id = decode_cursor(cursor, (str, int))
+        stmt = stmt.where(
+            tuple_(models.Reservation.reservation_time, models.Reservation.id)
+            > tuple_(parse_cursor_time(last_time), last_id)
+        )
+    elif skip:
+        stmt = stmt.offset(skip)
+
+    stmt = stmt.limit(limit)
+    return (await db.execute(stmt)).all()
+
+
+async def count_reservations(
+    db: AsyncSession,
+    exact: bool = False,
+    table_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    location: Optional[str] = None,
+    ids: Optional[List[int]] = None,
+) -> Tuple[int, bool]:
+    """
+    Count the reservations matching the listing filters.
+
+    Args:
+        db: The database session.
+        exact: Always count exactly instead of using the planner estimate
+            for large results.
+        table_id: Only reservations of this table, if given.
+        start: Only reservations starting at or after this time, if given.
+        end: Only reservations starting before this time, if given.
+        location: Only reservations of tables at this location, if given.
+        ids: Only reservations with these IDs, if given.
+
+    Returns:
+        The number of reservations and whether it is exact.
+    """
+
+    stmt = filter_reservations(
+        select(models.Reservation.id), table_id, start, end, location, ids
+    )
+    return await count_rows(db, stmt, exact)
+
+
+def free_gaps_window(
+    reservation_in: schemas.ReservationCreate,
+) -> Tuple[datetime, datetime]:
+    """
+    Get the window searched for free slots around a requested reservation.
+
+    Args:
+        reservation_in: The requested reservation data.
+
+    Returns:
+        ``CONFLICT_SUGGESTION_WINDOW_HOURS`` around the requested time, from
+        now at the earliest and always covering the requested slot.
+    """
+
+    start = to_utc(reservation_in.reservation_time)
+    end = start + timedelta(minutes=reservation_in.duration_minutes)
+    radius = timedelta(hours=settings.CONFLICT_SUGGESTION_WINDOW_HOURS)
+    return max(start - radius, datetime.now(timezone.utc)), max(start + radius, end)
+
+
+async def read_free_gaps(
+    db: AsyncSession,
+    reservation_in: schemas.ReservationCreate,
+    window_start: datetime,
+    window_end: datetime,
+) -> Optional[List[Row]]:
+    """
+    Read the reservations of the requested table, and of equivalent tables
+    if enabled, with their free gaps.
+
+    Args:
+        db: The database session.
+        reservation_in: The requested reservation data.
+        window_start: The start of the searched window.
+        window_end: The end of the searched window.
 
     Returns:
-        A list of reservations.
+        Rows of the query built by ``build_free_gaps_query``, or None if the
+        query failed.
     """
 
-    stmt = select(models.Reservation).offset(skip).limit(limit)
-    return db.scalars(stmt).all()
+    try:
+        return (
+            await db.execute(
+                build_free_gaps_query(
+                    reservation_in.table_id,
+                    window_start,
+                    window_end,
+                    settings.CONFLICT_SUGGEST_EQUIVALENT_TABLES,
+                )
+            )
+        ).all()
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.warning(f"Free slots were not suggested: {e}")
+        return None
+
+
+def pick_free_slots(
+    reservation_in: schemas.ReservationCreate,
+    rows: Optional[List[Row]],
+    window_start: datetime,
+    window_end: datetime,
+) -> List[schemas.FreeSlot]:
+    """
+    Pick the free slots nearest to a conflicting reservation.
+
+    Args:
+        reservation_in: The conflicting reservation data.
+        rows: Rows read by ``read_free_gaps``, or None if they are missing.
+        window_start: The start of the searched window.
+        window_end: The end of the searched window.
 
+    Returns:
+        Up to ``CONFLICT_SUGGESTIONS`` free slots, nearest first.
+    """
 
-def create_reservation(
-    db: Session, reservation_in: schemas.ReservationCreate
+    if rows is None or settings.CONFLICT_SUGGESTIONS <= 0:
+        return []
+    return find_free_slots(
+        rows,
+        reservation_in.table_id,
+        to_utc(reservation_in.reservation_time),
+        timedelta(minutes=reservation_in.duration_minutes),
+        window_start,
+        window_end,
+        settings.CONFLICT_SUGGESTIONS,
+    )
+
+
+async def suggest_free_slots(
+    db: AsyncSession, reservation_in: schemas.ReservationCreate
+) -> List[schemas.FreeSlot]:
+    """
+    Find the free start times nearest to a conflicting reservation.
+
+    The free gaps of the table, and of equivalent tables if enabled, within
+    ``CONFLICT_SUGGESTION_WINDOW_HOURS`` of the requested time are read by
+    one query. Suggestions are best effort: a failing query yields none.
+
+    Args:
+        db: The database session.
+        reservation_in: The conflicting reservation data.
+
+    Returns:
+        Up to ``CONFLICT_SUGGESTIONS`` free slots, nearest first.
+    """
+
+    if settings.CONFLICT_SUGGESTIONS <= 0:
+        return []
+
+    window = free_gaps_window(reservation_in)
+    rows = await read_free_gaps(db, reservation_in, *window)
+    return pick_free_slots(reservation_in, rows, *window)
+
+
+async def create_reservation(
+    db: AsyncSession, reservation_in: schemas.ReservationCreate
 ) -> models.Reservation:
     """
     Create a new reservation.
 
+    Conflicts known to the in-process reservation index are confirmed by the
+    query that suggests the nearest free slots, so a conflict costs one
+    query. The index may lag behind other processes: if the database shows
+    the slot free, or cannot be asked, the booking goes ahead. The table
+    check, the overlap check and the insert are done by a single INSERT ...
+    SELECT ... RETURNING statement: a missing table yields no row and double
+    bookings are rejected by the exclusion constraint on (table_id, period).
+    Outside of a transaction the statement runs in autocommit mode, so the
+    booking costs one round trip. A conflict found by the insert costs one
+    more query, which suggests the free slots.
+
     Args:
         db: The database session.
         reservation_in: The reservation data.
@@ -47,56 +275,348 @@ def create_reservation(
         The created reservation.
     """
 
-    validate_table_exists(db, reservation_in.table_id)
-
     validate_reservation_data(reservation_in)
 
+    start = to_utc(reservation_in.reservation_time)
+    end = start + timedelta(minutes=reservation_in.duration_minutes)
+    if reservation_index.conflicts(reservation_in.table_id, start, end):
+        window = free_gaps_window(reservation_in)
+        rows = await read_free_gaps(db, reservation_in, *window)
+        if rows is not None and is_slot_booked(
+            rows, reservation_in.table_id, start, end
+        ):
+            raise create_conflict_error(pick_free_slots(reservation_in, rows, *window))
+
     try:
-        check_reservation_conflicts(db, reservation_in)
+        await use_autocommit(db)
+        reservation = (
+            await db.scalars(build_reservation_insert(reservation_in))
+        ).first()
+        await db.commit()
 
-        reservation = models.Reservation(
-            customer_name=reservation_in.customer_name,
-            table_id=reservation_in.table_id,
-            reservation_time=reservation_in.reservation_time,
-            duration_minutes=reservation_in.duration_minutes,
+    except SQLAlchemyError as e:
+        await db.rollback()
+        if is_reservation_conflict(e):
+            raise create_conflict_error(await suggest_free_slots(db, reservation_in))
+        if is_missing_table(e):
+            raise create_table_not_found_error(reservation_in.table_id)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Ошибка создания бронирования: {str(e)}",
         )
 
-        db.add(reservation)
-        db.commit()
-        db.refresh(reservation)
+    if reservation is None:
+        raise create_table_not_found_error(reservation_in.table_id)
+
+    reservation_index.add(reservation)
+    return reservation
+
+
+async def create_reservation_auto(
+    db: AsyncSession, reservation_in: schemas.ReservationAutoCreate
+) -> models.Reservation:
+    """
+    Create a reservation at the smallest free table that fits the party.
+
+    The table is picked, locked and booked by a single statement. A table
+    booked by a concurrent request between the pick and the insert is
+    rejected by the exclusion constraint, and the pick is retried.
+
+    Args:
+        db: The database session.
+        reservation_in: The party size, time, duration and location.
+
+    Returns:
+        The created reservation.
+    """
+
+    validate_reservation_data(reservation_in)
+
+    for _ in range(AUTO_SEATING_ATTEMPTS):
+        try:
+            await use_autocommit(db)
+            reservation = (
+                await db.scalars(build_auto_reservation_insert(reservation_in))
+            ).first()
+            await db.commit()
+
+        except SQLAlchemyError as e:
+            await db.rollback()
+            if is_reservation_conflict(e):
+                continue
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Ошибка создания бронирования: {str(e)}",
+            )
+
+        if reservation is None:
+            break
+        reservation_index.add(reservation)
         return reservation
 
+    raise create_no_free_table_error()
+
+
+async def create_reservations_bulk(
+    db: AsyncSession, bulk_in: schemas.ReservationBulkCreate
+) -> schemas.ReservationBulkResult:
+    """
+    Create many reservations at once.
+
+    Every item is validated like a single reservation. Overlaps within the
+    batch are found in memory by a sort and sweep per table, overlaps with
+    existing reservations and missing tables by one set-based query, and
+    the remaining items are inserted by a multi-row INSERT ... RETURNING.
+
+    In ``atomic`` mode nothing is inserted if any item fails. In ``partial``
+    mode the valid items are inserted and the failed ones are reported.
+
+    Args:
+        db: The database session.
+        bulk_in: The reservations and the mode.
+
+    Returns:
+        The result of every item, in request order.
+    """
+
+    items = bulk_in.items
+    errors: Dict[int, HTTPException] = {}
+    for i, item in enumerate(items):
+        try:
+            validate_reservation_data(item)
+        except HTTPException as e:
+            errors[i] = e
+
+    candidates = [i for i in range(len(items)) if i not in errors]
+    table_ids = [items[i].table_id for i in candidates]
+    starts = [to_utc(items[i].reservation_time) for i in candidates]
+    ends = [
+        start + timedelta(minutes=items[i].duration_minutes)
+        for i, start in zip(candidates, starts)
+    ]
+    for i, overlaps in zip(candidates, find_batch_overlaps(table_ids, starts, ends)):
+        if overlaps:
+            errors[i] = create_conflict_error()
+
+    created: Dict[int, models.Reservation] = {}
+    try:
+        await use_autocommit(db)
+
+        if len(errors) < len(items):
+            checks = await db.execute(build_bulk_check_query(table_ids, starts, ends))
+            for idx, missing, _ in checks:
+                i = candidates[idx]
+                if i not in errors:
+                    errors[i] = (
+                        create_table_not_found_error(items[i].table_id)
+                        if missing
+                        else create_conflict_error()
+                    )
+
+        accepted = [i for i in candidates if i not in errors]
+        if accepted and not (errors and bulk_in.mode == "atomic"):
+            stmt = insert(models.Reservation).returning(models.Reservation)
+            if bulk_in.mode == "partial":
+                # Slots booked concurrently since the check are skipped.
+                stmt = stmt.on_conflict_do_nothing()
+
+            rows = {
+                (r.table_id, r.reservation_time): r
+                for r in await db.scalars(
+                    stmt,
+                    [
+                        {**items[i].model_dump(), "reservation_time": start}
+                        for i, start in zip(candidates, starts)
+                        if i not in errors
+                    ],
+                )
+            }
+            for i, start in zip(candidates, starts):
+                if i in errors:
+                    continue
+                reservation = rows.get((items[i].table_id, start))
+                if reservation is None:
+                    errors[i] = create_conflict_error()
+                else:
+                    created[i] = reservation
+                    reservation_index.add(reservation)
+
+        await db.commit()
+
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
+        if is_reservation_conflict(e):
+            raise create_conflict_error()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Ошибка создания бронирования: {str(e)}",
+            detail=f"Ошибка создания бронирований: {str(e)}",
         )
 
+    results = []
+    for i in range(len(items)):
+        if i in created:
+            results.append(
+                schemas.ReservationBulkItem(
+                    index=i,
+                    status_code=status.HTTP_201_CREATED,
+                    reservation=schemas.Reservation.model_validate(created[i]),
+                )
+            )
+        elif i in errors:
+            results.append(
+                schemas.ReservationBulkItem(
+                    index=i,
+                    status_code=errors[i].status_code,
+                    detail=errors[i].detail,
+                )
+            )
+        else:
+            results.append(
+                schemas.ReservationBulkItem(
+                    index=i,
+                    status_code=status.HTTP_424_FAILED_DEPENDENCY,
+                    detail="Бронирование не создано: в пакете есть ошибки.",
+                )
+            )
+
+    return schemas.ReservationBulkResult(
+        created=len(created), failed=len(errors), results=results
+    )
+
 
-def delete_reservation(db: Session, reservation_id: int) -> None:
+async def create_reservation_series(
+    db: AsyncSession, series_in: schemas.ReservationSeriesCreate
+) -> schemas.ReservationSeries:
     """
-    Delete a reservation.
+    Create a recurring reservation.
+
+    All occurrences, at most ``BULK_MAX_ITEMS``, are expanded and checked
+    against existing reservations by one set-based query. The rule is
+    stored and every occurrence is inserted by one multi-row INSERT in the
+    same transaction, so later bookings of the same slots are rejected by
+    the exclusion constraint like any other double booking.
 
     Args:
         db: The database session.
-        reservation_id: The ID of the reservation to delete.
+        series_in: The first occurrence and the recurrence rule.
+
+    Returns:
+        The series with its occurrences.
     """
 
+    validate_reservation_data(series_in)
+
+    rule = series_in.recurrence
+    start = to_utc(series_in.reservation_time)
+    occurrences = expand_occurrences(start, rule, limit=settings.BULK_MAX_ITEMS + 1)
+    validate_recurrence(rule, len(occurrences))
+
+    duration = timedelta(minutes=series_in.duration_minutes)
+
     try:
-        reservation = get_reservation_by_id(db, reservation_id)
+        checks = (
+            await db.execute(
+                build_bulk_check_query(
+                    [series_in.table_id] * len(occurrences),
+                    occurrences,
+                    [occurrence + duration for occurrence in occurrences],
+                )
+            )
+        ).all()
+        if checks:
+            await db.rollback()
+            if any(missing for _, missing, _ in checks):
+                raise create_table_not_found_error(series_in.table_id)
+            raise create_conflict_error()
 
-        if not reservation:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Бронирование с id {reservation_id} не найдено",
+        series = models.ReservationSeries(
+            customer_name=series_in.customer_name,
+            table_id=series_in.table_id,
+            reservation_time=start,
+            duration_minutes=series_in.duration_minutes,
+            frequency=rule.frequency,
+            until=rule.until,
+            count=rule.count,
+            ends_at=occurrences[-1],
+        )
+        db.add(series)
+        await db.flush()
+
+        reservations = (
+            await db.scalars(
+                insert(models.Reservation).returning(
+                    models.Reservation, sort_by_parameter_order=True
+                ),
+                [
+                    {
+                        "customer_name": series_in.customer_name,
+                        "table_id": series_in.table_id,
+                        "reservation_time": occurrence,
+                        "duration_minutes": series_in.duration_minutes,
+                    }
+                    for occurrence in occurrences
+                ],
             )
+        ).all()
+        await db.commit()
 
-        db.delete(reservation)
-        db.commit()
+    except SQLAlchemyError as e:
+        await db.rollback()
+        if is_reservation_conflict(e):
+            raise create_conflict_error()
+        if is_missing_table(e):
+            raise create_table_not_found_error(series_in.table_id)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Ошибка создания серии бронирований: {str(e)}",
+        )
+
+    for reservation in reservations:
+        reservation_index.add(reservation)
+
+    return schemas.ReservationSeries(
+        id=series.id,
+        customer_name=series.customer_name,
+        table_id=series.table_id,
+        reservation_time=start,
+        duration_minutes=series.duration_minutes,
+        recurrence=rule,
+        reservations=[schemas.Reservation.model_validate(r) for r in reservations],
+    )
+
+
+async def delete_reservation(
+    db: AsyncSession, reservation_id: int
+) -> Optional[models.Reservation]:
+    """
+    Delete a reservation.
+
+    The row is removed by a single DELETE ... RETURNING statement.
+
+    Args:
+        db: The database session.
+        reservation_id: The ID of the reservation to delete.
+
+    Returns:
+        The deleted reservation, or None if it does not exist.
+    """
+
+    stmt = (
+        delete(models.Reservation)
+        .where(models.Reservation.id == reservation_id)
+        .returning(models.Reservation)
+    )
+
+    try:
+        await use_autocommit(db)
+        reservation = (await db.scalars(stmt)).first()
+        await db.commit()
+        if reservation is not None:
+            reservation_index.discard(reservation)
+        return reservation
 
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка удаления бронирования: {str(e)}",
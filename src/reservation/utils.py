@@ -1,20 +1,500 @@
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from typing import List, Optional, Sequence, Tuple
 
-from src.reservation import models
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy import (
+    DateTime,
+    Insert,
+    Integer,
+    Select,
+    and_,
+    bindparam,
+    column,
+    exists,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import aliased
 
+from src.reservation import models, schemas
+from src.tables.models import Table
 
-def get_reservation_by_id(db: Session, reservation_id: int) -> models.Reservation:
+NUMPY_SWEEP_THRESHOLD = 256
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def build_reservation_insert(reservation_in: schemas.ReservationCreate) -> Insert:
+    """
+    Build an INSERT ... SELECT ... RETURNING statement for a reservation.
+
+    The row is selected from ``tables``, so nothing is inserted when the table
+    does not exist or is archived. Overlaps are rejected by the exclusion constraint.
+
+    Args:
+        reservation_in: The reservation data.
+
+    Returns:
+        The insert statement returning the created reservation.
+    """
+
+    source = select(
+        literal(reservation_in.customer_name),
+        Table.id,
+        literal(
+            reservation_in.reservation_time, models.Reservation.reservation_time.type
+        ),
+        literal(reservation_in.duration_minutes),
+    ).where(Table.id == reservation_in.table_id, Table.archived_at.is_(None))
+
+    return (
+        insert(models.Reservation)
+        .from_select(
+            ["customer_name", "table_id", "reservation_time", "duration_minutes"],
+            source,
+        )
+        .returning(models.Reservation)
+    )
+
+
+def build_auto_reservation_insert(
+    reservation_in: schemas.ReservationAutoCreate,
+) -> Insert:
+    """
+    Build an INSERT ... RETURNING statement booking the best-fit free table.
+
+    The smallest active table with enough seats (at the requested location,
+    if given) and no overlapping reservation is picked and locked with
+    ``FOR NO KEY UPDATE SKIP LOCKED``, so concurrent requests choose
+    different tables instead of waiting on each other. The lock does not
+    block inserts of reservations referencing the table.
+
+    Args:
+        reservation_in: The reservation data.
+
+    Returns:
+        The insert statement returning the created reservation; it inserts
+        nothing if no table is free.
+    """
+
+    start = to_utc(reservation_in.reservation_time)
+    end = start + timedelta(minutes=reservation_in.duration_minutes)
+
+    candidate = (
+        select(Table.id)
+        .where(
+            Table.archived_at.is_(None),
+            Table.seats >= reservation_in.party_size,
+            ~exists().where(
+                models.Reservation.table_id == Table.id,
+                models.Reservation.period.op("&&")(func.tstzrange(start, end, "[)")),
+            ),
+        )
+        .order_by(Table.seats, Table.id)
+        .limit(1)
+        .with_for_update(skip_locked=True, key_share=True)
+    )
+    if reservation_in.location is not None:
+        candidate = candidate.where(Table.location == reservation_in.location)
+    candidate = candidate.cte("candidate")
+
+    source = select(
+        literal(reservation_in.customer_name),
+        candidate.c.id,
+        literal(start, models.Reservation.reservation_time.type),
+        literal(reservation_in.duration_minutes),
+    )
+
+    return (
+        insert(models.Reservation)
+        .from_select(
+            ["customer_name", "table_id", "reservation_time", "duration_minutes"],
+            source,
+        )
+        .returning(models.Reservation)
+    )
+
+
+def to_utc(value: datetime) -> datetime:
+    """
+    Make a reservation time timezone-aware.
+
+    Args:
+        value: The reservation time; naive values are treated as UTC.
+
+    Returns:
+        The timezone-aware reservation time.
+    """
+
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def find_batch_overlaps(
+    table_ids: Sequence[int], starts: Sequence[datetime], ends: Sequence[datetime]
+) -> List[bool]:
+    """
+    Find reservations of a batch that overlap each other.
+
+    The batch is sorted by (table_id, start) and swept once per table: a
+    reservation overlaps if it starts before the end of the last kept
+    reservation of the same table. The earliest reservation of an
+    overlapping group is kept, and rejected reservations never reject
+    later ones. Large batches are checked with NumPy first, so that only
+    tables with overlaps are swept.
+
+    Args:
+        table_ids: The table of each reservation.
+        starts: The timezone-aware start of each reservation.
+        ends: The timezone-aware end of each reservation.
+
+    Returns:
+        A flag per reservation, True if it overlaps a kept earlier one.
+    """
+
+    if len(table_ids) >= NUMPY_SWEEP_THRESHOLD:
+        return _find_batch_overlaps_numpy(table_ids, starts, ends)
+
+    overlaps = [False] * len(table_ids)
+    order = sorted(range(len(table_ids)), key=lambda i: (table_ids[i], starts[i], i))
+    for _, group in groupby(order, key=lambda i: table_ids[i]):
+        group = list(group)
+        flags = _sweep_table([starts[i] for i in group], [ends[i] for i in group])
+        for i, overlap in zip(group, flags):
+            overlaps[i] = overlap
+    return overlaps
+
+
+def _sweep_table(starts: Sequence, ends: Sequence) -> List[bool]:
+    """
+    Flag reservations of one table, in order of start, that overlap the
+    last kept one.
+
+    Args:
+        starts: The start of each reservation, in order.
+        ends: The end of each reservation.
+
+    Returns:
+        A flag per reservation, True if it is rejected.
+    """
+
+    overlaps = []
+    kept_end = None
+    for start, end in zip(starts, ends):
+        overlap = kept_end is not None and start < kept_end
+        overlaps.append(overlap)
+        if not overlap:
+            kept_end = end
+    return overlaps
+
+
+def _find_batch_overlaps_numpy(
+    table_ids: Sequence[int], starts: Sequence[datetime], ends: Sequence[datetime]
+) -> List[bool]:
+    """Vectorized version of ``find_batch_overlaps``."""
+
+    start = np.array([(t - _EPOCH) // _MICROSECOND for t in starts], dtype=np.int64)
+    end = np.array([(t - _EPOCH) // _MICROSECOND for t in ends], dtype=np.int64)
+    tables = np.asarray(table_ids, dtype=np.int64)
+
+    order = np.lexsort((np.arange(len(start)), start, tables))
+    tables, start, end = tables[order], start[order], end[order]
+
+    # A table has no overlaps if every reservation starts at or after the
+    # end of the previous one; only the other tables need a sweep.
+    same_table = tables[1:] == tables[:-1]
+    clashes = np.flatnonzero(same_table & (start[1:] < end[:-1])) + 1
+    bounds = np.append(np.flatnonzero(np.append(True, ~same_table)), len(start))
+
+    overlaps = np.zeros(len(start), dtype=bool)
+    for group in np.unique(np.searchsorted(bounds, clashes, side="right") - 1):
+        lo, hi = bounds[group], bounds[group + 1]
+        overlaps[lo:hi] = _sweep_table(start[lo:hi].tolist(), end[lo:hi].tolist())
+
+    result = np.zeros(len(start), dtype=bool)
+    result[order] = overlaps
+    return result.tolist()
+
+
+def build_bulk_check_query(
+    table_ids: Sequence[int], starts: Sequence[datetime], ends: Sequence[datetime]
+) -> Select:
+    """
+    Build a query finding batch reservations that cannot be inserted.
+
+    The batch is passed as arrays and unnested, so the query has four
+    parameters regardless of the batch size. Each reservation is checked
+    against the GiST index of the exclusion constraint.
+
+    Args:
+        table_ids: The table of each reservation.
+        starts: The start of each reservation.
+        ends: The end of each reservation.
+
+    Returns:
+        A query returning ``(idx, missing, conflict)`` for every reservation
+        whose table does not exist or whose time slot is already booked.
+    """
+
+    timestamp = DateTime(timezone=True)
+    items = (
+        func.unnest(
+            bindparam("idx", list(range(len(table_ids))), type_=ARRAY(Integer)),
+            bindparam("table_ids", list(table_ids), type_=ARRAY(Integer)),
+            bindparam("starts", list(starts), type_=ARRAY(timestamp)),
+            bindparam("ends", list(ends), type_=ARRAY(timestamp)),
+        )
+        .table_valued(
+            column("idx", Integer),
+            column("table_id", Integer),
+            column("start_at", timestamp),
+            column("end_at", timestamp),
+        )
+        .render_derived(name="items")
+    )
+
+    checks = (
+        select(
+            items.c.idx,
+            Table.id.is_(None).label("missing"),
+            exists()
+            .where(
+                models.Reservation.table_id == items.c.table_id,
+                models.Reservation.period.op("&&")(
+                    func.tstzrange(items.c.start_at, items.c.end_at, "[)")
+                ),
+            )
+            .label("conflict"),
+        )
+        .select_from(
+            items.outerjoin(
+                Table, and_(Table.id == items.c.table_id, Table.archived_at.is_(None))
+            )
+        )
+        .subquery("checks")
+    )
+
+    return select(checks).where(checks.c.missing | checks.c.conflict)
+
+
+def build_free_gaps_query(
+    table_id: int,
+    window_start: datetime,
+    window_end: datetime,
+    equivalent_tables: bool = False,
+) -> Select:
     """
-    Get a reservation by its ID.
+    Build a query returning the reservations of a table around a time window
+    together with their neighbours.
+
+    The reservations of every candidate table overlapping the window are
+    ordered by start time; LAG and LEAD give the end of the previous and the
+    start of the next reservation, so each row describes the free gaps
+    around one reservation. Tables without reservations in the window get a
+    single row of NULLs. The rows come from the GiST index on
+    (table_id, period).
 
     Args:
-        db: The database session.
-        reservation_id: The ID of the reservation to retrieve.
+        table_id: The ID of the requested table.
+        window_start: The start of the searched window.
+        window_end: The end of the searched window.
+        equivalent_tables: Also search active tables at the same location
+            with at least as many seats.
 
     Returns:
-        The reservation object.
+        A query returning ``(table_id, start, end, previous_end, next_start)``.
+    """
+
+    candidates = select(Table.id).where(Table.archived_at.is_(None))
+    if equivalent_tables:
+        requested = aliased(Table)
+        candidates = candidates.join(requested, requested.id == table_id).where(
+            or_(
+                Table.id == table_id,
+                and_(
+                    Table.location == requested.location,
+                    Table.seats >= requested.seats,
+                ),
+            )
+        )
+    else:
+        candidates = candidates.where(Table.id == table_id)
+    candidates = candidates.subquery("candidates")
+
+    start = func.lower(models.Reservation.period)
+    end = func.upper(models.Reservation.period)
+    window = {"partition_by": candidates.c.id, "order_by": start}
+
+    return select(
+        candidates.c.id,
+        start,
+        end,
+        func.lag(end).over(**window),
+        func.lead(start).over(**window),
+    ).select_from(
+        candidates.outerjoin(
+            models.Reservation,
+            and_(
+                models.Reservation.table_id == candidates.c.id,
+                models.Reservation.period.op("&&")(
+                    func.tstzrange(window_start, window_end, "[)")
+                ),
+                ~func.isempty(models.Reservation.period),
+            ),
+        )
+    )
+
+
+def find_free_slots(
+    rows: Sequence[tuple],
+    table_id: int,
+    start: datetime,
+    duration: timedelta,
+    window_start: datetime,
+    window_end: datetime,
+    limit: int,
+) -> List[schemas.FreeSlot]:
+    """
+    Pick the free start times nearest to a requested one.
+
+    Every free gap long enough for the reservation contributes its start
+    time nearest to the requested one. Ties are broken in favour of the
+    requested table, then of earlier times.
+
+    Args:
+        rows: Rows of the query built by ``build_free_gaps_query``.
+        table_id: The ID of the requested table.
+        start: The requested timezone-aware start time.
+        duration: The duration of the reservation.
+        window_start: The start of the searched window; earlier times are
+            never suggested.
+        window_end: The end of the searched window.
+        limit: The maximum number of suggestions.
+
+    Returns:
+        Up to ``limit`` free slots, nearest first.
+    """
+
+    gaps: List[Tuple[int, datetime, Optional[datetime]]] = []
+    for row_table_id, busy_from, busy_until, previous_end, next_start in rows:
+        if busy_from is None:
+            gaps.append((row_table_id, window_start, window_end))
+            continue
+        if previous_end is None:
+            gaps.append((row_table_id, window_start, busy_from))
+        gaps.append((row_table_id, busy_until, next_start or window_end))
+
+    candidates = []
+    for gap_table_id, gap_start, gap_end in gaps:
+        earliest = max(gap_start, window_start)
+        latest = min(gap_end, window_end) - duration
+        if earliest > latest:
+            continue
+        slot_start = min(max(start, earliest), latest)
+        candidates.append(
+            (
+                abs(slot_start - start),
+                gap_table_id != table_id,
+                slot_start,
+                gap_table_id,
+            )
+        )
+
+    candidates.sort()
+    return [
+        schemas.FreeSlot(table_id=slot_table_id, reservation_time=slot_start)
+        for _, _, slot_start, slot_table_id in candidates[:limit]
+    ]
+
+
+def is_slot_booked(
+    rows: Sequence[tuple], table_id: int, start: datetime, end: datetime
+) -> bool:
+    """
+    Check whether a table is booked during a time slot.
+
+    Args:
+        rows: Rows of the query built by ``build_free_gaps_query`` for a
+            window covering the slot.
+        table_id: The ID of the table.
+        start: The timezone-aware start of the slot.
+        end: The timezone-aware end of the slot.
+
+    Returns:
+        Whether a reservation of the table overlaps the slot.
+    """
+
+    return any(
+        row_table_id == table_id
+        and busy_from is not None
+        and busy_from < end
+        and start < busy_until
+        for row_table_id, busy_from, busy_until, _, _ in rows
+    )
+
+
+def filter_reservations(
+    stmt: Select,
+    table_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    location: Optional[str] = None,
+    ids: Optional[Sequence[int]] = None,
+) -> Select:
+    """
+    Apply the reservation listing filters to a query.
+
+    Args:
+        stmt: A query selecting from ``reservations``.
+        table_id: Only reservations of this table, if given.
+        start: Only reservations starting at or after this time, if given.
+        end: Only reservations starting before this time, if given.
+        location: Only reservations of tables at this location, if given.
+        ids: Only reservations with these IDs, if given.
+
+    Returns:
+        The filtered query.
+    """
+
+    if table_id is not None:
+        stmt = stmt.where(models.Reservation.table_id == table_id)
+    if start is not None:
+        stmt = stmt.where(models.Reservation.reservation_time >= to_utc(start))
+    if end is not None:
+        stmt = stmt.where(models.Reservation.reservation_time < to_utc(end))
+    if location is not None:
+        stmt = stmt.join(Table, Table.id == models.Reservation.table_id).where(
+            Table.location == location
+        )
+    if ids is not None:
+        stmt = stmt.where(models.Reservation.id.in_(ids))
+    return stmt
+
+
+def parse_cursor_time(value: str) -> datetime:
+    """
+    Parse the reservation time stored in a pagination cursor.
+
+    Args:
+        value: The ISO 8601 time from the cursor.
+
+    Returns:
+        The reservation time.
+
+    Raises:
+        HTTPException: If the value is not a valid datetime.
     """
 
-    stmt = select(models.Reservation).where(models.Reservation.id == reservation_id)
-    return db.scalar(stmt)
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор пагинации.",
+        )
@@ -0,0 +1,94 @@
+from typing import List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import Row
+
+
+class EncodedJSONResponse(JSONResponse):
+    """JSON response whose content is already encoded."""
+
+    def render(self, content: bytes) -> bytes:
+        return content
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated sparse fieldset.
+
+    Args:
+        fields: The requested fields, e.g. ``"id,reservation_time"``.
+        allowed: All fields of the resource, in output order.
+
+    Returns:
+        The requested fields in output order, or None if not given.
+
+    Raises:
+        HTTPException: If no field or an unknown field is requested.
+    """
+
+    if fields is None:
+        return None
+
+    requested = {name.strip() for name in fields.split(",")} - {""}
+    if not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Не указано ни одного поля.",
+        )
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Неизвестные поля: {', '.join(sorted(unknown))}.",
+        )
+    return [name for name in allowed if name in requested]
+
+
+def projected_fields(
+    allowed: Sequence[str], fields: Optional[Sequence[str]], keys: Sequence[str]
+) -> List[str]:
+    """
+    Get the columns to select for a sparse fieldset.
+
+    Args:
+        allowed: All fields of the resource, in output order.
+        fields: The requested fields, or None for all of them.
+        keys: Fields always selected, e.g. the pagination keys.
+
+    Returns:
+        The fields to select, in output order.
+    """
+
+    if fields is None:
+        return list(allowed)
+    return [name for name in allowed if name in fields or name in keys]
+
+
+def rows_response(
+    adapter: TypeAdapter,
+    rows: Sequence[Row],
+    fields: Optional[Sequence[str]] = None,
+) -> EncodedJSONResponse:
+    """
+    Encode result rows straight into a JSON response.
+
+    The rows are serialized by the adapter's compiled pydantic-core
+    serializer: no models are built or validated and ``jsonable_encoder`` is
+    skipped. For a TypedDict mirroring the response model, the bytes are
+    the same as FastAPI's ``response_model`` output.
+
+    Args:
+        adapter: A cached ``TypeAdapter`` of a list of row TypedDicts.
+        rows: The result rows, with columns named after the TypedDict keys.
+        fields: Encode only these columns, if given.
+
+    Returns:
+        The JSON response.
+    """
+
+    include = {"__all__": set(fields)} if fields is not None else None
+    return EncodedJSONResponse(
+        adapter.dump_json([row._asdict() for row in rows], include=include)
+    )
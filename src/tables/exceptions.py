@@ -17,3 +17,37 @@ def create_db_error(operation: str, error_message: str) -> HTTPException:
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         detail=f"Ошибка при {operation} столика: {error_message}",
     )
+
+
+def create_future_reservations_error(table_id: int) -> HTTPException:
+    """
+    Create a HTTPException for deleting a table with upcoming reservations.
+
+    Args:
+        table_id: The ID of the table.
+
+    Returns:
+        A custom HTTPException.
+    """
+
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Нельзя удалить столик с id={table_id}: есть предстоящие бронирования.",
+    )
+
+
+def create_slot_length_error(slot_minutes: int) -> HTTPException:
+    """
+    Create a HTTPException for a slot length that does not divide a day.
+
+    Args:
+        slot_minutes: The requested slot length.
+
+    Returns:
+        A custom HTTPException.
+    """
+
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Длительность слота {slot_minutes} мин. должна делить сутки без остатка.",
+    )
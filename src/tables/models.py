@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, DateTime, Integer, String
 
 from src.database import Base
 
@@ -12,6 +12,7 @@ class Table(Base):
     name = Column(String, nullable=False)
     seats = Column(Integer, nullable=False)
     location = Column(String, nullable=False)
+    archived_at = Column(DateTime(timezone=True), nullable=True)
 
     def __repr__(self):
         return f"<Table(id={self.id}, name='{self.name}', seats={self.seats}, location='{self.location}')>"
@@ -0,0 +1,162 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional, Sequence
+
+import numpy as np
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.reservation.models import Reservation
+from src.tables.models import Table
+from src.tables.schemas import Occupancy, TableOccupancy
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def paint_occupancy(
+    rows: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    n_tables: int,
+    n_slots: int,
+    slot_length: int,
+) -> np.ndarray:
+    """
+    Build a (tables x slots) occupancy matrix from reservation intervals.
+
+    Every interval marks the slots it touches. The intervals are painted
+    at once: +1 at the first slot and -1 after the last one, followed by a
+    cumulative sum along the slots.
+
+    Args:
+        rows: The table row of each reservation.
+        starts: Reservation starts, counted from the start of the day.
+        ends: Reservation ends, counted from the start of the day.
+        n_tables: The number of tables.
+        n_slots: The number of slots in the day.
+        slot_length: The length of a slot, in the units of starts and ends.
+
+    Returns:
+        A boolean matrix, True where the table is booked during the slot.
+    """
+
+    first = np.clip(starts // slot_length, 0, n_slots)
+    last = np.clip(-(-ends // slot_length), 0, n_slots)
+    painted = first < last
+
+    diff = np.zeros((n_tables, n_slots + 1), dtype=np.int32)
+    np.add.at(diff, (rows[painted], first[painted]), 1)
+    np.add.at(diff, (rows[painted], last[painted]), -1)
+    return np.cumsum(diff[:, :n_slots], axis=1) > 0
+
+
+def build_occupancy(
+    day: date,
+    slot_minutes: int,
+    tables: Sequence[tuple],
+    reservations: Sequence[tuple],
+) -> Occupancy:
+    """
+    Compute the occupancy of every table for every slot of a day.
+
+    Args:
+        day: The day, in UTC.
+        slot_minutes: The length of a slot in minutes.
+        tables: ``(id, seats, location)`` of each table, in output order.
+        reservations: ``(table_id, reservation_time, duration_minutes)``.
+
+    Returns:
+        The occupancy of the day.
+    """
+
+    day_start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    n_slots = MINUTES_PER_DAY // slot_minutes
+
+    row_of = {table_id: row for row, (table_id, _, _) in enumerate(tables)}
+    rows = np.fromiter((row_of[r[0]] for r in reservations), dtype=np.int64)
+    starts = np.fromiter(
+        ((r[1] - day_start) // timedelta(seconds=1) for r in reservations),
+        dtype=np.int64,
+    )
+    durations = np.fromiter((r[2] for r in reservations), dtype=np.int64)
+
+    busy = paint_occupancy(
+        rows,
+        starts,
+        starts + np.maximum(durations, 0) * 60,
+        len(tables),
+        n_slots,
+        slot_minutes * 60,
+    )
+
+    return Occupancy(
+        date=day,
+        slot_minutes=slot_minutes,
+        slots=[
+            day_start + timedelta(minutes=slot * slot_minutes)
+            for slot in range(n_slots)
+        ],
+        free_tables=(~busy).sum(axis=0).tolist(),
+        tables=[
+            TableOccupancy(id=table_id, seats=seats, location=location, busy=row)
+            for (table_id, seats, location), row in zip(tables, busy.tolist())
+        ],
+    )
+
+
+async def get_occupancy(
+    db: AsyncSession,
+    day: date,
+    slot_minutes: int = 15,
+    seats: int = 1,
+    location: Optional[str] = None,
+) -> Occupancy:
+    """
+    Fetch the reservations of a day for all tables and build their occupancy.
+
+    Tables and their reservations overlapping the day are fetched by one
+    query (a LEFT JOIN served by the GiST index on (table_id, period)).
+
+    Args:
+        db: The database session.
+        day: The day, in UTC.
+        slot_minutes: The length of a slot in minutes.
+        seats: Only tables with at least this many seats.
+        location: Only tables at this location, if given.
+
+    Returns:
+        The occupancy of the day.
+    """
+
+    day_start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    day_end = day_start + timedelta(days=1)
+
+    stmt = (
+        select(
+            Table.id,
+            Table.seats,
+            Table.location,
+            Reservation.reservation_time,
+            Reservation.duration_minutes,
+        )
+        .outerjoin(
+            Reservation,
+            and_(
+                Reservation.table_id == Table.id,
+                Reservation.period.op("&&")(func.tstzrange(day_start, day_end, "[)")),
+            ),
+        )
+        .where(Table.archived_at.is_(None), Table.seats >= seats)
+        .order_by(Table.id)
+    )
+    if location is not None:
+        stmt = stmt.where(Table.location == location)
+
+    tables, reservations = {}, []
+    for table_id, table_seats, table_location, start, duration in await db.execute(
+        stmt
+    ):
+        tables[table_id] = (table_id, table_seats, table_location)
+        if start is not None:
+            reservations.append((table_id, start, duration))
+
+    return build_occupancy(day, slot_minutes, list(tables.values()), reservations)
@@ -1,34 +1,133 @@
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-
-from src.database import get_db
-from src.tables.schemas import Table, TableCreate
-from src.tables.service import get_tables, create_table, delete_table
+from datetime import date, datetime
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+from src.database import get_db, get_read_db
+from src.pagination import set_next_cursor
+from src.tables.exceptions import create_slot_length_error
+from src.tables.occupancy import MINUTES_PER_DAY, get_occupancy
+from src.serialization import parse_fields, rows_response
+from src.tables.schemas import (
+    TABLE_FIELDS,
+    Occupancy,
+    Table,
+    TableBulkCreate,
+    TableCreate,
+    table_rows,
+)
+from src.tables.service import (
+    count_tables,
+    get_available_tables,
+    get_tables,
+    create_table,
+    create_tables_bulk,
+    delete_table,
+)
+from src.totals import set_total
 
 router = APIRouter(prefix="/tables", tags=["Tables"])
 
 
 @router.get("/", response_model=List[Table])
-def read_tables(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def read_tables(
+    skip: int = Query(0, ge=0, deprecated=True),
+    limit: int = Query(100, ge=0, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    total: Optional[Literal["auto", "exact"]] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
     """
     Get tables with pagination
 
+    The cursor of the next page is returned in the ``X-Next-Cursor`` header,
+    the total count, if requested, in ``X-Total-Count``. Rows are encoded to
+    JSON directly; ``response_model`` only documents the output.
+
     Args:
-        db: The database session.
-        skip: The number of records to skip.
+        skip: The number of records to skip (deprecated, use ``cursor``).
         limit: The maximum number of records to return.
+        cursor: The cursor of the previous page.
+        total: Return the total count, estimated for large results (``auto``)
+            or always exact (``exact``).
+        fields: Return only these comma-separated fields, if given.
+        db: The database session.
 
     Returns:
         A list of tables.
     """
 
-    return get_tables(db, skip, limit)
+    fields = parse_fields(fields, TABLE_FIELDS)
+    tables = await get_tables(db, skip, limit, cursor=cursor, fields=fields)
+    response = rows_response(table_rows, tables, fields)
+    set_next_cursor(response, tables, limit, lambda table: [table.id])
+    if total is not None:
+        set_total(response, *await count_tables(db, exact=total == "exact"))
+    return response
+
+
+@router.get("/available", response_model=List[Table])
+async def read_available_tables(
+    start: datetime,
+    duration: int = Query(gt=0),
+    seats: int = Query(1, gt=0),
+    location: Optional[str] = None,
+    limit: int = Query(100, ge=0, le=settings.MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Get tables free for a time slot, best fit first
+
+    Args:
+        start: The start of the time slot.
+        duration: The length of the time slot in minutes.
+        seats: The minimum number of seats.
+        location: Only tables at this location, if given.
+        limit: The maximum number of records to return.
+        db: The database session.
+
+    Returns:
+        A list of free tables.
+    """
+
+    return await get_available_tables(
+        db, start, duration, seats=seats, location=location, limit=limit
+    )
+
+
+@router.get("/occupancy", response_model=Occupancy)
+async def read_occupancy(
+    day: date = Query(alias="date"),
+    slot_minutes: int = Query(15, ge=5, le=MINUTES_PER_DAY),
+    seats: int = Query(1, gt=0),
+    location: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Get the occupancy of every table for every slot of a day
+
+    Args:
+        day: The day, in UTC.
+        slot_minutes: The length of a slot in minutes; must divide a day.
+        seats: Only tables with at least this many seats.
+        location: Only tables at this location, if given.
+        db: The database session.
+
+    Returns:
+        The busy slots of every table and the number of free tables per slot.
+    """
+
+    if MINUTES_PER_DAY % slot_minutes:
+        raise create_slot_length_error(slot_minutes)
+
+    return await get_occupancy(db, day, slot_minutes, seats=seats, location=location)
 
 
 @router.post("/", response_model=Table, status_code=status.HTTP_201_CREATED)
-def create_new_table(table_in: TableCreate, db: Session = Depends(get_db)):
+async def create_new_table(table_in: TableCreate, db: AsyncSession = Depends(get_db)):
     """
     Creating a new table
 
@@ -40,11 +139,29 @@ def create_new_table(table_in: TableCreate, db: Session = Depends(get_db)):
         The created table object.
     """
 
-    return create_table(db, table_in)
+    return await create_table(db, table_in)
+
+
+@router.post("/bulk", response_model=List[Table], status_code=status.HTTP_201_CREATED)
+async def create_new_tables_bulk(
+    bulk_in: TableBulkCreate, db: AsyncSession = Depends(get_db)
+):
+    """
+    Create many tables at once
+
+    Args:
+        bulk_in: The tables data.
+        db: The database session.
+
+    Returns:
+        The created tables, in request order.
+    """
+
+    return await create_tables_bulk(db, bulk_in)
 
 
 @router.delete("/{table_id}", response_model=Table)
-def delete_existing_table(table_id: int, db: Session = Depends(get_db)):
+async def delete_existing_table(table_id: int, db: AsyncSession = Depends(get_db)):
     """
     Delete a table.
 
@@ -56,7 +173,7 @@ def delete_existing_table(table_id: int, db: Session = Depends(get_db)):
         The deleted table object.
     """
 
-    result = delete_table(db, table_id)
+    result = await delete_table(db, table_id)
     if result is None:
         raise HTTPException(
             status_code=404, detail=f"Столик с id={table_id} не найден."
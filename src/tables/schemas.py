@@ -1,6 +1,10 @@
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Optional
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+from typing_extensions import TypedDict
+
+from src.config import settings
 
 
 class TableBase(BaseModel):
@@ -23,3 +27,41 @@ class Table(TableBase):
     """Table schema."""
 
     id: int
+
+
+class TableRow(TypedDict):
+    """Table result row; keys in the order of ``Table`` fields."""
+
+    name: str
+    seats: int
+    location: Optional[str]
+    id: int
+
+
+table_rows = TypeAdapter(List[TableRow])
+TABLE_FIELDS = tuple(TableRow.__annotations__)
+
+
+class TableBulkCreate(BaseModel):
+    """Bulk table creation schema."""
+
+    items: List[TableCreate] = Field(min_length=1, max_length=settings.BULK_MAX_ITEMS)
+
+
+class TableOccupancy(BaseModel):
+    """Occupancy of a table for every slot of a day."""
+
+    id: int
+    seats: int
+    location: Optional[str] = None
+    busy: List[bool]
+
+
+class Occupancy(BaseModel):
+    """Occupancy of all tables for every slot of a day."""
+
+    date: date
+    slot_minutes: int
+    slots: List[datetime]
+    free_tables: List[int]
+    tables: List[TableOccupancy]
@@ -1,34 +1,135 @@
-from typing import List, Optional
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
 
-from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import Row, delete, func, insert, select, update
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
-
-from src.tables.exceptions import create_db_error
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+from src.database import use_autocommit
+from src.pagination import decode_cursor, validate_pagination
+from src.reservation.interval_index import reservation_index
+from src.reservation.utils import to_utc
+from src.serialization import projected_fields
+from src.tables.exceptions import create_db_error, create_future_reservations_error
 from src.tables.models import Table as TableModel
-from src.tables.schemas import TableCreate
-from src.tables.utils import _create_table_object
+from src.tables.schemas import TABLE_FIELDS, TableBulkCreate, TableCreate
+from src.tables.utils import (
+    _create_table_object,
+    overlapping_reservations_exist,
+    upcoming_reservations_exist,
+)
+from src.totals import count_rows
+
+
+async def get_tables(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+) -> List[Row]:
+    """
+    Get tables ordered by id with keyset pagination
+
+    Only the columns of ``TableRow`` are selected, as plain rows. With
+    ``fields``, only those columns and the id are selected.
+
+    Args:
+        db: The database session.
+        skip: The number of records to skip (deprecated, use ``cursor``).
+        limit: The maximum number of records to return.
+        cursor: The cursor of the previous page.
+        fields: The fields to return, or None for all of them.
+
+    Returns:
+        A list of table rows.
+    """
+
+    validate_pagination(skip, cursor)
+
+    columns = projected_fields(TABLE_FIELDS, fields, ("id",))
+    stmt = (
+        select(*(getattr(TableModel, name) for name in columns))
+        .where(TableModel.archived_at.is_(None))
+        .order_by(TableModel.id)
+    )
+    if cursor is not None:
+        (last_id,) = decode_cursor(cursor, (int,))
+        stmt = stmt.where(TableModel.id > last_id)
+    elif skip:
+        stmt = stmt.offset(skip)
+
+    stmt = stmt.limit(limit)
+    return (await db.execute(stmt)).all()
 
 
-def get_tables(db: Session, skip: int = 0, limit: int = 100) -> List[TableModel]:
+async def count_tables(db: AsyncSession, exact: bool = False) -> Tuple[int, bool]:
     """
-    Get tables with pagination
+    Count the active tables.
 
     Args:
         db: The database session.
-        skip: The number of records to skip.
+        exact: Always count exactly instead of using the planner estimate
+            for large results.
+
+    Returns:
+        The number of tables and whether it is exact.
+    """
+
+    stmt = select(TableModel.id).where(TableModel.archived_at.is_(None))
+    return await count_rows(db, stmt, exact)
+
+
+async def get_available_tables(
+    db: AsyncSession,
+    start: datetime,
+    duration_minutes: int,
+    seats: int = 1,
+    location: Optional[str] = None,
+    limit: int = 100,
+) -> List[TableModel]:
+    """
+    Get tables that are free for the whole time slot
+
+    Slots inside the horizon of the in-process reservation index are
+    answered from memory. Otherwise the result is computed by one anti-join
+    against the reservations, answered by the GiST index on
+    (table_id, period). Tables are ordered by best fit: the fewest seats
+    that still fit the party first.
+
+    Args:
+        db: The database session.
+        start: The start of the time slot.
+        duration_minutes: The length of the time slot.
+        seats: The minimum number of seats.
+        location: Only tables at this location, if given.
         limit: The maximum number of records to return.
 
     Returns:
-        A list of tables.
+        A list of free tables.
     """
 
-    stmt = select(TableModel).offset(skip).limit(limit)
-    return db.execute(stmt).scalars().all()
+    start = to_utc(start)
+    end = start + timedelta(minutes=duration_minutes)
+
+    cached = reservation_index.available_tables(start, end, seats, location, limit)
+    if cached is not None:
+        return cached
+
+    stmt = select(TableModel).where(
+        TableModel.archived_at.is_(None),
+        TableModel.seats >= seats,
+        ~overlapping_reservations_exist(start, end),
+    )
+    if location is not None:
+        stmt = stmt.where(TableModel.location == location)
 
+    stmt = stmt.order_by(TableModel.seats, TableModel.id).limit(limit)
+    return (await db.scalars(stmt)).all()
 
-def create_table(db: Session, table_in: TableCreate) -> TableModel:
+
+async def create_table(db: AsyncSession, table_in: TableCreate) -> TableModel:
     """
     Creating a new table
 
@@ -41,36 +142,109 @@ def create_table(db: Session, table_in: TableCreate) -> TableModel:
     """
 
     try:
-        return _create_table_object(db, table_in.model_dump(exclude_none=True))
+        db_table = await _create_table_object(
+            db, table_in.model_dump(exclude_none=True)
+        )
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise create_db_error("создании", str(e))
 
+    reservation_index.add_table(db_table)
+    return db_table
+
 
-def delete_table(db: Session, table_id: int) -> Optional[TableModel]:
+async def create_tables_bulk(
+    db: AsyncSession, bulk_in: TableBulkCreate
+) -> List[TableModel]:
     """
-    Delete a table.
+    Create many tables at once
+
+    The rows are sent as a multi-row INSERT ... RETURNING (insertmanyvalues)
+    in one transaction, instead of a commit and a refresh per table.
 
     Args:
         db: The database session.
-        table_id: The ID of the table to delete.
+        bulk_in: The tables data.
 
     Returns:
-        The deleted table object.
+        The created tables, in request order.
     """
 
+    stmt = insert(TableModel).returning(TableModel, sort_by_parameter_order=True)
+
     try:
-        db_table = db.get(TableModel, table_id)
-        if not db_table:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Столик с id={table_id} не найден.",
+        tables = (
+            await db.scalars(
+                stmt, [table.model_dump(exclude_none=True) for table in bulk_in.items]
             )
+        ).all()
+        await db.commit()
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise create_db_error("создании", str(e))
+
+    for table in tables:
+        reservation_index.add_table(table)
+    return tables
+
+
+async def delete_table(
+    db: AsyncSession, table_id: int, policy: Optional[str] = None
+) -> Optional[TableModel]:
+    """
+    Delete a table.
 
-        db.delete(db_table)
-        db.commit()
+    The table is removed by a single DELETE ... RETURNING statement and its
+    reservations are deleted by the database (``ON DELETE CASCADE``), so
+    they are never loaded into the session. Depending on the policy:
+
+    - ``cascade``: the table is deleted together with all its reservations.
+    - ``reject``: the table is only deleted if it has no reservations that
+      have not ended yet.
+    - ``archive``: the table is marked as archived and kept with its
+      reservations; it is no longer listed and cannot be booked.
+
+    Args:
+        db: The database session.
+        table_id: The ID of the table to delete.
+        policy: The deletion policy, ``TABLE_DELETE_POLICY`` by default.
+
+    Returns:
+        The deleted table object, or None if it does not exist or is
+        archived.
+
+    Raises:
+        HTTPException: If the policy is ``reject`` and the table has
+            upcoming reservations.
+    """
+
+    policy = policy or settings.TABLE_DELETE_POLICY
+    active = (TableModel.id == table_id, TableModel.archived_at.is_(None))
+
+    if policy == "archive":
+        stmt = (
+            update(TableModel)
+            .where(*active)
+            .values(archived_at=func.now())
+            .returning(TableModel)
+        )
+    else:
+        stmt = delete(TableModel).where(*active).returning(TableModel)
+        if policy == "reject":
+            stmt = stmt.where(~upcoming_reservations_exist(table_id))
+
+    try:
+        await use_autocommit(db)
+        db_table = (await db.scalars(stmt)).first()
+        await db.commit()
+
+        if db_table is None and policy == "reject":
+            if await db.scalar(select(TableModel.id).where(*active)) is not None:
+                raise create_future_reservations_error(table_id)
+        if db_table is not None:
+            reservation_index.discard_table(table_id)
         return db_table
 
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise create_db_error("удалении", str(e))
@@ -1,11 +1,15 @@
+from datetime import datetime, timezone
 from typing import Dict, Any
 
-from sqlalchemy.orm import Session
+from sqlalchemy import Exists, exists, func
+from sqlalchemy.dialects.postgresql import Range
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.reservation.models import Reservation
 from src.tables.models import Table
 
 
-def _create_table_object(db: Session, table_data: Dict[str, Any]) -> Table:
+async def _create_table_object(db: AsyncSession, table_data: Dict[str, Any]) -> Table:
     """
     Create a table object in the database.
 
@@ -19,6 +23,46 @@ def _create_table_object(db: Session, table_data: Dict[str, Any]) -> Table:
 
     db_table = Table(**table_data)
     db.add(db_table)
-    db.commit()
-    db.refresh(db_table)
+    await db.commit()
+    await db.refresh(db_table)
     return db_table
+
+
+def upcoming_reservations_exist(table_id: int) -> Exists:
+    """
+    Build an EXISTS clause for reservations of a table that have not ended yet.
+
+    The clause is answered by the GiST index of the exclusion constraint on
+    (table_id, period), regardless of how much history the table has.
+
+    Args:
+        table_id: The ID of the table.
+
+    Returns:
+        The EXISTS clause.
+    """
+
+    return exists().where(
+        Reservation.table_id == table_id,
+        Reservation.period.overlaps(
+            Range(datetime.now(timezone.utc), None, bounds="[)")
+        ),
+    )
+
+
+def overlapping_reservations_exist(start: datetime, end: datetime) -> Exists:
+    """
+    Build a correlated EXISTS clause for reservations of a table in a time slot.
+
+    Args:
+        start: The start of the time slot.
+        end: The end of the time slot.
+
+    Returns:
+        The EXISTS clause, correlated to ``tables.id``.
+    """
+
+    return exists().where(
+        Reservation.table_id == Table.id,
+        Reservation.period.op("&&")(func.tstzrange(start, end, "[)")),
+    )
@@ -0,0 +1,108 @@
+import json
+from typing import Optional, Tuple
+
+from fastapi import Response
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+
+TOTAL_COUNT_HEADER = "X-Total-Count"
+TOTAL_EXACT_HEADER = "X-Total-Count-Exact"
+
+
+async def table_rows_estimate(db: AsyncSession, table_name: str) -> Optional[int]:
+    """
+    Get the row count of a table estimated by the last VACUUM or ANALYZE.
+
+    Args:
+        db: The database session.
+        table_name: The name of the table.
+
+    Returns:
+        ``pg_class.reltuples``, or None if the table was never analyzed.
+    """
+
+    reltuples = await db.scalar(
+        text("SELECT reltuples FROM pg_class WHERE oid = CAST(:name AS regclass)"),
+        {"name": table_name},
+    )
+    if reltuples is None or reltuples < 0:
+        return None
+    return int(reltuples)
+
+
+async def estimate_rows(db: AsyncSession, stmt: Select) -> int:
+    """
+    Get the planner's row estimate for a query without running it.
+
+    Args:
+        db: The database session.
+        stmt: The query.
+
+    Returns:
+        The ``Plan Rows`` estimate of ``EXPLAIN``.
+    """
+
+    conn = await db.connection()
+    compiled = stmt.compile(
+        dialect=conn.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    params = (
+        tuple(compiled.params[name] for name in compiled.positiontup)
+        if compiled.positional
+        else compiled.params
+    )
+    plan = (
+        await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params)
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count_rows(
+    db: AsyncSession, stmt: Select, exact: bool = False
+) -> Tuple[int, bool]:
+    """
+    Count the rows of a query, exactly only when it is cheap or requested.
+
+    Unfiltered queries of one table are estimated from ``pg_class``,
+    filtered ones by ``EXPLAIN``. Results estimated at no more than
+    ``EXACT_COUNT_THRESHOLD`` rows are counted exactly.
+
+    Args:
+        db: The database session.
+        stmt: The query, without ordering or pagination.
+        exact: Always run ``COUNT(*)``.
+
+    Returns:
+        The row count and whether it is exact.
+    """
+
+    if not exact:
+        froms = stmt.get_final_froms()
+        estimate = None
+        if stmt.whereclause is None and len(froms) == 1:
+            estimate = await table_rows_estimate(db, froms[0].name)
+        if estimate is None:
+            estimate = await estimate_rows(db, stmt)
+        if estimate > settings.EXACT_COUNT_THRESHOLD:
+            return estimate, False
+
+    count = await db.scalar(select(func.count()).select_from(stmt.subquery()))
+    return count, True
+
+
+def set_total(response: Response, total: int, exact: bool) -> None:
+    """
+    Add the total row count to the response headers.
+
+    Args:
+        response: The outgoing response.
+        total: The row count.
+        exact: Whether the row count is exact.
+    """
+
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
+    response.headers[TOTAL_EXACT_HEADER] = "true" if exact else "false"
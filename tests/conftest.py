@@ -1,13 +1,14 @@
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock
 
 import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from src.database import Base
-from src.database import get_db
+from src.database import get_db, get_read_db
 from src.reservation import router as reservation_router
 from src.tables import router as tables_router
 from src.tables.models import Table
@@ -17,11 +18,18 @@ app.include_router(reservation_router.router)
 app.include_router(tables_router.router)
 
 
+@pytest.fixture
+def anyio_backend():
+    """Run async tests on asyncio only."""
+
+    return "asyncio"
+
+
 @pytest.fixture
 def mock_session():
     """Fixture for mock session"""
 
-    session_mock = MagicMock()
+    session_mock = AsyncMock(spec=AsyncSession)
     return session_mock
 
 
@@ -63,7 +71,7 @@ def create_test_table(setup_database):
 @pytest.fixture(scope="module")
 def mock_db_session():
     """Mock database session for testing."""
-    db_session = MagicMock()
+    db_session = AsyncMock(spec=AsyncSession)
     return db_session
 
 
@@ -71,6 +79,7 @@ def mock_db_session():
 def override_get_db(mock_db_session):
     """Override get_db function to return mock database session."""
     app.dependency_overrides[get_db] = lambda: mock_db_session
+    app.dependency_overrides[get_read_db] = lambda: mock_db_session
     yield
     app.dependency_overrides = {}
 
@@ -0,0 +1,122 @@
+import csv
+import io
+import json
+from collections import namedtuple
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.reservation.export import encode_csv, encode_ndjson, export_reservations
+
+ReservationRow = namedtuple(
+    "ReservationRow",
+    ["customer_name", "table_id", "reservation_time", "duration_minutes", "id"],
+)
+ROWS = [
+    ReservationRow(
+        "Тестовый Клиент", 1, datetime(2030, 6, 10, 18, tzinfo=timezone.utc), 90, 1
+    ),
+    ReservationRow(
+        'ООО "Ромашка", банкет\nзал 2',
+        3,
+        datetime(2030, 6, 10, 19, tzinfo=timezone.utc),
+        120,
+        2,
+    ),
+]
+
+
+def make_db(partitions):
+    """Create a mocked session streaming ``partitions`` of rows."""
+
+    async def stream_partitions():
+        for rows in partitions:
+            yield rows
+
+    db = AsyncMock(spec=AsyncSession)
+    db.stream.return_value = MagicMock()
+    db.stream.return_value.partitions = stream_partitions
+    return db
+
+
+class TestEncode:
+    """Tests for the export encoders."""
+
+    def test_ndjson(self):
+        """Test that every row is one JSON line."""
+
+        lines = encode_ndjson(ROWS).decode().splitlines()
+
+        assert [json.loads(line) for line in lines] == [
+            {
+                "customer_name": "Тестовый Клиент",
+                "table_id": 1,
+                "reservation_time": "2030-06-10T18:00:00Z",
+                "duration_minutes": 90,
+                "id": 1,
+            },
+            {
+                "customer_name": 'ООО "Ромашка", банкет\nзал 2',
+                "table_id": 3,
+                "reservation_time": "2030-06-10T19:00:00Z",
+                "duration_minutes": 120,
+                "id": 2,
+            },
+        ]
+
+    def test_csv(self):
+        """Test that values with separators and newlines are quoted."""
+
+        data = encode_csv(ROWS, header=True).decode("utf-8")
+
+        assert list(csv.reader(io.StringIO(data))) == [
+            ["customer_name", "table_id", "reservation_time", "duration_minutes", "id"],
+            ["Тестовый Клиент", "1", "2030-06-10T18:00:00Z", "90", "1"],
+            ['ООО "Ромашка", банкет\nзал 2', "3", "2030-06-10T19:00:00Z", "120", "2"],
+        ]
+
+
+@pytest.mark.anyio
+class TestExportReservations:
+    """Tests for export_reservations."""
+
+    async def test_streams_batches(self):
+        """Test that every fetched batch is encoded into one chunk."""
+
+        db = make_db([ROWS[:1], ROWS[1:]])
+        start = datetime(2030, 6, 1, tzinfo=timezone.utc)
+
+        chunks = [
+            chunk async for chunk in export_reservations(db, "ndjson", 500, start=start)
+        ]
+
+        assert chunks == [encode_ndjson(ROWS[:1]), encode_ndjson(ROWS[1:])]
+        stmt = db.stream.call_args[0][0]
+        assert stmt.get_execution_options()["yield_per"] == 500
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        assert "reservations.reservation_time >= %(reservation_time_1)s" in sql
+        assert "ORDER BY reservations.reservation_time, reservations.id" in sql
+        db.close.assert_awaited_once()
+
+    async def test_csv_header(self):
+        """Test that a CSV export starts with a header even without rows."""
+
+        db = make_db([])
+
+        chunks = [chunk async for chunk in export_reservations(db, "csv", 500)]
+
+        assert chunks == [encode_csv([], header=True)]
+
+    async def test_abandoned_stream_closes_session(self):
+        """Test that the session is closed when the client goes away."""
+
+        db = make_db([ROWS[:1], ROWS[1:]])
+        stream = export_reservations(db, "ndjson", 1)
+
+        await stream.__anext__()
+        await stream.aclose()
+
+        db.close.assert_awaited_once()
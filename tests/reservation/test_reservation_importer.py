@@ -0,0 +1,231 @@
+import io
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException, status
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.reservation import schemas
+from src.reservation.importer import (
+    build_import_merge,
+    build_import_overlaps_query,
+    build_import_validation,
+    import_reservations,
+    read_records,
+    spool_text,
+)
+
+START = datetime(2020, 6, 10, 18, 0, tzinfo=timezone.utc)
+
+CSV_FILE = (
+    "customer_name,table_id,reservation_time,duration_minutes,id\r\n"
+    '"ООО ""Ромашка"", банкет",5,2020-06-10T18:00:00Z,90,1\r\n'
+    "Тестовый Клиент,abc,2020-06-10T18:00:00Z,0,2\r\n"
+)
+NDJSON_FILE = (
+    '{"customer_name": "Тестовый Клиент", "table_id": 5,'
+    ' "reservation_time": "2020-06-10T18:00:00", "duration_minutes": 90}\n'
+    "\n"
+    "{not json\n"
+    '{"customer_name": "Тестовый Клиент", "table_id": 5,'
+    ' "reservation_time": "2020-06-10T18:00:00Z", "duration_minutes": -5}\n'
+)
+
+
+def make_db(errors=(), candidates=()):
+    """Create a mocked session with a driver connection for COPY."""
+
+    db = AsyncMock(spec=AsyncSession)
+    conn = AsyncMock()
+    conn.get_raw_connection.return_value = MagicMock()
+    conn.get_raw_connection.return_value.driver_connection = AsyncMock()
+    db.connection.return_value = conn
+    overlaps, merged = MagicMock(), MagicMock()
+    overlaps.all.return_value = list(candidates)
+    merged.all.return_value = []
+    results = [MagicMock(), overlaps, merged, list(errors)]
+    if candidates:
+        results.insert(2, MagicMock())
+    db.execute.side_effect = results
+    return db
+
+
+class TestReadRecords:
+    """Tests for read_records."""
+
+    def test_csv(self):
+        """Test that CSV records are validated with their line numbers."""
+
+        records = list(read_records(io.StringIO(CSV_FILE, newline=""), "csv"))
+
+        assert records == [
+            (
+                2,
+                'ООО "Ромашка", банкет',
+                5,
+                START,
+                START + timedelta(minutes=90),
+                90,
+                None,
+            ),
+            (3, None, None, None, None, None, "Некорректные поля: table_id."),
+        ]
+
+    def test_ndjson(self):
+        """Test that past and naive times are accepted and bad lines rejected."""
+
+        records = list(read_records(io.StringIO(NDJSON_FILE), "ndjson"))
+
+        assert records == [
+            (
+                1,
+                "Тестовый Клиент",
+                5,
+                START,
+                START + timedelta(minutes=90),
+                90,
+                None,
+            ),
+            (3, None, None, None, None, None, "Некорректный JSON."),
+            (
+                4,
+                None,
+                None,
+                None,
+                None,
+                None,
+                "Продолжительность бронирования должна быть больше нуля.",
+            ),
+        ]
+
+
+class TestImportStatements:
+    """Tests for the import validation and merge statements."""
+
+    def test_validation(self):
+        """Test that tables, file overlaps and existing overlaps are checked."""
+
+        compiled = build_import_validation().compile(dialect=postgresql.dialect())
+        sql = str(compiled)
+
+        assert "Стол с ID %s не найден." in compiled.params.values()
+        assert (
+            "LEFT OUTER JOIN tables ON tables.id = reservation_import.table_id "
+            "AND tables.archived_at IS NULL" in sql
+        )
+        assert "reservations.period && tstzrange(" in sql
+
+    def test_overlaps_query(self):
+        """Test that only tables with overlapping records are read back."""
+
+        sql = str(build_import_overlaps_query().compile(dialect=postgresql.dialect()))
+
+        assert (
+            "reservation_import.reservation_time < lag(reservation_import.end_at) "
+            "OVER (PARTITION BY reservation_import.table_id ORDER BY "
+            "reservation_import.reservation_time, reservation_import.line)" in sql
+        )
+        assert sql.endswith(
+            "ORDER BY reservation_import.table_id, "
+            "reservation_import.reservation_time, reservation_import.line"
+        )
+
+    def test_merge(self):
+        """Test that valid records are inserted and skipped ones rejected."""
+
+        sql = str(
+            build_import_merge(START, START + timedelta(days=1)).compile(
+                dialect=postgresql.dialect()
+            )
+        )
+
+        assert sql.startswith("WITH inserted AS \n(INSERT INTO reservations")
+        assert "WHERE reservation_import.detail IS NULL ON CONFLICT DO NOTHING" in sql
+        assert "skipped AS \n(UPDATE reservation_import SET detail=" in sql
+        assert "WHERE inserted.period && tstzrange(" in sql
+
+
+@pytest.mark.anyio
+class TestImportReservations:
+    """Tests for import_reservations."""
+
+    async def test_copies_in_batches(self):
+        """Test that records are sent by COPY in batches and reported."""
+
+        db = make_db(errors=[(4, "Некорректный JSON.")])
+        file = io.StringIO('{"a": 1}\n' * 5)
+
+        with patch("src.reservation.importer.reservation_index"):
+            result = await import_reservations(db, file, "ndjson", 2)
+
+        conn = db.connection.return_value
+        conn.run_sync.assert_awaited_once()
+        copy = conn.get_raw_connection.return_value.driver_connection
+        batches = copy.copy_records_to_table.call_args_list
+        assert [len(batch[1]["records"]) for batch in batches] == [2, 2, 1]
+        assert copy.copy_records_to_table.call_args[0][0] == "reservation_import"
+        assert result == schemas.ReservationImportResult(
+            imported=4,
+            rejected=1,
+            errors=[
+                schemas.ReservationImportError(line=4, detail="Некорректный JSON.")
+            ],
+        )
+        db.commit.assert_awaited_once()
+
+    async def test_overlaps_are_rejected_from_kept_records(self):
+        """Test that a record rejected for an overlap does not reject later ones."""
+
+        hour = timedelta(hours=1)
+        candidates = [
+            (1, 5, START, START + 2 * hour),
+            (2, 5, START + hour, START + 3 * hour),
+            (3, 5, START + 2.5 * hour, START + 4 * hour),
+        ]
+        db = make_db(candidates=candidates)
+
+        with patch("src.reservation.importer.reservation_index"):
+            await import_reservations(db, io.StringIO(""), "ndjson", 10)
+
+        rejection = db.execute.call_args_list[2][0][0]
+        compiled = rejection.compile(dialect=postgresql.dialect())
+        assert str(compiled).startswith("UPDATE reservation_import SET detail=")
+        assert compiled.params["lines"] == [2]
+
+    async def test_not_utf8(self):
+        """Test that a file that is not UTF-8 is rejected as a whole."""
+
+        db = make_db()
+        file = io.TextIOWrapper(io.BytesIO(b"\xff\xfe{}\n"), encoding="utf-8")
+
+        with pytest.raises(HTTPException) as exc_info:
+            await import_reservations(db, file, "ndjson", 10)
+
+        assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+        db.rollback.assert_awaited_once()
+        db.commit.assert_not_awaited()
+
+    async def test_database_error(self):
+        """Test that a failed import is rolled back."""
+
+        db = make_db()
+        db.execute.side_effect = OperationalError("stmt", {}, Exception("boom"))
+
+        with pytest.raises(HTTPException) as exc_info:
+            await import_reservations(db, io.StringIO(""), "ndjson", 10)
+
+        assert exc_info.value.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        db.rollback.assert_awaited_once()
+
+    async def test_spool_text(self):
+        """Test that an upload is buffered as text without a byte order mark."""
+
+        async def chunks():
+            yield "﻿customer_name,table_id\r\n".encode()
+            yield "Клиент,1\r\n".encode()
+
+        with await spool_text(chunks()) as file:
+            assert file.read() == "customer_name,table_id\r\nКлиент,1\r\n"
@@ -0,0 +1,205 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.reservation.interval_index import ReservationIndex
+from src.reservation.models import Reservation
+from src.tables.models import Table
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+START = NOW + timedelta(days=1)
+
+
+def make_reservation(id, table_id, hours=0, duration=60):
+    """Create a reservation starting ``hours`` after START."""
+
+    return Reservation(
+        id=id,
+        customer_name="Гость",
+        table_id=table_id,
+        reservation_time=START + timedelta(hours=hours),
+        duration_minutes=duration,
+    )
+
+
+def make_db(tables, reservations):
+    """Create a mocked session returning tables, then reservations."""
+
+    db = AsyncMock(spec=AsyncSession)
+    results = []
+    for rows in (tables, reservations):
+        result = MagicMock()
+        result.all.return_value = rows
+        results.append(result)
+    db.scalars.side_effect = results
+    return db
+
+
+TABLES = [
+    Table(id=1, name="Большой", seats=6, location="Зал"),
+    Table(id=2, name="Малый", seats=2, location="Зал"),
+    Table(id=3, name="Средний", seats=4, location="Терраса"),
+    Table(id=4, name="Средний", seats=4, location="Зал"),
+]
+
+
+@pytest.mark.anyio
+class TestReservationIndex:
+    """Tests for ReservationIndex."""
+
+    async def make_index(self, reservations=()):
+        """Create an index loaded with TABLES and the given reservations."""
+
+        index = ReservationIndex(timedelta(days=7))
+        await index.load(make_db(TABLES, list(reservations)))
+        return index
+
+    def test_not_loaded_answers_nothing(self):
+        """Test that an index that was never loaded defers to the database."""
+
+        index = ReservationIndex(timedelta(days=7))
+
+        assert index.conflicts(1, START, START + timedelta(hours=1)) is None
+        assert index.available_tables(START, START + timedelta(hours=1)) is None
+
+    async def test_load_queries_horizon(self):
+        """Test that only reservations inside the horizon are loaded."""
+
+        index = ReservationIndex(timedelta(days=7))
+        db = make_db(TABLES, [])
+
+        await index.load(db)
+
+        sql = str(db.scalars.call_args_list[1][0][0])
+        assert "reservations.period && tstzrange(" in sql
+        assert index.loaded
+        assert index.window_end - index.window_start == timedelta(days=7)
+
+    @pytest.mark.parametrize(
+        "start_hours, minutes, expected",
+        [
+            (0, 60, True),
+            (0.5, 60, True),
+            (-0.5, 31, True),
+            (1, 60, False),
+            (-1, 60, False),
+            (2.5, 60, True),
+        ],
+    )
+    async def test_conflicts(self, start_hours, minutes, expected):
+        """Test overlap lookups with half-open periods."""
+
+        index = await self.make_index(
+            [make_reservation(1, 1), make_reservation(2, 1, hours=3)]
+        )
+        start = START + timedelta(hours=start_hours)
+
+        assert index.conflicts(1, start, start + timedelta(minutes=minutes)) is expected
+        assert index.conflicts(2, start, start + timedelta(minutes=minutes)) is False
+
+    async def test_outside_window(self):
+        """Test that slots outside the loaded window are not answered."""
+
+        index = await self.make_index()
+
+        assert index.conflicts(1, NOW - timedelta(hours=1), NOW) is None
+        far = NOW + timedelta(days=8)
+        assert index.conflicts(1, far, far + timedelta(hours=1)) is None
+
+    async def test_add_and_discard(self):
+        """Test that created and deleted reservations update the index."""
+
+        index = await self.make_index()
+        reservation = make_reservation(5, 2)
+        end = START + timedelta(hours=1)
+
+        index.add(reservation)
+        index.add(reservation)
+        assert index.conflicts(2, START, end) is True
+
+        index.discard(reservation)
+        assert index.conflicts(2, START, end) is False
+
+    async def test_add_outside_window_is_ignored(self):
+        """Test that memory stays bounded by the horizon."""
+
+        index = await self.make_index()
+
+        index.add(make_reservation(5, 2, hours=24 * 30))
+
+        assert index._slots == {}
+
+    async def test_available_tables(self):
+        """Test free tables are filtered and ordered by best fit."""
+
+        index = await self.make_index([make_reservation(1, 4)])
+        end = START + timedelta(hours=1)
+
+        free = index.available_tables(START, end, seats=3)
+        assert [t.id for t in free] == [3, 1]
+
+        free = index.available_tables(START, end, seats=3, location="Зал")
+        assert [t.id for t in free] == [1]
+
+        later = START + timedelta(hours=1)
+        free = index.available_tables(later, later + timedelta(hours=1), limit=3)
+        assert [t.id for t in free] == [2, 3, 4]
+
+    async def test_table_changes(self):
+        """Test that created and deleted tables update availability."""
+
+        index = await self.make_index([make_reservation(1, 1)])
+        end = START + timedelta(hours=1)
+
+        index.add_table(Table(id=9, name="Новый", seats=8, location="Зал"))
+        index.discard_table(2)
+
+        assert [t.id for t in index.available_tables(START, end)] == [3, 4, 9]
+        index.discard_table(1)
+        assert index.conflicts(1, START, end) is False
+
+    async def test_changes_during_load_are_kept(self):
+        """Test that changes made while loading are applied to the snapshot."""
+
+        index = ReservationIndex(timedelta(days=7))
+        created, deleted = make_reservation(7, 3), make_reservation(8, 2)
+        db = make_db(TABLES, [deleted])
+        results = list(db.scalars.side_effect)
+
+        def scalars(stmt):
+            if len(results) == 1:
+                index.add(created)
+                index.discard(deleted)
+            return results.pop(0)
+
+        db.scalars.side_effect = scalars
+        await index.load(db)
+
+        end = START + timedelta(hours=1)
+        assert index.conflicts(3, START, end) is True
+        assert index.conflicts(2, START, end) is False
+
+    async def test_refresh_failure(self):
+        """Test that a failed load leaves the index unloaded."""
+
+        db = AsyncMock(spec=AsyncSession)
+        db.scalars.side_effect = OperationalError("select", {}, "down")
+        factory = MagicMock()
+        factory.return_value.__aenter__.return_value = db
+        index = ReservationIndex(timedelta(days=7))
+
+        assert await index.refresh(factory) is False
+        assert index.loaded is False
+        assert index.conflicts(1, START, START + timedelta(hours=1)) is None
+
+    async def test_clear(self):
+        """Test that clearing stops answering from memory."""
+
+        index = await self.make_index([make_reservation(1, 1)])
+
+        index.clear()
+
+        assert index.conflicts(1, START, START + timedelta(hours=1)) is None
@@ -341,7 +341,11 @@ class TestReservationModel:
         )
 
         reservation2 = Reservation(
-            customer_name="Клиент 2", table_id=table.id, duration_minutes=90
+            customer_name="Клиент 2",
+            table_id=table.id,
+            reservation_time=datetime.datetime.now(datetime.UTC)
+            + datetime.timedelta(hours=2),
+            duration_minutes=90,
         )
 
         session.add_all([reservation1, reservation2])
@@ -356,3 +360,124 @@ class TestReservationModel:
         for reservation in table.reservations:
             assert reservation.table_id == table.id
             assert reservation.table.name == "Тестовый стол"
+
+    @pytest.mark.parametrize(
+        "duration, expected_upper",
+        [
+            (90, datetime.datetime(2030, 1, 1, 19, 30, tzinfo=timezone.utc)),
+            (0, None),
+            (-30, None),
+        ],
+    )
+    def test_period_is_computed(
+        self, setup_database, create_test_table, duration, expected_upper
+    ):
+        """
+        Test that the stored period is derived from time and duration.
+
+        Args:
+            setup_database (fixture): Fixture for setting up the database.
+            create_test_table (fixture): Fixture for creating a test table.
+            duration (int): Reservation duration in minutes.
+            expected_upper (datetime): Expected end of the period.
+        """
+
+        session = setup_database
+        table = create_test_table
+        start = datetime.datetime(2030, 1, 1, 18, 0, tzinfo=timezone.utc)
+
+        test_reservation = Reservation(
+            customer_name="Период",
+            table_id=table.id,
+            reservation_time=start,
+            duration_minutes=duration,
+        )
+        session.add(test_reservation)
+        session.commit()
+        session.refresh(test_reservation)
+
+        if expected_upper is None:
+            assert test_reservation.period.isempty
+        else:
+            assert test_reservation.period.lower == start
+            assert test_reservation.period.upper == expected_upper
+
+    def test_overlapping_reservations_rejected(self, setup_database, create_test_table):
+        """
+        Test that the exclusion constraint rejects double bookings.
+
+        Args:
+            setup_database (fixture): Fixture for setting up the database.
+            create_test_table (fixture): Fixture for creating a test table.
+        """
+
+        session = setup_database
+        table = create_test_table
+        start = datetime.datetime(2030, 1, 1, 18, 0, tzinfo=timezone.utc)
+
+        session.add(
+            Reservation(
+                customer_name="Первый",
+                table_id=table.id,
+                reservation_time=start,
+                duration_minutes=60,
+            )
+        )
+        session.commit()
+
+        session.add(
+            Reservation(
+                customer_name="Соседний",
+                table_id=table.id,
+                reservation_time=start + datetime.timedelta(minutes=60),
+                duration_minutes=60,
+            )
+        )
+        session.commit()
+
+        session.add(
+            Reservation(
+                customer_name="Второй",
+                table_id=table.id,
+                reservation_time=start + datetime.timedelta(minutes=30),
+                duration_minutes=60,
+            )
+        )
+        with pytest.raises(IntegrityError) as exc_info:
+            session.commit()
+        session.rollback()
+
+        assert exc_info.value.orig.pgcode == "23P01"
+
+    def test_table_delete_cascades_without_loading(
+        self, setup_database, create_test_table
+    ):
+        """
+        Test that deleting a table removes its reservations in the database.
+
+        Args:
+            setup_database (fixture): Fixture for setting up the database.
+            create_test_table (fixture): Fixture for creating a test table.
+        """
+
+        session = setup_database
+        table = create_test_table
+        start = datetime.datetime(2030, 1, 1, 18, 0, tzinfo=timezone.utc)
+
+        for hours in range(3):
+            session.add(
+                Reservation(
+                    customer_name="История",
+                    table_id=table.id,
+                    reservation_time=start + datetime.timedelta(hours=hours),
+                    duration_minutes=60,
+                )
+            )
+        session.commit()
+        session.expire_all()
+
+        session.delete(table)
+        session.commit()
+
+        assert "reservations" not in table.__dict__
+        assert session.query(Reservation).count() == 0
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+
+from src.reservation import schemas
+from src.reservation.recurrence import expand_occurrences
+
+START = datetime(2030, 6, 10, 18, 0, tzinfo=timezone.utc)
+
+
+def weeks(n):
+    """Get the time ``n`` weeks after START."""
+
+    return START + timedelta(weeks=n)
+
+
+class TestExpandOccurrences:
+    """Tests for expand_occurrences."""
+
+    def test_count(self):
+        """Test that a counted rule yields exactly ``count`` occurrences."""
+
+        rule = schemas.RecurrenceRule(frequency="daily", count=3)
+
+        assert expand_occurrences(START, rule) == [
+            START,
+            START + timedelta(days=1),
+            START + timedelta(days=2),
+        ]
+
+    def test_until_is_inclusive(self):
+        """Test that an occurrence starting at ``until`` is included."""
+
+        rule = schemas.RecurrenceRule(frequency="weekly", until=weeks(2))
+
+        assert expand_occurrences(START, rule) == [START, weeks(1), weeks(2)]
+
+    def test_naive_until(self):
+        """Test that a naive ``until`` is treated as UTC."""
+
+        rule = schemas.RecurrenceRule(
+            frequency="weekly", until=weeks(1).replace(tzinfo=None)
+        )
+
+        assert expand_occurrences(START, rule) == [START, weeks(1)]
+
+    def test_window(self):
+        """Test that only occurrences inside the window are returned."""
+
+        rule = schemas.RecurrenceRule(frequency="weekly", count=10)
+
+        occurrences = expand_occurrences(
+            START, rule, window_start=weeks(2) + timedelta(hours=1), window_end=weeks(5)
+        )
+
+        assert occurrences == [weeks(3), weeks(4)]
+
+    def test_window_at_occurrence(self):
+        """Test that the window start is inclusive and the end exclusive."""
+
+        rule = schemas.RecurrenceRule(frequency="weekly", count=10)
+
+        assert expand_occurrences(
+            START, rule, window_start=weeks(2), window_end=weeks(3)
+        ) == [weeks(2)]
+
+    def test_limit(self):
+        """Test that long rules are cut at ``limit``."""
+
+        rule = schemas.RecurrenceRule(frequency="daily", until=START.replace(year=2040))
+
+        assert len(expand_occurrences(START, rule, limit=5)) == 5
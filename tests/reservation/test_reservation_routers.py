@@ -1,10 +1,14 @@
+from collections import namedtuple
 from datetime import datetime, timezone
 from unittest.mock import patch
 
 import pytest
 from fastapi import status
 
+from src.config import settings
+from src.pagination import NEXT_CURSOR_HEADER, decode_cursor
 from src.reservation import schemas
+from src.totals import TOTAL_COUNT_HEADER, TOTAL_EXACT_HEADER
 
 MOCK_RESERVATION_DATA = {
     "id": 1,
@@ -15,6 +19,9 @@ MOCK_RESERVATION_DATA = {
 }
 
 MOCK_RESERVATION_OBJ = schemas.Reservation(**MOCK_RESERVATION_DATA)
+MOCK_RESERVATION_ROW = namedtuple("ReservationRow", MOCK_RESERVATION_DATA)(
+    **MOCK_RESERVATION_DATA
+)
 
 MOCK_RESERVATION_CREATE_DATA = {
     "customer_name": "Новый Клиент",
@@ -31,7 +38,7 @@ class TestReadReservations:
         """Test case GET /reservations/ with default parameters."""
 
         with patch("src.reservation.router.get_reservations") as mock_get:
-            mock_get.return_value = [MOCK_RESERVATION_OBJ]
+            mock_get.return_value = [MOCK_RESERVATION_ROW]
             response = client.get("/reservations/")
 
             assert response.status_code == status.HTTP_200_OK
@@ -49,6 +56,89 @@ class TestReadReservations:
             assert mock_get.call_args[0][1] == 0  # skip
             assert mock_get.call_args[0][2] == 100  # limit
 
+    def test_read_reservations_filters(self, client):
+        """Test case GET /reservations/ with filters."""
+
+        with patch("src.reservation.router.get_reservations") as mock_get:
+            mock_get.return_value = []
+            response = client.get(
+                "/reservations/?table_id=2&from=2030-06-10T00:00:00Z"
+                "&to=2030-06-11T00:00:00Z&location=Зал&ids=1&ids=5"
+            )
+
+            assert response.status_code == status.HTTP_200_OK
+            kwargs = mock_get.call_args[1]
+            assert kwargs["table_id"] == 2
+            assert kwargs["start"] == datetime(2030, 6, 10, tzinfo=timezone.utc)
+            assert kwargs["end"] == datetime(2030, 6, 11, tzinfo=timezone.utc)
+            assert kwargs["location"] == "Зал"
+            assert kwargs["ids"] == [1, 5]
+
+    def test_read_reservations_fields(self, client):
+        """Test case GET /reservations/ with a sparse fieldset."""
+
+        with patch("src.reservation.router.get_reservations") as mock_get:
+            mock_get.return_value = [MOCK_RESERVATION_ROW]
+            response = client.get(
+                "/reservations/?limit=1&fields=reservation_time, table_id"
+            )
+
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json() == [
+                {"table_id": 1, "reservation_time": "2025-07-15T19:00:00Z"}
+            ]
+            assert mock_get.call_args[1]["fields"] == ["table_id", "reservation_time"]
+            assert decode_cursor(response.headers[NEXT_CURSOR_HEADER], (str, int)) == [
+                "2025-07-15T19:00:00+00:00",
+                1,
+            ]
+
+    def test_read_reservations_unknown_fields(self, client):
+        """Test case GET /reservations/ with an unknown field."""
+
+        with patch("src.reservation.router.get_reservations") as mock_get:
+            response = client.get("/reservations/?fields=id,phone")
+
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+            assert response.json()["detail"] == "Неизвестные поля: phone."
+            mock_get.assert_not_called()
+
+    def test_read_reservations_total(self, client):
+        """Test that the total count uses the same filters as the page."""
+
+        with (
+            patch("src.reservation.router.get_reservations") as mock_get,
+            patch("src.reservation.router.count_reservations") as mock_count,
+        ):
+            mock_get.return_value = []
+            mock_count.return_value = (1200000, False)
+            response = client.get("/reservations/?total=auto&table_id=2&location=Зал")
+
+            assert response.status_code == status.HTTP_200_OK
+            assert response.headers[TOTAL_COUNT_HEADER] == "1200000"
+            assert response.headers[TOTAL_EXACT_HEADER] == "false"
+            kwargs = mock_count.call_args[1]
+            assert kwargs["exact"] is False
+            assert kwargs["table_id"] == 2
+            assert kwargs["location"] == "Зал"
+
+    def test_read_reservations_invalid_total(self, client):
+        """Test that only auto and exact totals are accepted."""
+
+        response = client.get("/reservations/?total=fast")
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_read_reservations_too_many_ids(self, client):
+        """Test that the ID batch is limited by the page size."""
+
+        ids = "&".join(f"ids={i}" for i in range(settings.MAX_PAGE_SIZE + 1))
+        with patch("src.reservation.router.get_reservations") as mock_get:
+            response = client.get(f"/reservations/?{ids}")
+
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+            mock_get.assert_not_called()
+
     @pytest.mark.parametrize("skip, limit", [(5, 10), (0, 50), (10, 0)])
     def test_read_reservations_pagination(self, client, skip, limit):
         """Test case GET /reservations/ with pagination."""
@@ -83,6 +173,98 @@ class TestReadReservations:
                 client.get("/reservations/")
             assert "Database error" in str(exc_info.value)
 
+    def test_read_reservations_next_cursor(self, client):
+        """Test case GET /reservations/ returns the next page cursor."""
+
+        with patch("src.reservation.router.get_reservations") as mock_get:
+            mock_get.return_value = [MOCK_RESERVATION_ROW]
+            response = client.get("/reservations/?limit=1")
+
+            assert response.status_code == status.HTTP_200_OK
+            cursor = response.headers[NEXT_CURSOR_HEADER]
+            assert decode_cursor(cursor, (str, int)) == [
+                MOCK_RESERVATION_DATA["reservation_time"].isoformat(),
+                MOCK_RESERVATION_DATA["id"],
+            ]
+
+    def test_read_reservations_page_size_limit(self, client):
+        """Test case GET /reservations/ above the maximum page size."""
+
+        with patch("src.reservation.router.get_reservations") as mock_get:
+            response = client.get(f"/reservations/?limit={settings.MAX_PAGE_SIZE + 1}")
+
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+            mock_get.assert_not_called()
+
+
+class TestExportReservations:
+    """Test case GET /reservations/export"""
+
+    def test_export_csv(self, client):
+        """Test that the export is streamed with the requested format."""
+
+        async def chunks():
+            yield b"customer_name\r\n"
+            yield b"C1\r\n"
+
+        with patch("src.reservation.router.export_reservations") as mock_export:
+            mock_export.return_value = chunks()
+            response = client.get(
+                "/reservations/export?format=csv&from=2030-06-01T00:00:00Z"
+            )
+
+            assert response.status_code == status.HTTP_200_OK
+            assert response.content == b"customer_name\r\nC1\r\n"
+            assert response.headers["content-type"].startswith("text/csv")
+            assert response.headers["content-disposition"] == (
+                'attachment; filename="reservations.csv"'
+            )
+            args = mock_export.call_args[0]
+            assert args[1:] == (
+                "csv",
+                settings.EXPORT_BATCH_SIZE,
+                datetime(2030, 6, 1, tzinfo=timezone.utc),
+                None,
+            )
+
+    def test_export_unknown_format(self, client):
+        """Test case GET /reservations/export with an unsupported format."""
+
+        with patch("src.reservation.router.export_reservations") as mock_export:
+            response = client.get("/reservations/export?format=xlsx")
+
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+            mock_export.assert_not_called()
+
+
+class TestImportReservations:
+    """Test case POST /reservations/import"""
+
+    @pytest.mark.parametrize(
+        "rejected, status_code",
+        [(0, status.HTTP_201_CREATED), (1, status.HTTP_207_MULTI_STATUS)],
+    )
+    def test_import(self, client, rejected, status_code):
+        """Test that the body is imported and rejected records reported."""
+
+        errors = [schemas.ReservationImportError(line=2, detail="Некорректный JSON.")][
+            :rejected
+        ]
+        with patch("src.reservation.router.import_reservations") as mock_import:
+            mock_import.return_value = schemas.ReservationImportResult(
+                imported=3, rejected=rejected, errors=errors
+            )
+            response = client.post(
+                "/reservations/import?format=csv",
+                content="customer_name,table_id\r\n".encode(),
+            )
+
+            assert response.status_code == status_code
+            assert response.json()["rejected"] == rejected
+            file, import_format, batch_size = mock_import.call_args[0][1:]
+            assert import_format == "csv"
+            assert batch_size == settings.IMPORT_BATCH_SIZE
+
 
 class TestCreateReservation:
     """Test case POST /reservations/"""
@@ -150,6 +332,166 @@ class TestCreateReservation:
             assert "Service error" in str(exc_info.value)
 
 
+class TestAutoCreateReservation:
+    """Test case POST /reservations/auto"""
+
+    AUTO_DATA = {
+        "customer_name": "Иванов Иван",
+        "party_size": 3,
+        "reservation_time": "2030-06-10T18:00:00Z",
+        "duration_minutes": 60,
+        "location": "Зал",
+    }
+
+    def test_auto_create_success(self, client):
+        """Test that the reservation at the picked table is returned."""
+
+        created = schemas.Reservation(
+            id=5,
+            customer_name="Иванов Иван",
+            table_id=3,
+            reservation_time=datetime(2030, 6, 10, 18, 0, tzinfo=timezone.utc),
+            duration_minutes=60,
+        )
+        with patch("src.reservation.router.create_reservation_auto") as mock_create:
+            mock_create.return_value = created
+            response = client.post("/reservations/auto", json=self.AUTO_DATA)
+
+            assert response.status_code == status.HTTP_201_CREATED
+            assert response.json()["table_id"] == 3
+            reservation_in = mock_create.call_args[0][1]
+            assert isinstance(reservation_in, schemas.ReservationAutoCreate)
+            assert reservation_in.party_size == 3
+            assert reservation_in.location == "Зал"
+
+    def test_auto_create_party_size_validation(self, client):
+        """Test that the party size must be positive."""
+
+        with patch("src.reservation.router.create_reservation_auto") as mock_create:
+            response = client.post(
+                "/reservations/auto", json={**self.AUTO_DATA, "party_size": 0}
+            )
+
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+            mock_create.assert_not_called()
+
+
+class TestCreateRecurringReservation:
+    """Test case POST /reservations/recurring"""
+
+    def test_create_recurring_success(self, client):
+        """Test that the series and its inserted occurrences are returned."""
+
+        data = {
+            **MOCK_RESERVATION_CREATE_DATA,
+            "recurrence": {"frequency": "weekly", "count": 52},
+        }
+        series = schemas.ReservationSeries(
+            id=3,
+            **schemas.ReservationCreate(**MOCK_RESERVATION_CREATE_DATA).model_dump(),
+            recurrence=schemas.RecurrenceRule(frequency="weekly", count=52),
+            reservations=[],
+        )
+        with patch("src.reservation.router.create_reservation_series") as mock_create:
+            mock_create.return_value = series
+            response = client.post("/reservations/recurring", json=data)
+
+            assert response.status_code == status.HTTP_201_CREATED
+            assert response.json()["recurrence"] == {
+                "frequency": "weekly",
+                "until": None,
+                "count": 52,
+            }
+            series_in = mock_create.call_args[0][1]
+            assert isinstance(series_in, schemas.ReservationSeriesCreate)
+
+    def test_create_recurring_unknown_frequency(self, client):
+        """Test that only daily and weekly rules are accepted."""
+
+        data = {
+            **MOCK_RESERVATION_CREATE_DATA,
+            "recurrence": {"frequency": "monthly", "count": 3},
+        }
+        with patch("src.reservation.router.create_reservation_series") as mock_create:
+            response = client.post("/reservations/recurring", json=data)
+
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+            mock_create.assert_not_called()
+
+
+class TestBulkCreateReservations:
+    """Test case POST /reservations/bulk"""
+
+    BULK_ITEMS = [MOCK_RESERVATION_CREATE_DATA, MOCK_RESERVATION_CREATE_DATA]
+
+    def bulk_result(self, failed):
+        """Create a bulk result with ``failed`` failed items."""
+
+        results = [
+            schemas.ReservationBulkItem(
+                index=i, status_code=409, detail="Конфликт бронирования"
+            )
+            for i in range(failed)
+        ]
+        results += [
+            schemas.ReservationBulkItem(
+                index=i, status_code=201, reservation=MOCK_RESERVATION_OBJ
+            )
+            for i in range(failed, 2)
+        ]
+        return schemas.ReservationBulkResult(
+            created=2 - failed, failed=failed, results=results
+        )
+
+    @pytest.mark.parametrize(
+        "mode, failed, expected_status",
+        [
+            ("atomic", 0, status.HTTP_201_CREATED),
+            ("partial", 0, status.HTTP_201_CREATED),
+            ("partial", 1, status.HTTP_207_MULTI_STATUS),
+            ("atomic", 1, status.HTTP_409_CONFLICT),
+        ],
+    )
+    def test_bulk_status(self, client, mock_db_session, mode, failed, expected_status):
+        """Test the response status of a bulk request."""
+
+        with patch("src.reservation.router.create_reservations_bulk") as mock_bulk:
+            mock_bulk.return_value = self.bulk_result(failed)
+            response = client.post(
+                "/reservations/bulk", json={"items": self.BULK_ITEMS, "mode": mode}
+            )
+
+        assert response.status_code == expected_status
+        assert response.json()["failed"] == failed
+        assert len(response.json()["results"]) == 2
+        bulk_in = mock_bulk.call_args[0][1]
+        assert mock_bulk.call_args[0][0] == mock_db_session
+        assert bulk_in.mode == mode
+        assert len(bulk_in.items) == 2
+
+    @pytest.mark.parametrize(
+        "body",
+        [
+            {"items": []},
+            {"items": [MOCK_RESERVATION_CREATE_DATA], "mode": "best-effort"},
+        ],
+    )
+    def test_bulk_invalid_body(self, client, body):
+        """Test case POST /reservations/bulk with an invalid body."""
+
+        response = client.post("/reservations/bulk", json=body)
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_bulk_too_many_items(self, client):
+        """Test case POST /reservations/bulk above BULK_MAX_ITEMS."""
+
+        items = [MOCK_RESERVATION_CREATE_DATA] * (settings.BULK_MAX_ITEMS + 1)
+        response = client.post("/reservations/bulk", json={"items": items})
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
 class TestDeleteReservation:
     """Test case DELETE /reservations/{reservation_id}"""
 
@@ -1,19 +1,53 @@
-from datetime import datetime, timezone
-from unittest.mock import MagicMock, patch
+import random
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi import HTTPException, status
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.pagination import encode_cursor
 from src.reservation import models, schemas
 from src.reservation.service import (
+    count_reservations,
     get_reservations,
     create_reservation,
+    create_reservation_auto,
+    create_reservation_series,
+    create_reservations_bulk,
     delete_reservation,
 )
+from src.reservation.utils import (
+    NUMPY_SWEEP_THRESHOLD,
+    build_auto_reservation_insert,
+    build_bulk_check_query,
+    build_free_gaps_query,
+    find_batch_overlaps,
+    find_free_slots,
+)
+
+BULK_START = datetime(2030, 6, 10, 18, 0, tzinfo=timezone.utc)
+MOCK_AUTO_FIELDS = {
+    "customer_name": "Гость",
+    "reservation_time": BULK_START,
+    "duration_minutes": 90,
+}
+
+
+def make_bulk_item(table_id, minutes=0, duration=60):
+    """Create a bulk reservation item starting ``minutes`` after BULK_START."""
 
+    return schemas.ReservationCreate(
+        customer_name="Партнёр",
+        table_id=table_id,
+        reservation_time=BULK_START + timedelta(minutes=minutes),
+        duration_minutes=duration,
+    )
 
+
+@pytest.mark.anyio
 class TestReservationCRUD:
     """Tests class for reservation service."""
 
@@ -27,64 +61,175 @@ class TestReservationCRUD:
 
     def setup_mock_db(self, return_value=None):
         """Setup mock database session."""
-        mock_db = MagicMock(spec=Session)
+        mock_db = AsyncMock(spec=AsyncSession)
         mock_result = MagicMock()
         mock_result.scalars.return_value.all.return_value = return_value or []
         mock_db.execute.return_value = mock_result
         return mock_db
 
-    def test_get_reservations_default_params(self):
+    def setup_rows(self, return_value):
+        """Setup mock database session returning reservation rows."""
+
+        mock_db = AsyncMock(spec=AsyncSession)
+        mock_db.execute.return_value = MagicMock()
+        mock_db.execute.return_value.all.return_value = return_value
+        return mock_db
+
+    def setup_insert(self, returning):
+        """Setup mock database session for the INSERT ... RETURNING fast path."""
+
+        mock_db = AsyncMock(spec=AsyncSession)
+        mock_db.in_transaction = MagicMock(return_value=False)
+        mock_db.scalars.return_value = MagicMock()
+        mock_db.scalars.return_value.first.return_value = returning
+        mock_db.execute.return_value = MagicMock()
+        mock_db.execute.return_value.all.return_value = []
+        return mock_db
+
+    async def test_get_reservations_default_params(self):
         """Test getting reservations with default parameters."""
 
-        mock_db = MagicMock(spec=Session)
         expected_reservations = [models.Reservation(**self.MOCK_RESERVATION_DATA)]
-        mock_db.scalars.return_value.all.return_value = expected_reservations
+        mock_db = self.setup_rows(expected_reservations)
 
-        with patch("src.reservation.service.select") as mock_select:
-            result = get_reservations(mock_db)
+        result = await get_reservations(mock_db)
 
-        mock_select.assert_called_once()
-        mock_select.return_value.offset.assert_called_once_with(0)
-        mock_select.return_value.offset.return_value.limit.assert_called_once_with(100)
+        stmt = mock_db.execute.call_args[0][0]
+        assert stmt._offset is None
+        assert stmt._limit == 100
+        assert [str(c) for c in stmt._order_by_clauses] == [
+            "reservations.reservation_time",
+            "reservations.id",
+        ]
         assert result == expected_reservations
 
     @pytest.mark.parametrize("skip, limit", [(5, 10), (0, 0), (-1, 5)])
-    def test_get_reservations_pagination(self, skip, limit):
-        """Test getting reservations with pagination"""
+    async def test_get_reservations_pagination(self, skip, limit):
+        """Test getting reservations with offset pagination"""
 
-        mock_db = MagicMock(spec=Session)
         expected_reservations = [models.Reservation(**self.MOCK_RESERVATION_DATA)]
-        mock_db.scalars.return_value.all.return_value = expected_reservations
+        mock_db = self.setup_rows(expected_reservations)
 
-        with patch("src.reservation.service.select") as mock_select:
-            result = get_reservations(mock_db, skip=skip, limit=limit)
+        result = await get_reservations(mock_db, skip=skip, limit=limit)
 
-        mock_select.return_value.offset.assert_called_once_with(skip)
-        mock_select.return_value.offset.return_value.limit.assert_called_once_with(
-            limit
-        )
+        stmt = mock_db.execute.call_args[0][0]
+        assert stmt._offset == (skip or None)
+        assert stmt._limit == limit
         assert result == expected_reservations
 
-    def test_get_reservations_empty(self):
+    async def test_get_reservations_empty(self):
         """Test getting reservations with empty result"""
 
-        mock_db = MagicMock(spec=Session)
-        mock_db.scalars.return_value.all.return_value = []
+        mock_db = self.setup_rows([])
 
-        with patch("src.reservation.service.select") as mock_select:
-            result = get_reservations(mock_db)
+        result = await get_reservations(mock_db)
 
-        mock_select.assert_called_once()
-        mock_select.return_value.offset.assert_called_once_with(0)
-        mock_select.return_value.offset.return_value.limit.assert_called_once_with(100)
+        mock_db.execute.assert_awaited_once()
         assert result == []
 
-    def test_create_reservation_success(self):
-        """Test successful reservation creation."""
+    async def test_get_reservations_filters(self):
+        """Test that table, time range and location filters are combined."""
+
+        mock_db = self.setup_rows([])
+        start = datetime(2030, 6, 10, tzinfo=timezone.utc)
+
+        await get_reservations(
+            mock_db,
+            table_id=3,
+            start=start,
+            end=(start + timedelta(days=1)).replace(tzinfo=None),
+            location="Терраса",
+        )
+
+        stmt = mock_db.execute.call_args[0][0]
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        sql = str(compiled)
+        assert "JOIN tables ON tables.id = reservations.table_id" in sql
+        assert "reservations.table_id = %(table_id_1)s" in sql
+        assert "reservations.reservation_time >= %(reservation_time_1)s" in sql
+        assert "reservations.reservation_time < %(reservation_time_2)s" in sql
+        assert "tables.location = %(location_1)s" in sql
+        assert "reservations.period" not in sql
+        assert compiled.params["reservation_time_2"] == start + timedelta(days=1)
+
+    async def test_count_reservations(self):
+        """Test that the total is counted with the listing filters."""
+
+        mock_db = AsyncMock(spec=AsyncSession)
+
+        with patch("src.reservation.service.count_rows") as mock_count:
+            mock_count.return_value = (12, True)
+            result = await count_reservations(mock_db, exact=True, table_id=3)
+
+        assert result == (12, True)
+        stmt, exact = mock_count.call_args[0][1:]
+        assert exact is True
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        assert sql.startswith("SELECT reservations.id \nFROM reservations")
+        assert "reservations.table_id = " in sql
+        assert "ORDER BY" not in sql and "LIMIT" not in sql
+
+    async def test_get_reservations_by_ids(self):
+        """Test that a batch of IDs is looked up by one IN query."""
+
+        mock_db = self.setup_rows([])
+
+        await get_reservations(mock_db, ids=[4, 8, 15])
+
+        mock_db.execute.assert_awaited_once()
+        stmt = mock_db.execute.call_args[0][0]
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        assert "reservations.id IN (__[POSTCOMPILE_id_1])" in str(compiled)
+        assert compiled.params["id_1"] == [4, 8, 15]
+        assert "JOIN tables" not in str(compiled)
+
+    async def test_get_reservations_fields(self):
+        """Test that only requested fields and the cursor keys are selected."""
+
+        mock_db = self.setup_rows([])
+
+        await get_reservations(mock_db, fields=["table_id"])
+
+        stmt = mock_db.execute.call_args[0][0]
+        assert str(stmt).startswith(
+            "SELECT reservations.table_id, reservations.reservation_time, "
+            "reservations.id \nFROM reservations"
+        )
+
+    async def test_get_reservations_cursor(self):
+        """Test getting reservations after a cursor"""
+
+        mock_db = self.setup_rows([])
+        cursor = encode_cursor(["2030-06-10T18:00:00+00:00", 7])
 
-        mock_db = MagicMock(spec=Session)
+        await get_reservations(mock_db, limit=10, cursor=cursor)
 
-        reservation_datetime = datetime(2025, 6, 10, 18, 0, tzinfo=timezone.utc)
+        stmt = mock_db.execute.call_args[0][0]
+        sql = str(stmt.compile())
+        assert (
+            "(reservations.reservation_time, reservations.id) > "
+            "(:param_1, :param_2)" in sql
+        )
+        params = stmt.compile().params
+        assert params["param_1"] == datetime(2030, 6, 10, 18, 0, tzinfo=timezone.utc)
+        assert params["param_2"] == 7
+        assert stmt._offset is None
+
+    @pytest.mark.parametrize(
+        "cursor", ["garbage", encode_cursor([1]), encode_cursor(["not a date", 1])]
+    )
+    async def test_get_reservations_invalid_cursor(self, cursor):
+        """Test getting reservations with a malformed cursor"""
+
+        with pytest.raises(HTTPException) as exc_info:
+            await get_reservations(self.setup_rows([]), cursor=cursor)
+
+        assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+
+    async def test_create_reservation_success(self):
+        """Test successful reservation creation."""
+
+        reservation_datetime = datetime(2030, 6, 10, 18, 0, tzinfo=timezone.utc)
 
         reservation_in = schemas.ReservationCreate(
             customer_name="Иванов Иван",
@@ -100,175 +245,507 @@ class TestReservationCRUD:
             reservation_time=reservation_datetime,
             duration_minutes=60,
         )
+        mock_db = self.setup_insert(expected_reservation)
 
-        mock_db.commit.return_value = None
-        mock_db.scalar.return_value = None
-        mock_db.add.return_value = None
-        mock_db.refresh.return_value = None
-        mock_db.get.return_value = MagicMock()
+        result = await create_reservation(mock_db, reservation_in)
 
-        with patch(
-            "src.reservation.models.Reservation", return_value=expected_reservation
-        ) as mock_reservation:
-            mock_reservation.reservation_time = reservation_datetime
-            mock_reservation.duration_minutes = 60
-
-            with patch(
-                "src.reservation.service.check_reservation_conflicts", return_value=None
-            ):
-                result = create_reservation(mock_db, reservation_in)
-
-                assert result == expected_reservation
-                mock_db.add.assert_called_once()
-                mock_db.commit.assert_called_once()
-                mock_db.refresh.assert_called_once()
-
-    def test_create_reservation_conflict(self):
-        """Test creating a reservation with a conflict."""
+        assert result == expected_reservation
+        mock_db.connection.assert_awaited_once_with(
+            execution_options={"isolation_level": "AUTOCOMMIT"}
+        )
+        mock_db.scalars.assert_awaited_once()
+        mock_db.commit.assert_called_once()
+        mock_db.get.assert_not_called()
+        mock_db.refresh.assert_not_called()
+        mock_db.scalar.assert_not_called()
+
+    async def test_create_reservation_single_statement(self):
+        """Test that the table check and insert are one statement."""
+
+        mock_db = self.setup_insert(None)
+        reservation_in = schemas.ReservationCreate(
+            customer_name="Иванов Иван",
+            table_id=5,
+            reservation_time=datetime(2030, 6, 10, 18, 0, tzinfo=timezone.utc),
+            duration_minutes=60,
+        )
+
+        with pytest.raises(HTTPException):
+            await create_reservation(mock_db, reservation_in)
+
+        sql = str(mock_db.scalars.call_args[0][0].compile(dialect=postgresql.dialect()))
+        assert sql.startswith("INSERT INTO reservations")
+        assert "SELECT" in sql and "FROM tables" in sql
+        assert "RETURNING reservations.id" in sql
+
+    async def test_create_reservation_index_conflict(self):
+        """Test that a conflict known to the index costs one query."""
+
+        mock_db = self.setup_insert(None)
+        mock_db.execute.return_value.all.return_value = [
+            (
+                1,
+                BULK_START - timedelta(hours=1),
+                BULK_START + timedelta(hours=1),
+                None,
+                None,
+            ),
+        ]
+        reservation_in = make_bulk_item(1)
+
+        with patch("src.reservation.service.reservation_index") as mock_index:
+            mock_index.conflicts.return_value = True
+            with pytest.raises(HTTPException) as exc_info:
+                await create_reservation(mock_db, reservation_in)
+
+        assert exc_info.value.status_code == status.HTTP_409_CONFLICT
+        assert exc_info.value.suggestions[0] == schemas.FreeSlot(
+            table_id=1, reservation_time=BULK_START + timedelta(hours=1)
+        )
+        mock_index.conflicts.assert_called_once_with(
+            1, BULK_START, BULK_START + timedelta(minutes=60)
+        )
+        mock_db.scalars.assert_not_called()
+        mock_db.execute.assert_awaited_once()
+
+    async def test_create_reservation_stale_index_conflict(self):
+        """Test that a slot freed by another process is booked anyway."""
+
+        created = models.Reservation(id=1, **make_bulk_item(1).model_dump())
+        mock_db = self.setup_insert(created)
+        mock_db.execute.return_value.all.return_value = [
+            (1, BULK_START - timedelta(hours=2), BULK_START, None, None),
+        ]
+
+        with patch("src.reservation.service.reservation_index") as mock_index:
+            mock_index.conflicts.return_value = True
+            result = await create_reservation(mock_db, make_bulk_item(1))
+
+        assert result is created
+        mock_db.execute.assert_awaited_once()
+        mock_db.scalars.assert_awaited_once()
+        mock_index.add.assert_called_once_with(created)
+
+    @pytest.mark.parametrize("known", [False, None])
+    async def test_create_reservation_updates_index(self, known):
+        """Test that a created reservation is added to the index."""
+
+        created = models.Reservation(id=1, **make_bulk_item(1).model_dump())
+        mock_db = self.setup_insert(created)
+
+        with patch("src.reservation.service.reservation_index") as mock_index:
+            mock_index.conflicts.return_value = known
+            await create_reservation(mock_db, make_bulk_item(1))
 
-        mock_db = MagicMock(spec=Session)
+        mock_db.scalars.assert_awaited_once()
+        mock_index.add.assert_called_once_with(created)
 
-        reservation_time = datetime(2025, 6, 10, 18, 0, tzinfo=timezone.utc)
+    async def test_create_reservation_in_transaction(self):
+        """Test that an open transaction is reused instead of autocommit."""
 
+        mock_db = self.setup_insert(MagicMock())
+        mock_db.in_transaction = MagicMock(return_value=True)
         reservation_in = schemas.ReservationCreate(
             customer_name="Иванов Иван",
             table_id=1,
-            reservation_time=reservation_time,
+            reservation_time=datetime(2030, 6, 10, 18, 0, tzinfo=timezone.utc),
             duration_minutes=60,
         )
 
-        mock_db.get.return_value = MagicMock()
+        await create_reservation(mock_db, reservation_in)
+
+        mock_db.connection.assert_not_called()
+        mock_db.commit.assert_awaited_once()
+
+    async def test_create_reservation_conflict(self):
+        """Test creating a reservation with a conflict."""
+
+        mock_db = self.setup_insert(None)
+        mock_db.scalars.side_effect = IntegrityError(
+            "INSERT", {}, MagicMock(pgcode="23P01")
+        )
+        mock_db.execute.return_value.all.return_value = [
+            (
+                1,
+                BULK_START - timedelta(hours=1),
+                BULK_START + timedelta(hours=1),
+                None,
+                None,
+            ),
+        ]
+
+        reservation_in = schemas.ReservationCreate(
+            customer_name="Иванов Иван",
+            table_id=1,
+            reservation_time=datetime(2030, 6, 10, 18, 0, tzinfo=timezone.utc),
+            duration_minutes=60,
+        )
 
         with patch(
-            "src.reservation.service.validate_table_exists"
-        ) as mock_validate_table:
-            with patch(
-                "src.reservation.service.validate_reservation_data"
-            ) as mock_validate_data:
-                with patch(
-                    "src.reservation.service.check_reservation_conflicts"
-                ) as mock_check_conflicts:
-                    conflict_exception = HTTPException(
-                        status_code=status.HTTP_409_CONFLICT,
-                        detail="Конфликт бронирования: столик уже занят в указанный временной слот.",
-                    )
-                    mock_check_conflicts.side_effect = conflict_exception
-
-                    with pytest.raises(HTTPException) as exc_info:
-                        create_reservation(mock_db, reservation_in)
-
-                    assert exc_info.value.status_code == status.HTTP_409_CONFLICT
-                    assert "Конфликт бронирования" in exc_info.value.detail
-
-                    mock_validate_table.assert_called_once()
-                    mock_validate_data.assert_called_once()
-                    mock_check_conflicts.assert_called_once()
-
-    def test_create_reservation_database_error(self):
+            "src.reservation.service.validate_reservation_data"
+        ) as mock_validate_data:
+            with pytest.raises(HTTPException) as exc_info:
+                await create_reservation(mock_db, reservation_in)
+
+            assert exc_info.value.status_code == status.HTTP_409_CONFLICT
+            assert "Конфликт бронирования" in exc_info.value.detail
+            assert exc_info.value.suggestions[0] == schemas.FreeSlot(
+                table_id=1, reservation_time=BULK_START + timedelta(hours=1)
+            )
+
+            mock_validate_data.assert_called_once()
+            mock_db.scalar.assert_not_called()
+            mock_db.rollback.assert_awaited_once()
+
+    async def test_create_reservation_table_deleted_concurrently(self):
+        """Test that a foreign key violation is reported as a missing table."""
+
+        mock_db = self.setup_insert(None)
+        mock_db.scalars.side_effect = IntegrityError(
+            "INSERT", {}, MagicMock(pgcode="23503")
+        )
+        reservation_in = schemas.ReservationCreate(
+            customer_name="Иванов Иван",
+            table_id=4,
+            reservation_time=datetime(2030, 6, 10, 18, 0, tzinfo=timezone.utc),
+            duration_minutes=60,
+        )
+
+        with pytest.raises(HTTPException) as exc_info:
+            await create_reservation(mock_db, reservation_in)
+
+        assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
+        assert exc_info.value.detail == "Стол с ID 4 не найден."
+
+    def make_auto_item(self, location=None):
+        """Create an auto-seating request for a party of three."""
+
+        return schemas.ReservationAutoCreate(
+            customer_name="Гость",
+            party_size=3,
+            reservation_time=BULK_START,
+            duration_minutes=90,
+            location=location,
+        )
+
+    def test_auto_insert_picks_best_fit(self):
+        """Test that the smallest free table is picked and locked in one statement."""
+
+        stmt = build_auto_reservation_insert(self.make_auto_item("Зал"))
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        sql = str(compiled)
+
+        assert sql.startswith("WITH candidate AS")
+        assert "tables.seats >= " in sql
+        assert "tables.location = " in sql
+        assert "NOT (EXISTS (SELECT * \nFROM reservations" in sql
+        assert "ORDER BY tables.seats, tables.id" in sql
+        assert "FOR NO KEY UPDATE SKIP LOCKED" in sql
+        assert "INSERT INTO reservations" in sql
+        assert BULK_START + timedelta(minutes=90) in compiled.params.values()
+
+    async def test_auto_create_reservation(self):
+        """Test that the reservation at the picked table is returned."""
+
+        created = models.Reservation(id=1, table_id=4, **MOCK_AUTO_FIELDS)
+        mock_db = self.setup_insert(created)
+
+        with patch("src.reservation.service.reservation_index") as mock_index:
+            result = await create_reservation_auto(mock_db, self.make_auto_item())
+
+        assert result is created
+        mock_db.scalars.assert_awaited_once()
+        mock_db.commit.assert_awaited_once()
+        mock_index.add.assert_called_once_with(created)
+
+    async def test_auto_create_no_free_table(self):
+        """Test that a 409 is returned when no table fits."""
+
+        mock_db = self.setup_insert(None)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await create_reservation_auto(mock_db, self.make_auto_item())
+
+        assert exc_info.value.status_code == status.HTTP_409_CONFLICT
+        assert exc_info.value.detail == "Нет свободных столиков на указанное время."
+        mock_db.scalars.assert_awaited_once()
+
+    async def test_auto_create_retries_lost_race(self):
+        """Test that the pick is retried when a concurrent booking wins."""
+
+        created = models.Reservation(id=1, table_id=5, **MOCK_AUTO_FIELDS)
+        mock_db = self.setup_insert(created)
+        result = MagicMock()
+        result.first.return_value = created
+        mock_db.scalars.side_effect = [
+            IntegrityError("INSERT", {}, MagicMock(pgcode="23P01")),
+            result,
+        ]
+
+        assert await create_reservation_auto(mock_db, self.make_auto_item()) is created
+        assert mock_db.scalars.await_count == 2
+        mock_db.rollback.assert_awaited_once()
+
+    async def test_auto_create_validation(self):
+        """Test that auto-seating requests are validated like reservations."""
+
+        mock_db = self.setup_insert(None)
+        item = self.make_auto_item()
+        item.duration_minutes = 0
+
+        with pytest.raises(HTTPException) as exc_info:
+            await create_reservation_auto(mock_db, item)
+
+        assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+        mock_db.scalars.assert_not_called()
+
+    def setup_series(self, checks=(), created=()):
+        """Setup mock database session for creating a reservation series."""
+
+        mock_db = AsyncMock(spec=AsyncSession)
+        check_result = MagicMock()
+        check_result.all.return_value = list(checks)
+        mock_db.execute.return_value = check_result
+        mock_db.scalars.return_value = MagicMock()
+        mock_db.scalars.return_value.all.return_value = list(created)
+        mock_db.add.side_effect = lambda series: setattr(series, "id", 7)
+        return mock_db
+
+    def make_series_item(self, start, **rule):
+        """Create a weekly series request."""
+
+        return schemas.ReservationSeriesCreate(
+            customer_name="ООО Ромашка",
+            table_id=1,
+            reservation_time=start,
+            duration_minutes=60,
+            recurrence=schemas.RecurrenceRule(frequency="weekly", **rule),
+        )
+
+    async def test_create_series_inserts_all_occurrences(self):
+        """Test that every occurrence is checked and inserted at once."""
+
+        start = datetime.now(timezone.utc) + timedelta(days=1)
+        created = [
+            models.Reservation(
+                id=i,
+                customer_name="ООО Ромашка",
+                table_id=1,
+                reservation_time=start + timedelta(weeks=i),
+                duration_minutes=60,
+            )
+            for i in range(10)
+        ]
+        mock_db = self.setup_series(created=created)
+
+        with patch("src.reservation.service.reservation_index") as mock_index:
+            result = await create_reservation_series(
+                mock_db, self.make_series_item(start, count=10)
+            )
+
+        check_stmt = mock_db.execute.call_args[0][0]
+        params = check_stmt.compile(dialect=postgresql.dialect()).params
+        assert len(params["starts"]) == 10
+
+        series = mock_db.add.call_args[0][0]
+        assert series.frequency == "weekly"
+        assert series.ends_at == start + timedelta(weeks=9)
+        inserted = mock_db.scalars.call_args[0][1]
+        assert [item["reservation_time"] for item in inserted] == [
+            start + timedelta(weeks=i) for i in range(10)
+        ]
+        mock_db.commit.assert_awaited_once()
+        assert mock_index.add.call_count == 10
+
+        assert result.id == 7
+        assert result.recurrence.count == 10
+        assert [r.id for r in result.reservations] == list(range(10))
+
+    @pytest.mark.parametrize(
+        "checks, status_code",
+        [([(3, False, True)], 409), ([(0, True, False)], 404)],
+    )
+    async def test_create_series_existing_conflict(self, checks, status_code):
+        """Test that all occurrences are checked before anything is inserted."""
+
+        mock_db = self.setup_series(checks=checks)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await create_reservation_series(
+                mock_db, self.make_series_item(BULK_START, count=5)
+            )
+
+        assert exc_info.value.status_code == status_code
+        mock_db.add.assert_not_called()
+        mock_db.rollback.assert_awaited_once()
+
+    async def test_create_series_concurrent_conflict(self):
+        """Test that a slot booked since the check is rejected on insert."""
+
+        mock_db = self.setup_series()
+        mock_db.scalars.side_effect = IntegrityError(
+            "INSERT", {}, MagicMock(pgcode="23P01")
+        )
+
+        with pytest.raises(HTTPException) as exc_info:
+            await create_reservation_series(
+                mock_db, self.make_series_item(BULK_START, count=5)
+            )
+
+        assert exc_info.value.status_code == status.HTTP_409_CONFLICT
+        mock_db.rollback.assert_awaited_once()
+        mock_db.commit.assert_not_awaited()
+
+    @pytest.mark.parametrize(
+        "rule, detail",
+        [
+            ({}, "Укажите ровно одно из полей until или count."),
+            (
+                {"count": 2, "until": BULK_START},
+                "Укажите ровно одно из полей until или count.",
+            ),
+            (
+                {"until": BULK_START - timedelta(days=1)},
+                "Окончание повторений не может быть раньше первого бронирования.",
+            ),
+            ({"count": 5000}, "Слишком много повторений: не более 1000."),
+        ],
+    )
+    async def test_create_series_invalid_rule(self, rule, detail):
+        """Test that invalid rules are rejected without a query."""
+
+        mock_db = self.setup_series()
+
+        with pytest.raises(HTTPException) as exc_info:
+            await create_reservation_series(
+                mock_db, self.make_series_item(BULK_START, **rule)
+            )
+
+        assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+        assert exc_info.value.detail == detail
+        mock_db.execute.assert_not_called()
+
+    async def test_create_reservation_database_error(self):
         """Test reservation creation with database error"""
 
-        mock_db = MagicMock(spec=Session)
+        mock_db = self.setup_insert(None)
         reservation_in = schemas.ReservationCreate(
             customer_name="Ошибка",
             table_id=1,
-            reservation_time=datetime(2025, 6, 10, 18, 0, tzinfo=timezone.utc),
+            reservation_time=datetime(2030, 6, 10, 18, 0, tzinfo=timezone.utc),
             duration_minutes=60,
         )
         mock_db.commit.side_effect = SQLAlchemyError("Ошибка БД")
 
         with pytest.raises(HTTPException) as exc_info:
-            create_reservation(mock_db, reservation_in)
+            await create_reservation(mock_db, reservation_in)
 
-        assert exc_info.value.status_code == status.HTTP_409_CONFLICT
+        assert exc_info.value.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert exc_info.value.detail == "Ошибка создания бронирования: Ошибка БД"
+        mock_db.rollback.assert_awaited_once()
+
+    async def test_create_reservation_other_integrity_error(self):
+        """Test reservation creation with a non-overlap integrity error"""
+
+        mock_db = self.setup_insert(None)
+        reservation_in = schemas.ReservationCreate(
+            customer_name="Ошибка",
+            table_id=1,
+            reservation_time=datetime(2030, 6, 10, 18, 0, tzinfo=timezone.utc),
+            duration_minutes=60,
+        )
+        mock_db.commit.side_effect = IntegrityError(
+            "INSERT", {}, MagicMock(pgcode="23502")
+        )
+
+        with pytest.raises(HTTPException) as exc_info:
+            await create_reservation(mock_db, reservation_in)
 
-    def test_delete_reservation_success(self):
+        assert exc_info.value.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        mock_db.connection.assert_awaited_once_with(
+            execution_options={"isolation_level": "AUTOCOMMIT"}
+        )
+        mock_db.scalars.assert_awaited_once()
+        mock_db.rollback.assert_awaited_once()
+
+    async def test_delete_reservation_success(self):
         """Test successful reservation deletion"""
 
         mock_reservation = MagicMock(spec=models.Reservation)
-        mock_db = MagicMock(spec=Session)
-        mock_db.scalar.return_value = mock_reservation
+        mock_db = self.setup_insert(mock_reservation)
 
-        result = delete_reservation(mock_db, 1)
+        with patch("src.reservation.service.reservation_index") as mock_index:
+            result = await delete_reservation(mock_db, 1)
 
-        mock_db.delete.assert_called_once_with(mock_reservation)
+        mock_index.discard.assert_called_once_with(mock_reservation)
+        sql = str(mock_db.scalars.call_args[0][0].compile(dialect=postgresql.dialect()))
+        assert sql.startswith("DELETE FROM reservations")
+        assert "RETURNING reservations.id" in sql
+        mock_db.delete.assert_not_called()
+        mock_db.scalar.assert_not_called()
         mock_db.commit.assert_called_once()
-        assert result is None
+        assert result is mock_reservation
 
-    def test_delete_reservation_not_found(self):
+    async def test_delete_reservation_not_found(self):
         """Test reservation deletion with not found"""
 
-        mock_db = MagicMock(spec=Session)
-        mock_db.scalar.return_value = None
+        mock_db = self.setup_insert(None)
 
-        with pytest.raises(HTTPException) as exc_info:
-            delete_reservation(mock_db, 999)
+        result = await delete_reservation(mock_db, 999)
 
-        assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
-        assert "не найдено" in exc_info.value.detail
-        mock_db.delete.assert_not_called()
+        assert result is None
+        mock_db.scalars.assert_awaited_once()
 
-    def test_delete_reservation_database_error(self):
+    async def test_delete_reservation_database_error(self):
         """Test reservation deletion with database error"""
 
-        mock_db = MagicMock(spec=Session)
+        mock_db = self.setup_insert(MagicMock(spec=models.Reservation))
         mock_db.commit.side_effect = SQLAlchemyError("Ошибка удаления")
-        mock_db.scalar.return_value = MagicMock(spec=models.Reservation)
-
-        mock_db.query.return_value.filter.return_value.one_or_none.return_value = (
-            MagicMock(spec=models.Reservation)
-        )
 
         with pytest.raises(HTTPException) as exc_info:
-            delete_reservation(mock_db, 1)
+            await delete_reservation(mock_db, 1)
 
         assert exc_info.value.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
         assert exc_info.value.detail == "Ошибка удаления бронирования: Ошибка удаления"
+        mock_db.rollback.assert_awaited_once()
 
     @pytest.mark.parametrize("duration", [-30, 0, 1440])
-    def test_create_reservation_edge_durations(self, duration):
+    async def test_create_reservation_edge_durations(self, duration):
         """Test creating reservation with edge durations"""
 
-        mock_db = MagicMock(spec=Session)
         reservation_in = schemas.ReservationCreate(
             customer_name="Тест",
             table_id=1,
-            reservation_time=datetime(2025, 6, 10, 18, 0, tzinfo=timezone.utc),
+            reservation_time=datetime(2030, 6, 10, 18, 0, tzinfo=timezone.utc),
             duration_minutes=duration,
         )
-
-        mock_db.scalar.return_value = None
+        mock_db = self.setup_insert(
+            models.Reservation(id=1, **reservation_in.model_dump())
+        )
 
         if duration <= 0:
             with pytest.raises(HTTPException) as exc_info:
-                create_reservation(mock_db, reservation_in)
+                await create_reservation(mock_db, reservation_in)
             mock_db.commit.assert_not_called()
+            mock_db.scalars.assert_not_called()
             assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
         else:
-            mock_db.add.return_value = None
-            mock_db.flush.return_value = None
-
-            def side_effect_add(obj):
-                obj.id = 1
-                return None
-
-            mock_db.add.side_effect = side_effect_add
-
-            result = create_reservation(mock_db, reservation_in)
+            result = await create_reservation(mock_db, reservation_in)
 
-            mock_db.add.assert_called_once()
+            mock_db.scalars.assert_awaited_once()
             mock_db.commit.assert_called_once()
             assert result.id == 1
             assert result.customer_name == "Тест"
             assert result.table_id == 1
             assert result.reservation_time == datetime(
-                2025, 6, 10, 18, 0, tzinfo=timezone.utc
+                2030, 6, 10, 18, 0, tzinfo=timezone.utc
             )
             assert result.duration_minutes == duration
 
-    def test_create_reservation_past_date(self):
+    async def test_create_reservation_past_date(self):
         """Test creating reservation with past date"""
 
-        mock_db = MagicMock(spec=Session)
+        mock_db = AsyncMock(spec=AsyncSession)
         reservation_in = schemas.ReservationCreate(
             customer_name="Тест",
             table_id=1,
@@ -277,32 +754,308 @@ class TestReservationCRUD:
         )
 
         with pytest.raises(HTTPException) as exc_info:
-            create_reservation(mock_db, reservation_in)
+            await create_reservation(mock_db, reservation_in)
 
         assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
         assert exc_info.value.detail == "Время бронирования не может быть в прошлом."
 
         mock_db.commit.assert_not_called()
 
-    def test_create_reservation_invalid_table_id(self):
+    async def test_create_reservation_invalid_table_id(self):
         """Test creating reservation with invalid table ID"""
 
-        mock_db = MagicMock(spec=Session)
+        mock_db = self.setup_insert(None)
         reservation_in = schemas.ReservationCreate(
             customer_name="Несуществующий стол",
             table_id=999,
-            reservation_time=datetime(2025, 6, 10, 18, 0),
+            reservation_time=datetime(2030, 6, 10, 18, 0),
             duration_minutes=60,
         )
 
-        mock_db.scalar.return_value = None
-
-        mock_db.get.return_value = None
-
         with pytest.raises(HTTPException) as exc_info:
-            result = create_reservation(mock_db, reservation_in)
+            await create_reservation(mock_db, reservation_in)
 
         assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
         assert f"Стол с ID {reservation_in.table_id} не найден" in exc_info.value.detail
 
-        mock_db.commit.assert_not_called()
+        mock_db.get.assert_not_called()
+
+
+@pytest.mark.anyio
+class TestBulkReservations:
+    """Tests for bulk reservation creation."""
+
+    def setup_bulk_db(self, check_rows=(), inserted=None):
+        """Setup mock database session for the bulk check and insert."""
+
+        mock_db = AsyncMock(spec=AsyncSession)
+        mock_db.in_transaction = MagicMock(return_value=False)
+        mock_db.execute.return_value = list(check_rows)
+        mock_db.scalars.side_effect = lambda stmt, params: (
+            [models.Reservation(id=i + 1, **p) for i, p in enumerate(params)]
+            if inserted is None
+            else inserted
+        )
+        return mock_db
+
+    @staticmethod
+    def sweep(items):
+        """Run find_batch_overlaps over reservation items."""
+
+        starts = [item.reservation_time for item in items]
+        return find_batch_overlaps(
+            [item.table_id for item in items],
+            starts,
+            [
+                start + timedelta(minutes=item.duration_minutes)
+                for start, item in zip(starts, items)
+            ],
+        )
+
+    def test_batch_overlaps_keep_earliest(self):
+        """Test that only later overlapping items of the same table are flagged."""
+
+        items = [
+            make_bulk_item(1, 30),
+            make_bulk_item(1, 0),
+            make_bulk_item(2, 30),
+            make_bulk_item(1, 90),
+            make_bulk_item(1, 0),
+        ]
+
+        assert self.sweep(items) == [True, False, False, False, True]
+
+    @pytest.mark.parametrize("threshold", [10**9, 1])
+    def test_batch_overlaps_rejected_items_do_not_cascade(self, threshold):
+        """Test that only kept items reject later ones."""
+
+        items = [
+            make_bulk_item(1, 0, duration=120),
+            make_bulk_item(1, 60, duration=120),
+            make_bulk_item(1, 150, duration=90),
+        ]
+
+        with patch("src.reservation.utils.NUMPY_SWEEP_THRESHOLD", threshold):
+            assert self.sweep(items) == [False, True, False]
+
+    def test_batch_overlaps_wide_time_span(self):
+        """Test both sweeps with times centuries apart on many tables."""
+
+        items = [make_bulk_item(table_id % 60 + 1, table_id) for table_id in range(300)]
+        items[-1] = items[-1].model_copy(
+            update={"reservation_time": datetime(9999, 1, 1, tzinfo=timezone.utc)}
+        )
+
+        with patch("src.reservation.utils.NUMPY_SWEEP_THRESHOLD", 10**9):
+            expected = self.sweep(items)
+
+        assert expected == [False] * 300
+        assert self.sweep(items) == expected
+
+    def test_batch_overlaps_numpy_matches_python(self):
+        """Test that the vectorized sweep gives the same result."""
+
+        rng = random.Random(7)
+        items = [
+            make_bulk_item(
+                rng.randint(1, 20), rng.randint(0, 5000), rng.randint(1, 180)
+            )
+            for _ in range(NUMPY_SWEEP_THRESHOLD * 2)
+        ]
+
+        with patch("src.reservation.utils.NUMPY_SWEEP_THRESHOLD", 10**9):
+            expected = self.sweep(items)
+
+        assert self.sweep(items) == expected
+        assert any(expected) and not all(expected)
+
+    def test_bulk_check_query_is_set_based(self):
+        """Test that the batch is checked by one query with array parameters."""
+
+        compiled = build_bulk_check_query(
+            [1, 2], [BULK_START] * 2, [BULK_START + timedelta(hours=1)] * 2
+        ).compile(dialect=postgresql.dialect())
+
+        sql = str(compiled)
+        assert "FROM unnest(" in sql
+        assert "LEFT OUTER JOIN tables" in sql
+        assert "reservations.period && tstzrange(items.start_at, items.end_at" in sql
+        assert compiled.params["table_ids"] == [1, 2]
+
+    async def test_bulk_all_created(self):
+        """Test a batch without errors is inserted by one statement."""
+
+        items = [make_bulk_item(1), make_bulk_item(1, 60), make_bulk_item(2)]
+        mock_db = self.setup_bulk_db()
+
+        result = await create_reservations_bulk(
+            mock_db, schemas.ReservationBulkCreate(items=items)
+        )
+
+        assert result.created == 3
+        assert result.failed == 0
+        assert [r.status_code for r in result.results] == [201, 201, 201]
+        assert [r.reservation.id for r in result.results] == [1, 2, 3]
+        mock_db.execute.assert_awaited_once()
+        mock_db.scalars.assert_awaited_once()
+        sql = str(mock_db.scalars.call_args[0][0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT" not in sql
+        mock_db.commit.assert_awaited_once()
+
+    async def test_bulk_partial(self):
+        """Test that valid items are inserted and failures are reported."""
+
+        items = [
+            make_bulk_item(1),
+            make_bulk_item(1, 30),
+            make_bulk_item(2, duration=0),
+            make_bulk_item(3),
+            make_bulk_item(4),
+            make_bulk_item(5),
+        ]
+        # Candidates are items 0, 1, 3, 4 and 5; item 1 overlaps item 0.
+        mock_db = self.setup_bulk_db(check_rows=[(2, True, False), (3, False, True)])
+
+        result = await create_reservations_bulk(
+            mock_db, schemas.ReservationBulkCreate(items=items, mode="partial")
+        )
+
+        assert [r.status_code for r in result.results] == [201, 409, 400, 404, 409, 201]
+        assert result.created == 2
+        assert result.failed == 4
+        assert result.results[3].detail == "Стол с ID 3 не найден."
+        params = mock_db.scalars.call_args[0][1]
+        assert [p["table_id"] for p in params] == [1, 5]
+        sql = str(mock_db.scalars.call_args[0][0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT DO NOTHING" in sql
+
+    async def test_bulk_partial_skips_concurrent_bookings(self):
+        """Test that rows skipped by ON CONFLICT are reported as conflicts."""
+
+        items = [make_bulk_item(1), make_bulk_item(2)]
+        inserted = [models.Reservation(id=7, **items[1].model_dump())]
+        mock_db = self.setup_bulk_db(inserted=inserted)
+
+        result = await create_reservations_bulk(
+            mock_db, schemas.ReservationBulkCreate(items=items, mode="partial")
+        )
+
+        assert [r.status_code for r in result.results] == [409, 201]
+        assert result.results[1].reservation.id == 7
+
+    async def test_bulk_atomic_rejects_batch(self):
+        """Test that nothing is inserted in atomic mode if an item fails."""
+
+        items = [make_bulk_item(1), make_bulk_item(1, 30), make_bulk_item(2)]
+        mock_db = self.setup_bulk_db()
+
+        result = await create_reservations_bulk(
+            mock_db, schemas.ReservationBulkCreate(items=items, mode="atomic")
+        )
+
+        assert [r.status_code for r in result.results] == [424, 409, 424]
+        assert result.created == 0
+        assert result.failed == 1
+        mock_db.scalars.assert_not_called()
+
+    async def test_bulk_all_invalid_skips_queries(self):
+        """Test that no query is sent when every item fails validation."""
+
+        mock_db = self.setup_bulk_db()
+        items = [make_bulk_item(1, duration=-5)]
+
+        result = await create_reservations_bulk(
+            mock_db, schemas.ReservationBulkCreate(items=items)
+        )
+
+        assert result.results[0].status_code == 400
+        mock_db.execute.assert_not_called()
+        mock_db.scalars.assert_not_called()
+
+    async def test_bulk_atomic_insert_conflict(self):
+        """Test a concurrent booking rejecting an atomic insert."""
+
+        mock_db = self.setup_bulk_db()
+        mock_db.scalars.side_effect = IntegrityError(
+            "INSERT", {}, MagicMock(pgcode="23P01")
+        )
+
+        with pytest.raises(HTTPException) as exc_info:
+            await create_reservations_bulk(
+                mock_db, schemas.ReservationBulkCreate(items=[make_bulk_item(1)])
+            )
+
+        assert exc_info.value.status_code == status.HTTP_409_CONFLICT
+        mock_db.rollback.assert_awaited_once()
+
+
+def at(hours):
+    """Get the time ``hours`` after BULK_START."""
+
+    return BULK_START + timedelta(hours=hours)
+
+
+class TestFreeSlots:
+    """Tests for the free slot suggestions of a conflicting reservation."""
+
+    WINDOW = (at(-12), at(12))
+
+    def test_gaps_query(self):
+        """Test that neighbours are read by LAG/LEAD in one query."""
+
+        stmt = build_free_gaps_query(1, *self.WINDOW, equivalent_tables=True)
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+        assert "lag(upper(reservations.period)) OVER (PARTITION BY" in sql
+        assert "lead(lower(reservations.period)) OVER (PARTITION BY" in sql
+        assert "LEFT OUTER JOIN reservations" in sql
+        assert "reservations.period && tstzrange(" in sql
+        assert "tables.seats >= tables_1.seats" in sql
+        assert "tables.archived_at IS NULL" in sql
+
+    def test_gaps_query_single_table(self):
+        """Test that equivalent tables are only searched on request."""
+
+        stmt = build_free_gaps_query(1, *self.WINDOW)
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+        assert "tables_1" not in sql
+        assert "tables.id = " in sql
+
+    def test_nearest_first(self):
+        """Test that the nearest free starts of every gap are suggested."""
+
+        rows = [
+            (1, at(-2), at(0.5), None, at(1.5)),
+            (1, at(1.5), at(3), at(0.5), None),
+            (2, at(-1), at(0.25), None, None),
+        ]
+
+        slots = find_free_slots(rows, 1, at(0), timedelta(hours=1), *self.WINDOW, 3)
+
+        assert [(s.table_id, s.reservation_time) for s in slots] == [
+            (2, at(0.25)),
+            (1, at(0.5)),
+            (2, at(-2)),
+        ]
+
+    def test_short_gaps_are_skipped(self):
+        """Test gaps shorter than the reservation and the window edges."""
+
+        rows = [
+            (1, at(-12), at(0.5), None, at(1)),
+            (1, at(1), at(11.5), at(0.5), None),
+        ]
+
+        slots = find_free_slots(rows, 1, at(0), timedelta(hours=1), *self.WINDOW, 3)
+
+        assert slots == []
+
+    def test_free_table(self):
+        """Test that a table without reservations is free at the requested time."""
+
+        rows = [(1, at(-1), at(1), None, None), (3, None, None, None, None)]
+
+        slots = find_free_slots(rows, 1, at(0), timedelta(hours=1), *self.WINDOW, 1)
+
+        assert slots == [schemas.FreeSlot(table_id=3, reservation_time=at(0))]
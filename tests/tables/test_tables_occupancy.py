@@ -0,0 +1,136 @@
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import AsyncMock
+
+import numpy as np
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.tables.occupancy import build_occupancy, get_occupancy, paint_occupancy
+
+DAY = date(2030, 6, 10)
+DAY_START = datetime(2030, 6, 10, tzinfo=timezone.utc)
+
+
+def at(hours: float) -> datetime:
+    """Get the time ``hours`` after the start of DAY."""
+
+    return DAY_START + timedelta(hours=hours)
+
+
+class TestPaintOccupancy:
+    """Tests for paint_occupancy."""
+
+    def test_intervals_are_painted(self):
+        """Test that every touched slot is marked and tables stay separate."""
+
+        busy = paint_occupancy(
+            rows=np.array([0, 0, 1]),
+            starts=np.array([0, 25, 40]),
+            ends=np.array([10, 35, 100]),
+            n_tables=3,
+            n_slots=6,
+            slot_length=10,
+        )
+
+        assert busy.tolist() == [
+            [True, False, True, True, False, False],
+            [False, False, False, False, True, True],
+            [False] * 6,
+        ]
+
+    def test_intervals_are_clipped_to_the_day(self):
+        """Test reservations crossing midnight and empty intervals."""
+
+        busy = paint_occupancy(
+            rows=np.array([0, 1, 2]),
+            starts=np.array([-15, 50, 30]),
+            ends=np.array([5, 90, 30]),
+            n_tables=3,
+            n_slots=6,
+            slot_length=10,
+        )
+
+        assert busy.tolist() == [
+            [True] + [False] * 5,
+            [False] * 5 + [True],
+            [False] * 6,
+        ]
+
+    def test_matches_brute_force(self):
+        """Test the vectorized painting against a per-slot check."""
+
+        rng = np.random.default_rng(3)
+        rows = rng.integers(0, 50, 400)
+        starts = rng.integers(-120, 1440, 400)
+        ends = starts + rng.integers(1, 240, 400)
+
+        busy = paint_occupancy(rows, starts, ends, 50, 96, 15)
+
+        expected = np.zeros((50, 96), dtype=bool)
+        for row, start, end in zip(rows, starts, ends):
+            for slot in range(96):
+                if start < (slot + 1) * 15 and end > slot * 15:
+                    expected[row, slot] = True
+        assert (busy == expected).all()
+
+
+class TestBuildOccupancy:
+    """Tests for build_occupancy."""
+
+    def test_build_occupancy(self):
+        """Test slots, busy flags and free table counts of a day."""
+
+        occupancy = build_occupancy(
+            DAY,
+            60,
+            [(1, 4, "Зал"), (2, 2, "Терраса")],
+            [(1, at(18), 90), (2, at(-0.5), 60), (1, at(20.25), 30)],
+        )
+
+        assert occupancy.slots[0] == DAY_START
+        assert occupancy.slots[-1] == at(23)
+        assert len(occupancy.slots) == 24
+        busy = [t.busy for t in occupancy.tables]
+        assert [i for i, b in enumerate(busy[0]) if b] == [18, 19, 20]
+        assert [i for i, b in enumerate(busy[1]) if b] == [0]
+        assert occupancy.free_tables[0] == 1
+        assert occupancy.free_tables[18] == 1
+        assert occupancy.free_tables[12] == 2
+
+    def test_no_tables(self):
+        """Test an empty floor."""
+
+        occupancy = build_occupancy(DAY, 15, [], [])
+
+        assert occupancy.tables == []
+        assert occupancy.free_tables == [0] * 96
+
+
+@pytest.mark.anyio
+class TestGetOccupancy:
+    """Tests for get_occupancy."""
+
+    async def test_one_query(self):
+        """Test that tables and reservations are fetched by one query."""
+
+        mock_db = AsyncMock(spec=AsyncSession)
+        mock_db.execute.return_value = [
+            (1, 4, "Зал", at(18), 60),
+            (1, 4, "Зал", at(20), 60),
+            (2, 6, "Зал", None, None),
+        ]
+
+        occupancy = await get_occupancy(mock_db, DAY, 30, seats=4, location="Зал")
+
+        mock_db.execute.assert_awaited_once()
+        compiled = mock_db.execute.call_args[0][0].compile(dialect=postgresql.dialect())
+        sql = str(compiled)
+        assert "FROM tables LEFT OUTER JOIN reservations" in sql
+        assert "reservations.period && tstzrange(" in sql
+        assert "tables.seats >= " in sql
+        assert "tables.location = " in sql
+        assert DAY_START + timedelta(days=1) in compiled.params.values()
+        assert [t.id for t in occupancy.tables] == [1, 2]
+        assert sum(occupancy.tables[0].busy) == 4
+        assert not any(occupancy.tables[1].busy)
@@ -1,9 +1,15 @@
+from collections import namedtuple
+from datetime import date, datetime, timezone
 from unittest.mock import patch
 
 import pytest
 from fastapi import status
 
+from src.config import settings
+
+from src.pagination import NEXT_CURSOR_HEADER, decode_cursor
 from src.tables import schemas
+from src.totals import TOTAL_COUNT_HEADER, TOTAL_EXACT_HEADER
 
 MOCK_TABLE_DATA = {
     "id": 1,
@@ -12,6 +18,7 @@ MOCK_TABLE_DATA = {
     "location": "Зал 1",
 }
 MOCK_TABLE_OBJ = schemas.Table(**MOCK_TABLE_DATA)
+MOCK_TABLE_ROW = namedtuple("TableRow", MOCK_TABLE_DATA)(**MOCK_TABLE_DATA)
 
 MOCK_TABLE_CREATE_DATA = {
     "name": "Большой стол",
@@ -27,7 +34,7 @@ class TestReadTables:
         """Test case GET /tables/ with default parameters."""
 
         with patch("src.tables.router.get_tables") as mock_get:
-            mock_get.return_value = [MOCK_TABLE_OBJ]
+            mock_get.return_value = [MOCK_TABLE_ROW]
             response = client.get("/tables/")
 
             assert response.status_code == status.HTTP_200_OK
@@ -36,6 +43,56 @@ class TestReadTables:
             assert mock_get.call_args[0][1] == 0
             assert mock_get.call_args[0][2] == 100
 
+    def test_read_tables_fields(self, client):
+        """Test case GET /tables/ with a sparse fieldset."""
+
+        with patch("src.tables.router.get_tables") as mock_get:
+            mock_get.return_value = [MOCK_TABLE_ROW]
+            response = client.get("/tables/?fields=seats,name")
+
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json() == [{"name": "Стол у окна", "seats": 4}]
+            assert mock_get.call_args[1]["fields"] == ["name", "seats"]
+
+    @pytest.mark.parametrize("fields", ["", " , "])
+    def test_read_tables_empty_fields(self, client, fields):
+        """Test case GET /tables/ with an empty fieldset."""
+
+        response = client.get(f"/tables/?fields={fields}")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["detail"] == "Не указано ни одного поля."
+
+    @pytest.mark.parametrize("total, exact", [("auto", False), ("exact", True)])
+    def test_read_tables_total(self, client, total, exact):
+        """Test case GET /tables/ with the total count requested."""
+
+        with (
+            patch("src.tables.router.get_tables") as mock_get,
+            patch("src.tables.router.count_tables") as mock_count,
+        ):
+            mock_get.return_value = []
+            mock_count.return_value = (20000, exact)
+            response = client.get(f"/tables/?total={total}")
+
+            assert response.status_code == status.HTTP_200_OK
+            assert response.headers[TOTAL_COUNT_HEADER] == "20000"
+            assert response.headers[TOTAL_EXACT_HEADER] == str(exact).lower()
+            assert mock_count.call_args[1] == {"exact": exact}
+
+    def test_read_tables_without_total(self, client):
+        """Test that no count is run unless requested."""
+
+        with (
+            patch("src.tables.router.get_tables") as mock_get,
+            patch("src.tables.router.count_tables") as mock_count,
+        ):
+            mock_get.return_value = []
+            response = client.get("/tables/")
+
+            assert TOTAL_COUNT_HEADER not in response.headers
+            mock_count.assert_not_called()
+
     @pytest.mark.parametrize("skip, limit", [(5, 10), (0, 50), (10, 0)])
     def test_read_tables_pagination(self, client, skip, limit):
         """Test case GET /tables/ with pagination."""
@@ -69,6 +126,145 @@ class TestReadTables:
                 client.get("/tables/")
             assert "Database error" in str(exc_info.value)
 
+    def test_read_tables_next_cursor(self, client):
+        """Test case GET /tables/ returns the next page cursor."""
+
+        with patch("src.tables.router.get_tables") as mock_get:
+            mock_get.return_value = [MOCK_TABLE_ROW]
+            response = client.get("/tables/?limit=1&cursor=abc")
+
+            assert response.status_code == status.HTTP_200_OK
+            assert decode_cursor(response.headers[NEXT_CURSOR_HEADER], (int,)) == [1]
+            assert mock_get.call_args.kwargs["cursor"] == "abc"
+
+    def test_read_tables_last_page(self, client):
+        """Test case GET /tables/ without a next page."""
+
+        with patch("src.tables.router.get_tables") as mock_get:
+            mock_get.return_value = [MOCK_TABLE_ROW]
+            response = client.get("/tables/?limit=2")
+
+            assert response.status_code == status.HTTP_200_OK
+            assert NEXT_CURSOR_HEADER not in response.headers
+
+    @pytest.mark.parametrize("query", ["limit=100000", "limit=-1", "skip=-5"])
+    def test_read_tables_invalid_page(self, client, query):
+        """Test case GET /tables/ with an out of range page."""
+
+        with patch("src.tables.router.get_tables") as mock_get:
+            response = client.get(f"/tables/?{query}")
+
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+            mock_get.assert_not_called()
+
+
+class TestAvailableTables:
+    """Test case GET /tables/available"""
+
+    def test_available_tables(self, client, mock_db_session):
+        """Test case GET /tables/available with all filters."""
+
+        with patch("src.tables.router.get_available_tables") as mock_available:
+            mock_available.return_value = [MOCK_TABLE_OBJ]
+            response = client.get(
+                "/tables/available",
+                params={
+                    "start": "2030-06-10T18:00:00Z",
+                    "duration": 90,
+                    "seats": 4,
+                    "location": "Зал 1",
+                },
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == [MOCK_TABLE_DATA]
+        args, kwargs = mock_available.call_args
+        assert args[0] == mock_db_session
+        assert args[1] == datetime(2030, 6, 10, 18, 0, tzinfo=timezone.utc)
+        assert args[2] == 90
+        assert kwargs == {"seats": 4, "location": "Зал 1", "limit": 100}
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"duration": 60},
+            {"start": "2030-06-10T18:00:00Z"},
+            {"start": "2030-06-10T18:00:00Z", "duration": 0},
+            {"start": "2030-06-10T18:00:00Z", "duration": 60, "seats": 0},
+            {"start": "вечером", "duration": 60},
+        ],
+    )
+    def test_available_tables_invalid_params(self, client, params):
+        """Test case GET /tables/available with invalid parameters."""
+
+        with patch("src.tables.router.get_available_tables") as mock_available:
+            response = client.get("/tables/available", params=params)
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        mock_available.assert_not_called()
+
+
+class TestOccupancy:
+    """Test case GET /tables/occupancy"""
+
+    def test_occupancy(self, client, mock_db_session):
+        """Test case GET /tables/occupancy with all parameters."""
+
+        occupancy = schemas.Occupancy(
+            date=date(2030, 6, 10),
+            slot_minutes=720,
+            slots=[
+                datetime(2030, 6, 10, 0, 0, tzinfo=timezone.utc),
+                datetime(2030, 6, 10, 12, 0, tzinfo=timezone.utc),
+            ],
+            free_tables=[1, 0],
+            tables=[
+                schemas.TableOccupancy(
+                    id=1, seats=4, location="Зал 1", busy=[False, True]
+                )
+            ],
+        )
+        with patch("src.tables.router.get_occupancy") as mock_occupancy:
+            mock_occupancy.return_value = occupancy
+            response = client.get(
+                "/tables/occupancy",
+                params={"date": "2030-06-10", "slot_minutes": 720, "seats": 4},
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["tables"][0]["busy"] == [False, True]
+        assert response.json()["slots"][1] == "2030-06-10T12:00:00Z"
+        mock_occupancy.assert_called_once_with(
+            mock_db_session, date(2030, 6, 10), 720, seats=4, location=None
+        )
+
+    def test_occupancy_slot_must_divide_day(self, client):
+        """Test case GET /tables/occupancy with an uneven slot length."""
+
+        with patch("src.tables.router.get_occupancy") as mock_occupancy:
+            response = client.get(
+                "/tables/occupancy", params={"date": "2030-06-10", "slot_minutes": 7}
+            )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        mock_occupancy.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {},
+            {"date": "завтра"},
+            {"date": "2030-06-10", "slot_minutes": 1},
+            {"date": "2030-06-10", "slot_minutes": 2880},
+        ],
+    )
+    def test_occupancy_invalid_params(self, client, params):
+        """Test case GET /tables/occupancy with invalid parameters."""
+
+        response = client.get("/tables/occupancy", params=params)
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
 
 class TestCreateTable:
     """Test case POST /tables/"""
@@ -120,6 +316,42 @@ class TestCreateTable:
             assert "Service error" in str(exc_info.value)
 
 
+class TestBulkCreateTables:
+    """Test case POST /tables/bulk"""
+
+    def test_bulk_create_success(self, client, mock_db_session):
+        """Test case POST /tables/bulk with success result."""
+
+        created = [schemas.Table(id=i, **MOCK_TABLE_CREATE_DATA) for i in (2, 3)]
+        with patch("src.tables.router.create_tables_bulk") as mock_bulk:
+            mock_bulk.return_value = created
+            response = client.post(
+                "/tables/bulk", json={"items": [MOCK_TABLE_CREATE_DATA] * 2}
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [t["id"] for t in response.json()] == [2, 3]
+        assert mock_bulk.call_args[0][0] == mock_db_session
+        assert len(mock_bulk.call_args[0][1].items) == 2
+
+    @pytest.mark.parametrize(
+        "items",
+        [
+            [],
+            [{**MOCK_TABLE_CREATE_DATA, "seats": 0}],
+            [MOCK_TABLE_CREATE_DATA] * (settings.BULK_MAX_ITEMS + 1),
+        ],
+    )
+    def test_bulk_create_validation_error(self, client, items):
+        """Test case POST /tables/bulk with an invalid body."""
+
+        with patch("src.tables.router.create_tables_bulk") as mock_bulk:
+            response = client.post("/tables/bulk", json={"items": items})
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        mock_bulk.assert_not_called()
+
+
 class TestDeleteTable:
     """Test case DELETE /tables/{table_id}"""
 
@@ -1,19 +1,26 @@
-from unittest.mock import patch, MagicMock
+from datetime import datetime, timezone
+from unittest.mock import patch, AsyncMock, MagicMock
 
 import pytest
 from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.pagination import encode_cursor
 from src.tables.models import Table as TableModel
-from src.tables.schemas import TableCreate
+from src.tables.schemas import TableBulkCreate, TableCreate
 from src.tables.service import (
+    count_tables,
+    get_available_tables,
     get_tables,
     create_table,
+    create_tables_bulk,
     delete_table,
 )
 
 
+@pytest.mark.anyio
 class TestTableCRUD:
     """Tests for Table CRUD operations."""
 
@@ -22,53 +29,94 @@ class TestTableCRUD:
     def setup_mock_db(self, return_value):
         """Setup mock database session."""
 
-        mock_db = MagicMock(spec=Session)
+        mock_db = AsyncMock(spec=AsyncSession)
         mock_result = MagicMock()
         mock_result.scalar_one_or_none.return_value = return_value
-        mock_result.scalars.return_value.all.return_value = return_value
+        mock_result.all.return_value = return_value
         mock_db.execute.return_value = mock_result
         return mock_db
 
     @pytest.mark.parametrize(
         "skip, limit, expected_calls",
-        [(0, 100, (0, 100)), (1, 1, (1, 1)), (-10, 100, (-10, 100)), (0, 0, (0, 0))],
+        [
+            (0, 100, (None, 100)),
+            (1, 1, (1, 1)),
+            (-10, 100, (-10, 100)),
+            (0, 0, (None, 0)),
+        ],
     )
-    def test_get_tables_pagination(self, skip, limit, expected_calls):
-        """Test getting tables with pagination."""
+    async def test_get_tables_pagination(self, skip, limit, expected_calls):
+        """Test getting tables with offset pagination."""
 
         expected_tables = [TableModel(**self.MOCK_TABLE_DATA)]
-        with patch("src.tables.service.select") as mock_select:
-            mock_db = MagicMock(spec=Session)
-            mock_db.execute.return_value.scalars.return_value.all.return_value = (
-                expected_tables
-            )
+        mock_db = self.setup_mock_db(expected_tables)
 
-            result = get_tables(mock_db, skip=skip, limit=limit)
+        result = await get_tables(mock_db, skip=skip, limit=limit)
 
-            mock_select.return_value.offset.assert_called_once_with(expected_calls[0])
-            mock_select.return_value.offset.return_value.limit.assert_called_once_with(
-                expected_calls[1]
-            )
-            assert result == expected_tables
+        stmt = mock_db.execute.call_args[0][0]
+        assert stmt._offset == expected_calls[0]
+        assert stmt._limit == expected_calls[1]
+        assert [str(c) for c in stmt._order_by_clauses] == ["tables.id"]
+        assert result == expected_tables
+
+    async def test_get_tables_fields(self):
+        """Test that only requested fields and the id are selected."""
+
+        mock_db = self.setup_mock_db([])
+
+        await get_tables(mock_db, fields=["name"])
+
+        stmt = mock_db.execute.call_args[0][0]
+        assert str(stmt).startswith("SELECT tables.name, tables.id \nFROM tables")
+
+    async def test_get_tables_cursor(self):
+        """Test getting tables after a cursor."""
+
+        mock_db = self.setup_mock_db([])
+
+        await get_tables(mock_db, limit=10, cursor=encode_cursor([42]))
+
+        stmt = mock_db.execute.call_args[0][0]
+        sql = str(stmt.compile(compile_kwargs={"literal_binds": True}))
+        assert "WHERE tables.archived_at IS NULL AND tables.id > 42" in sql
+        assert stmt._offset is None
+        assert stmt._limit == 10
+
+    @pytest.mark.parametrize("cursor", ["garbage", encode_cursor(["1"])])
+    async def test_get_tables_invalid_cursor(self, cursor):
+        """Test getting tables with a malformed cursor."""
+
+        with pytest.raises(HTTPException) as exc:
+            await get_tables(self.setup_mock_db([]), cursor=cursor)
+
+        assert exc.value.status_code == 400
 
-    def test_get_tables_empty(self):
+    async def test_get_tables_skip_with_cursor(self):
+        """Test that skip and cursor cannot be combined."""
+
+        with pytest.raises(HTTPException) as exc:
+            await get_tables(self.setup_mock_db([]), skip=5, cursor=encode_cursor([1]))
+
+        assert exc.value.status_code == 400
+
+    async def test_get_tables_empty(self):
         """Test getting an empty list of tables."""
 
         with patch("src.tables.service.select"):
             mock_db = self.setup_mock_db([])
-            result = get_tables(mock_db)
+            result = await get_tables(mock_db)
             assert result == []
 
-    def test_create_table_success(self):
+    async def test_create_table_success(self):
         """Test successful table creation."""
 
         table_data = TableCreate(name="Новый стол", seats=8, location="VIP зона")
         with patch("src.tables.utils.Table") as mock_model:
-            mock_db = MagicMock(spec=Session)
+            mock_db = AsyncMock(spec=AsyncSession)
             mock_instance = mock_model.return_value
             mock_instance.id = 1
 
-            result = create_table(mock_db, table_data)
+            result = await create_table(mock_db, table_data)
 
             mock_model.assert_called_with(**table_data.model_dump(exclude_none=True))
             mock_db.add.assert_called_with(mock_instance)
@@ -76,43 +124,241 @@ class TestTableCRUD:
             mock_db.refresh.assert_called_with(mock_instance)
             assert result == mock_instance
 
-    def test_create_table_error(self):
+    async def test_create_table_error(self):
         """Test error during table creation."""
 
-        mock_db = MagicMock(spec=Session)
+        mock_db = AsyncMock(spec=AsyncSession)
         mock_db.add.side_effect = SQLAlchemyError("Ошибка")
 
         with pytest.raises(HTTPException) as exc:
-            create_table(mock_db, TableCreate(name="Test", seats=2))
+            await create_table(mock_db, TableCreate(name="Test", seats=2))
 
         assert exc.value.status_code == 500
 
-    def test_delete_table_success(self):
+    async def test_get_available_tables(self):
+        """Test finding free tables with one anti-join query."""
+
+        free = [TableModel(**self.MOCK_TABLE_DATA)]
+        mock_db = AsyncMock(spec=AsyncSession)
+        mock_db.scalars.return_value = MagicMock()
+        mock_db.scalars.return_value.all.return_value = free
+
+        result = await get_available_tables(
+            mock_db, datetime(2030, 6, 10, 18, 0), 90, seats=3, location="Зал 1"
+        )
+
+        assert result == free
+        mock_db.scalars.assert_awaited_once()
+        compiled = mock_db.scalars.call_args[0][0].compile(dialect=postgresql.dialect())
+        sql = str(compiled)
+        assert "tables.archived_at IS NULL" in sql
+        assert "tables.seats >= " in sql
+        assert "tables.location = " in sql
+        assert "NOT (EXISTS (SELECT * \nFROM reservations" in sql
+        assert "reservations.table_id = tables.id" in sql
+        assert "reservations.period && tstzrange(" in sql
+        assert "ORDER BY tables.seats, tables.id" in sql
+        assert sorted(
+            v for v in compiled.params.values() if isinstance(v, datetime)
+        ) == [
+            datetime(2030, 6, 10, 18, 0, tzinfo=timezone.utc),
+            datetime(2030, 6, 10, 19, 30, tzinfo=timezone.utc),
+        ]
+
+    async def test_get_available_tables_any_location(self):
+        """Test that the location filter is optional."""
+
+        mock_db = AsyncMock(spec=AsyncSession)
+        mock_db.scalars.return_value = MagicMock()
+
+        await get_available_tables(
+            mock_db, datetime(2030, 6, 10, 18, 0, tzinfo=timezone.utc), 60, limit=5
+        )
+
+        stmt = mock_db.scalars.call_args[0][0]
+        assert "tables.location" not in str(stmt.whereclause)
+        assert stmt._limit == 5
+
+    async def test_get_available_tables_from_index(self):
+        """Test that slots covered by the reservation index skip the query."""
+
+        mock_db = AsyncMock(spec=AsyncSession)
+        start = datetime(2030, 6, 10, 18, 0, tzinfo=timezone.utc)
+
+        with patch("src.tables.service.reservation_index") as mock_index:
+            mock_index.available_tables.return_value = []
+            result = await get_available_tables(mock_db, start, 30, seats=2)
+
+        assert result == []
+        mock_index.available_tables.assert_called_once_with(
+            start, datetime(2030, 6, 10, 18, 30, tzinfo=timezone.utc), 2, None, 100
+        )
+        mock_db.scalars.assert_not_called()
+
+    async def test_create_tables_bulk(self):
+        """Test creating tables with one multi-row insert."""
+
+        created = [TableModel(**{**self.MOCK_TABLE_DATA, "id": i}) for i in (1, 2)]
+        mock_db = AsyncMock(spec=AsyncSession)
+        mock_db.scalars.return_value = MagicMock()
+        mock_db.scalars.return_value.all.return_value = created
+        bulk_in = TableBulkCreate(
+            items=[
+                TableCreate(name="Стол 1", seats=2, location="Зал 1"),
+                TableCreate(name="Стол 2", seats=4),
+            ]
+        )
+
+        result = await create_tables_bulk(mock_db, bulk_in)
+
+        assert result == created
+        stmt, params = mock_db.scalars.call_args[0]
+        assert "RETURNING tables.id" in str(stmt)
+        assert params == [
+            {"name": "Стол 1", "seats": 2, "location": "Зал 1"},
+            {"name": "Стол 2", "seats": 4},
+        ]
+        mock_db.add.assert_not_called()
+        mock_db.refresh.assert_not_called()
+        mock_db.commit.assert_awaited_once()
+
+    async def test_create_tables_bulk_db_error(self):
+        """Test bulk table creation with database error."""
+
+        mock_db = AsyncMock(spec=AsyncSession)
+        mock_db.scalars.side_effect = SQLAlchemyError("Ошибка")
+
+        with pytest.raises(HTTPException) as exc:
+            await create_tables_bulk(
+                mock_db, TableBulkCreate(items=[TableCreate(name="Стол", seats=2)])
+            )
+
+        assert exc.value.status_code == 500
+        mock_db.rollback.assert_awaited_once()
+
+    def setup_delete(self, returning):
+        """Setup mock database session for DELETE ... RETURNING."""
+
+        mock_db = AsyncMock(spec=AsyncSession)
+        mock_db.in_transaction = MagicMock(return_value=False)
+        mock_db.scalars.return_value = MagicMock()
+        mock_db.scalars.return_value.first.return_value = returning
+        mock_db.scalar.return_value = None
+        return mock_db
+
+    async def test_delete_table_success(self):
         """Test successful table deletion."""
 
         mock_table = MagicMock(spec=TableModel)
-        mock_db = MagicMock(spec=Session)
+        mock_db = self.setup_delete(mock_table)
+
+        result = await delete_table(mock_db, 1, policy="cascade")
+
+        sql = str(mock_db.scalars.call_args[0][0].compile(dialect=postgresql.dialect()))
+        assert sql.startswith("DELETE FROM tables")
+        assert "EXISTS" not in sql
+        assert "tables.archived_at IS NULL" in sql
+        assert "RETURNING tables.id" in sql
+        mock_db.connection.assert_awaited_once_with(
+            execution_options={"isolation_level": "AUTOCOMMIT"}
+        )
+        mock_db.scalar.assert_not_called()
+        mock_db.delete.assert_not_called()
+        mock_db.commit.assert_called_once()
+        assert result == mock_table
+
+    async def test_delete_table_not_found(self):
+        """Test deleting a non-existent table."""
 
-        mock_db.get.return_value = mock_table
+        mock_db = self.setup_delete(None)
 
-        with patch("src.tables.service.delete_table", return_value=mock_table):
-            result = delete_table(mock_db, 1)
+        assert await delete_table(mock_db, 1) is None
 
-            mock_db.get.assert_called_with(TableModel, 1)
+    async def test_delete_table_db_error(self):
+        """Test table deletion with database error."""
 
-            mock_db.delete.assert_called_with(mock_table)
+        mock_db = self.setup_delete(None)
+        mock_db.scalars.side_effect = SQLAlchemyError("Ошибка")
 
-            mock_db.commit.assert_called_once()
+        with pytest.raises(HTTPException) as exc:
+            await delete_table(mock_db, 1)
 
-            assert result == mock_table
+        assert exc.value.status_code == 500
+        mock_db.rollback.assert_awaited_once()
 
-    def test_delete_table_not_found(self):
-        """Test deleting a non-existent table."""
+    async def test_delete_table_default_policy(self):
+        """Test that the configured policy is used by default."""
+
+        mock_db = self.setup_delete(MagicMock(spec=TableModel))
+
+        with patch("src.tables.service.settings.TABLE_DELETE_POLICY", "archive"):
+            await delete_table(mock_db, 1)
+
+        sql = str(mock_db.scalars.call_args[0][0].compile(dialect=postgresql.dialect()))
+        assert sql.startswith("UPDATE tables SET archived_at=now()")
+
+    async def test_delete_table_reject_checks_upcoming_reservations(self):
+        """Test that the reject policy deletes only without upcoming bookings."""
+
+        mock_table = MagicMock(spec=TableModel)
+        mock_db = self.setup_delete(mock_table)
+
+        result = await delete_table(mock_db, 1, policy="reject")
+
+        sql = str(mock_db.scalars.call_args[0][0].compile(dialect=postgresql.dialect()))
+        assert sql.startswith("DELETE FROM tables")
+        assert "NOT (EXISTS (SELECT * \nFROM reservations" in sql
+        assert "reservations.period && " in sql
+        assert "tables.archived_at IS NULL" in sql
+        mock_db.scalar.assert_not_called()
+        assert result == mock_table
 
-        mock_db = MagicMock(spec=Session)
-        mock_db.get.return_value = None
+    async def test_delete_table_reject_with_upcoming_reservations(self):
+        """Test that the reject policy keeps a table with upcoming bookings."""
+
+        mock_db = self.setup_delete(None)
+        mock_db.scalar.return_value = 1
 
         with pytest.raises(HTTPException) as exc:
-            delete_table(mock_db, 1)
+            await delete_table(mock_db, 1, policy="reject")
+
+        assert exc.value.status_code == 409
+        assert "предстоящие бронирования" in exc.value.detail
+        sql = str(mock_db.scalar.call_args[0][0].compile(dialect=postgresql.dialect()))
+        assert "tables.archived_at IS NULL" in sql
+
+    async def test_delete_table_reject_archived(self):
+        """Test that an archived table is not found by the reject policy."""
+
+        mock_db = self.setup_delete(None)
+
+        assert await delete_table(mock_db, 1, policy="reject") is None
+        mock_db.scalar.assert_awaited_once()
+
+    async def test_delete_table_archive(self):
+        """Test that the archive policy only marks the table as archived."""
+
+        mock_table = MagicMock(spec=TableModel)
+        mock_db = self.setup_delete(mock_table)
+
+        result = await delete_table(mock_db, 1, policy="archive")
+
+        sql = str(mock_db.scalars.call_args[0][0].compile(dialect=postgresql.dialect()))
+        assert sql.startswith("UPDATE tables SET archived_at=now()")
+        assert "tables.archived_at IS NULL" in sql
+        assert "RETURNING tables.id" in sql
+        assert result == mock_table
+
+    async def test_count_tables(self):
+        """Test that only active tables are counted."""
+
+        mock_db = AsyncMock(spec=AsyncSession)
+
+        with patch("src.tables.service.count_rows") as mock_count:
+            mock_count.return_value = (30, True)
+            result = await count_tables(mock_db)
 
-        assert exc.value.status_code == 404
+        assert result == (30, True)
+        stmt, exact = mock_count.call_args[0][1:]
+        assert exact is False
+        assert "tables.archived_at IS NULL" in str(stmt)
@@ -0,0 +1,165 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.util import greenlet_spawn
+
+from src.db_pool import (
+    InstrumentedQueuePool,
+    PoolStats,
+    enable_idle_ping,
+    get_pool_status,
+)
+
+
+def make_pool(**kwargs) -> InstrumentedQueuePool:
+    """Create a pool over mocked DBAPI connections."""
+
+    return InstrumentedQueuePool(lambda: MagicMock(), **kwargs)
+
+
+class TestPoolStats:
+    """Tests for PoolStats counters."""
+
+    def test_observe_wait(self):
+        """Test accumulating checkout wait times."""
+
+        stats = PoolStats()
+        stats.observe_wait(0.2)
+        stats.observe_wait(0.1)
+
+        assert stats.checkouts == 2
+        assert stats.wait_total == pytest.approx(0.3)
+        assert stats.wait_max == 0.2
+
+    def test_reset(self):
+        """Test resetting counters."""
+
+        stats = PoolStats()
+        stats.observe_wait(0.5)
+        stats.timeouts = 3
+        stats.reset()
+
+        assert stats.checkouts == 0
+        assert stats.timeouts == 0
+        assert stats.wait_max == 0.0
+
+
+@pytest.mark.anyio
+class TestInstrumentedQueuePool:
+    """Tests for InstrumentedQueuePool."""
+
+    async def test_checkout_is_recorded(self):
+        """Test that checkouts and in-use connections are reported."""
+
+        pool = make_pool(pool_size=2, max_overflow=0)
+
+        conn = await greenlet_spawn(pool.connect)
+        status = get_pool_status(pool)
+
+        assert status["checked_out"] == 1
+        assert status["checkouts"] == 1
+        assert status["timeouts"] == 0
+
+        await greenlet_spawn(conn.close)
+        assert get_pool_status(pool)["checked_out"] == 0
+
+    async def test_overflow_is_reported(self):
+        """Test that overflow connections are reported."""
+
+        pool = make_pool(pool_size=1, max_overflow=2)
+
+        first = await greenlet_spawn(pool.connect)
+        second = await greenlet_spawn(pool.connect)
+
+        status = get_pool_status(pool)
+        assert status["checked_out"] == 2
+        assert status["overflow"] == 1
+
+        await greenlet_spawn(first.close)
+        await greenlet_spawn(second.close)
+
+    async def test_timeout_is_counted(self):
+        """Test that exhausted pool timeouts are counted."""
+
+        pool = make_pool(pool_size=1, max_overflow=0, timeout=0.01)
+
+        conn = await greenlet_spawn(pool.connect)
+        with pytest.raises(TimeoutError):
+            await greenlet_spawn(pool.connect)
+
+        status = get_pool_status(pool)
+        assert status["timeouts"] == 1
+        assert status["checkouts"] == 2
+        assert status["wait_max_ms"] >= 10
+
+        await greenlet_spawn(conn.close)
+
+
+@pytest.mark.anyio
+class TestIdlePing:
+    """Tests for enable_idle_ping."""
+
+    def make_engine(self, idle_seconds: float):
+        """Create a fake engine with a ping-checked pool."""
+
+        engine = SimpleNamespace(
+            dialect=MagicMock(), pool=make_pool(pool_size=1, max_overflow=0)
+        )
+        engine.dialect.do_ping.return_value = True
+        enable_idle_ping(engine, idle_seconds)
+        return engine
+
+    async def checkout_twice(self, engine):
+        """Check a connection out, return it and check it out again."""
+
+        conn = await greenlet_spawn(engine.pool.connect)
+        await greenlet_spawn(conn.close)
+        conn = await greenlet_spawn(engine.pool.connect)
+        await greenlet_spawn(conn.close)
+
+    async def test_recently_used_connection_is_not_pinged(self):
+        """Test that a connection used within the threshold skips the ping."""
+
+        engine = self.make_engine(idle_seconds=60)
+        await self.checkout_twice(engine)
+
+        engine.dialect.do_ping.assert_not_called()
+
+    async def test_idle_connection_is_pinged(self):
+        """Test that a connection idle past the threshold is pinged."""
+
+        engine = self.make_engine(idle_seconds=60)
+        conn = await greenlet_spawn(engine.pool.connect)
+        record = conn._connection_record
+        await greenlet_spawn(conn.close)
+        record.info["last_used"] -= 120
+
+        conn = await greenlet_spawn(engine.pool.connect)
+        await greenlet_spawn(conn.close)
+
+        engine.dialect.do_ping.assert_called_once()
+
+    async def test_failed_ping_invalidates_pool(self):
+        """Test that a failed ping replaces the connection."""
+
+        engine = self.make_engine(idle_seconds=0)
+        conn = await greenlet_spawn(engine.pool.connect)
+        first = conn.dbapi_connection
+        await greenlet_spawn(conn.close)
+
+        engine.dialect.do_ping.side_effect = [False, True]
+        conn = await greenlet_spawn(engine.pool.connect)
+
+        assert conn.dbapi_connection is not first
+        await greenlet_spawn(conn.close)
+
+    async def test_negative_threshold_disables_check(self):
+        """Test that a negative threshold registers no listeners."""
+
+        engine = self.make_engine(idle_seconds=-1)
+        await self.checkout_twice(engine)
+
+        engine.dialect.do_ping.assert_not_called()
+        assert not engine.pool.dispatch.checkout
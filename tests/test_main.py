@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from unittest.mock import patch, MagicMock
 
 import pytest
@@ -7,6 +8,8 @@ from fastapi.testclient import TestClient
 from src.main import app
 from src.database import get_db
 from src.config import settings
+from src.reservation.exceptions import create_conflict_error
+from src.reservation.schemas import FreeSlot
 
 
 @pytest.fixture(scope="module")
@@ -58,6 +61,31 @@ class TestMainApp:
             assert response.status_code == status.HTTP_400_BAD_REQUEST
             assert response.json() == {"detail": error_detail}
 
+    def test_reservation_conflict_handler(self, client):
+        """Test that free slots are added to reservation conflicts."""
+
+        slot = FreeSlot(
+            table_id=2, reservation_time=datetime(2030, 6, 10, 19, tzinfo=timezone.utc)
+        )
+        with patch("src.reservation.router.create_reservation") as mock_create:
+            mock_create.side_effect = create_conflict_error([slot])
+            response = client.post(
+                f"{settings.API_PREFIX}/reservations/",
+                json={
+                    "customer_name": "Иванов Иван",
+                    "table_id": 1,
+                    "reservation_time": "2030-06-10T18:00:00Z",
+                    "duration_minutes": 60,
+                },
+            )
+            assert response.status_code == status.HTTP_409_CONFLICT
+            assert response.json() == {
+                "detail": create_conflict_error().detail,
+                "suggestions": [
+                    {"table_id": 2, "reservation_time": "2030-06-10T19:00:00Z"}
+                ],
+            }
+
     def test_global_exception_handler(self, client):
         """Test global exception handler for uncaught exceptions."""
 
@@ -113,3 +141,26 @@ class TestMainApp:
         except AssertionError as e:
             print(f"Expected URL not found. Response text:\n{response.text}")
             raise e
+
+    def test_db_pool_health(self, client):
+        """Test the connection pool statistics endpoint."""
+
+        response = client.get("/health/db-pool")
+        assert response.status_code == status.HTTP_200_OK
+        assert {"pool_size", "checked_out", "overflow", "timeouts"} <= set(
+            response.json()
+        )
+
+    def test_metrics(self, client):
+        """Test the Prometheus metrics endpoint."""
+
+        client.get("/health")
+        response = client.get("/metrics")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert (
+            'http_request_duration_seconds_count{method="GET",route="/health",'
+            'status="200"}' in response.text
+        )
+        assert 'db_pool_size{database="primary"}' in response.text
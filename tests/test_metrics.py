@@ -0,0 +1,199 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from src.db_pool import InstrumentedQueuePool
+from src.metrics import (
+    COMMITS,
+    METRICS,
+    QUERY_DURATION,
+    REQUEST_DURATION,
+    REQUEST_QUERIES,
+    REQUESTS_IN_PROGRESS,
+    ROLLBACKS,
+    Gauge,
+    Histogram,
+    MetricsMiddleware,
+    instrument_engine,
+    render_metrics,
+    render_pools,
+    request_queries,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """Start every test without observations."""
+
+    for metric in METRICS:
+        metric.reset()
+
+
+class TestHistogram:
+    """Tests for Histogram."""
+
+    def test_render(self):
+        """Test that buckets are rendered cumulatively with sum and count."""
+
+        histogram = Histogram("latency_seconds", "Latency.", ("route",), (0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value, ("/a",))
+
+        assert histogram.render() == [
+            "# HELP latency_seconds Latency.",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{route="/a",le="0.1"} 2',
+            'latency_seconds_bucket{route="/a",le="1.0"} 3',
+            'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+            'latency_seconds_sum{route="/a"} 3.65',
+            'latency_seconds_count{route="/a"} 4',
+        ]
+
+    def test_label_escaping(self):
+        """Test that quotes, backslashes and newlines in labels are escaped."""
+
+        gauge = Gauge("items", "Items.", ("name",))
+        gauge.inc(('a"b\\c\nd',))
+
+        assert gauge.render()[-1] == 'items{name="a\\"b\\\\c\\nd"} 1'
+
+
+class TestRenderMetrics:
+    """Tests for render_metrics."""
+
+    @pytest.mark.filterwarnings("error::RuntimeWarning")
+    def test_render_while_labels_are_added(self):
+        """Test that rendering is safe while new label values are observed."""
+
+        done = threading.Event()
+
+        def observe():
+            for i in range(20000):
+                REQUEST_DURATION.observe(0.01, ("GET", f"/r{i}", "200"))
+                COMMITS.inc((str(i),))
+            done.set()
+
+        thread = threading.Thread(target=observe)
+        thread.start()
+        try:
+            while not done.is_set():
+                render_metrics({})
+        finally:
+            thread.join()
+
+        lines = render_metrics({}).splitlines()
+        assert 'db_commits_total{database="19999"} 1' in lines
+
+
+class TestInstrumentEngine:
+    """Tests for the engine event metrics."""
+
+    def test_queries_commits_and_rollbacks(self):
+        """Test that queries are timed and counted for the current request."""
+
+        engine = create_engine("sqlite://")
+        instrument_engine(engine, "primary")
+        queries = [0]
+        token = request_queries.set(queries)
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+                conn.commit()
+                conn.execute(text("SELECT 3"))
+                conn.rollback()
+        finally:
+            request_queries.reset(token)
+
+        assert queries == [3]
+        series = QUERY_DURATION.series[("primary",)]
+        assert sum(series[:-1]) == 3
+        assert series[-1] > 0
+        assert COMMITS.values == {("primary",): 1}
+        assert ROLLBACKS.values == {("primary",): 1}
+
+    def test_queries_outside_requests(self):
+        """Test that background queries are timed but not counted."""
+
+        engine = create_engine("sqlite://")
+        instrument_engine(engine, "replica")
+
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        assert sum(QUERY_DURATION.series[("replica",)][:-1]) == 1
+
+
+class TestMetricsMiddleware:
+    """Tests for MetricsMiddleware."""
+
+    @pytest.fixture
+    def client(self):
+        """Create a client of an app with the middleware."""
+
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/items/{item_id}")
+        def read_item(item_id: int):
+            assert REQUESTS_IN_PROGRESS.values[("GET",)] == 1
+            if item_id == 0:
+                raise HTTPException(status_code=404)
+            return {"id": item_id}
+
+        @app.get("/fail")
+        def fail():
+            raise RuntimeError("boom")
+
+        with TestClient(app, raise_server_exceptions=False) as client:
+            yield client
+
+    def test_route_template_and_status(self, client):
+        """Test that requests are labelled by route template and status."""
+
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/items/0")
+        client.get("/missing")
+
+        counts = {
+            labels: sum(series[:-1])
+            for labels, series in REQUEST_DURATION.series.items()
+        }
+        assert counts == {
+            ("GET", "/items/{item_id}", "200"): 2,
+            ("GET", "/items/{item_id}", "404"): 1,
+            ("GET", "<unmatched>", "404"): 1,
+        }
+        assert REQUESTS_IN_PROGRESS.values == {("GET",): 0}
+        assert REQUEST_QUERIES.series[("GET", "/items/{item_id}")][0] == 3
+
+    def test_unhandled_exception(self, client):
+        """Test that a failed request is recorded as a 500."""
+
+        client.get("/fail")
+
+        assert ("GET", "/fail", "500") in REQUEST_DURATION.series
+        assert REQUESTS_IN_PROGRESS.values == {("GET",): 0}
+
+
+class TestRenderPools:
+    """Tests for render_pools."""
+
+    def test_gauges_and_counters(self):
+        """Test that pool statistics are rendered per database."""
+
+        pool = InstrumentedQueuePool(lambda: MagicMock(), pool_size=3, max_overflow=2)
+        pool.stats.observe_wait(0.25)
+
+        lines = render_pools({"primary": pool})
+
+        assert 'db_pool_size{database="primary"} 3' in lines
+        assert 'db_pool_max_overflow{database="primary"} 2' in lines
+        assert 'db_pool_checkouts_total{database="primary"} 1' in lines
+        assert "# TYPE db_pool_timeouts_total counter" in lines
+        assert 'db_pool_checkout_wait_seconds_sum{database="primary"} 0.25' in lines
@@ -0,0 +1,75 @@
+import pytest
+from fastapi import HTTPException, Response, status
+
+from src.pagination import (
+    NEXT_CURSOR_HEADER,
+    decode_cursor,
+    encode_cursor,
+    set_next_cursor,
+    validate_pagination,
+)
+
+
+class TestCursor:
+    """Tests for cursor encoding."""
+
+    def test_round_trip(self):
+        """Test that a decoded cursor equals the encoded values."""
+
+        cursor = encode_cursor(["2030-01-01T18:00:00+00:00", 15])
+
+        assert decode_cursor(cursor, (str, int)) == ["2030-01-01T18:00:00+00:00", 15]
+
+    def test_cursor_is_url_safe(self):
+        """Test that cursors can be passed in a query string unescaped."""
+
+        cursor = encode_cursor(["??>>", 1])
+
+        assert set(cursor) <= set(
+            "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+        )
+
+    @pytest.mark.parametrize(
+        "cursor",
+        ["", "not-base64!", encode_cursor([1, 2]), encode_cursor(["1"]), "e30"],
+    )
+    def test_invalid_cursor(self, cursor):
+        """Test that malformed cursors are rejected."""
+
+        with pytest.raises(HTTPException) as exc_info:
+            decode_cursor(cursor, (int,))
+
+        assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestPaginationHelpers:
+    """Tests for pagination helpers."""
+
+    def test_skip_with_cursor(self):
+        """Test that skip and cursor cannot be combined."""
+
+        with pytest.raises(HTTPException) as exc_info:
+            validate_pagination(10, encode_cursor([1]))
+
+        assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.parametrize("skip, cursor", [(0, None), (10, None), (0, "abc")])
+    def test_valid_pagination(self, skip, cursor):
+        """Test that either skip or cursor may be used."""
+
+        validate_pagination(skip, cursor)
+
+    @pytest.mark.parametrize(
+        "items, limit, expected", [([1, 2], 2, True), ([1], 2, False), ([], 0, False)]
+    )
+    def test_set_next_cursor(self, items, limit, expected):
+        """Test that the next cursor is only set for full pages."""
+
+        response = Response()
+        set_next_cursor(response, items, limit, lambda item: [item])
+
+        assert (NEXT_CURSOR_HEADER in response.headers) is expected
+        if expected:
+            assert decode_cursor(response.headers[NEXT_CURSOR_HEADER], (int,)) == [
+                items[-1]
+            ]
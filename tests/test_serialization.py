@@ -0,0 +1,115 @@
+import json
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from src.reservation.schemas import Reservation, reservation_rows
+from src.serialization import projected_fields, rows_response
+from src.tables.schemas import Table, table_rows
+
+NAMES = [
+    "Тестовый Клиент",
+    'ООО "Ромашка"',
+    "C:\\Users\\guest",
+    "tab\tnew\nline\x01",
+    "emoji 🍽️ and </script>",
+]
+
+
+def default_body(model, data):
+    """Encode rows the way FastAPI encodes a ``response_model``."""
+
+    content = jsonable_encoder(
+        TypeAdapter(List[model]).dump_python(
+            TypeAdapter(List[model]).validate_python(data), mode="json"
+        )
+    )
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def as_rows(data):
+    """Convert dicts to result-like rows."""
+
+    row = namedtuple("Row", data[0])
+    return [row(**item) for item in data]
+
+
+class TestRowsResponse:
+    """Tests for rows_response."""
+
+    @pytest.mark.parametrize(
+        "tz",
+        [
+            timezone.utc,
+            timezone(timedelta(hours=3)),
+            timezone(-timedelta(hours=5, minutes=30)),
+        ],
+    )
+    def test_reservations_match_default_encoding(self, tz):
+        """Test that reservation bytes equal the response_model output."""
+
+        data = [
+            {
+                "customer_name": name,
+                "table_id": i,
+                "reservation_time": datetime(2030, 1, 2, 18, 30, 15, i * 1234, tz),
+                "duration_minutes": 90,
+                "id": 1000 + i,
+            }
+            for i, name in enumerate(NAMES)
+        ]
+
+        response = rows_response(reservation_rows, as_rows(data))
+
+        assert response.body == default_body(Reservation, data)
+        assert response.media_type == "application/json"
+
+    def test_tables_match_default_encoding(self):
+        """Test that table bytes equal the response_model output."""
+
+        data = [
+            {"name": name, "seats": i + 1, "location": name if i % 2 else None, "id": i}
+            for i, name in enumerate(NAMES)
+        ]
+
+        response = rows_response(table_rows, as_rows(data))
+
+        assert response.body == default_body(Table, data)
+
+    def test_empty(self):
+        """Test that no rows encode to an empty list."""
+
+        assert rows_response(table_rows, []).body == b"[]"
+
+    def test_fields(self):
+        """Test that only the requested columns are encoded."""
+
+        rows = as_rows([{"name": "Стол", "seats": 2, "location": None, "id": 7}])
+
+        response = rows_response(table_rows, rows, ["seats", "location"])
+
+        assert response.body == b'[{"seats":2,"location":null}]'
+
+
+class TestProjectedFields:
+    """Tests for projected_fields."""
+
+    def test_all(self):
+        """Test that all fields are selected without a fieldset."""
+
+        assert projected_fields(("a", "b", "id"), None, ("id",)) == ["a", "b", "id"]
+
+    def test_keys_are_kept(self):
+        """Test that the keys are selected in output order."""
+
+        assert projected_fields(("a", "b", "id"), ["b"], ("id",)) == ["b", "id"]
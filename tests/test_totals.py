@@ -0,0 +1,119 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import Response
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql.asyncpg import PGDialect_asyncpg
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.reservation.models import Reservation
+from src.totals import (
+    TOTAL_COUNT_HEADER,
+    TOTAL_EXACT_HEADER,
+    count_rows,
+    estimate_rows,
+    set_total,
+)
+
+UNFILTERED = select(Reservation.id)
+FILTERED = select(Reservation.id).where(Reservation.table_id == 3)
+
+
+def make_db(scalars=(), plan_rows=None, dialect=None):
+    """Create a mocked session returning ``scalars`` and an EXPLAIN plan."""
+
+    db = AsyncMock(spec=AsyncSession)
+    db.scalar.side_effect = list(scalars)
+    conn = AsyncMock()
+    conn.dialect = dialect or postgresql.dialect()
+    conn.exec_driver_sql.return_value = MagicMock()
+    conn.exec_driver_sql.return_value.scalar.return_value = (
+        f'[{{"Plan": {{"Plan Rows": {plan_rows}}}}}]'
+    )
+    db.connection.return_value = conn
+    return db
+
+
+@pytest.mark.anyio
+class TestCountRows:
+    """Tests for count_rows."""
+
+    async def test_exact(self):
+        """Test that an exact count is run without estimating."""
+
+        db = make_db([123456])
+
+        assert await count_rows(db, FILTERED, exact=True) == (123456, True)
+        count_sql = str(db.scalar.call_args[0][0])
+        assert count_sql.startswith("SELECT count(*) AS count_1 \nFROM (SELECT")
+        db.connection.assert_not_called()
+
+    async def test_unfiltered_uses_reltuples(self):
+        """Test that an unfiltered table is estimated from pg_class."""
+
+        db = make_db([250000.0])
+
+        assert await count_rows(db, UNFILTERED) == (250000, False)
+        assert "pg_class" in str(db.scalar.call_args[0][0])
+        assert db.scalar.call_args[0][1] == {"name": "reservations"}
+        db.connection.assert_not_called()
+
+    async def test_small_estimate_is_counted(self):
+        """Test that small results are counted exactly."""
+
+        db = make_db([40.0, 42])
+
+        assert await count_rows(db, UNFILTERED) == (42, True)
+        assert db.scalar.await_count == 2
+
+    async def test_never_analyzed_uses_explain(self):
+        """Test the EXPLAIN fallback for tables without statistics."""
+
+        db = make_db([-1.0], plan_rows=90000)
+
+        assert await count_rows(db, UNFILTERED) == (90000, False)
+        db.connection.assert_awaited_once()
+
+    async def test_filtered_uses_explain(self):
+        """Test that filtered queries are estimated by the planner."""
+
+        db = make_db([], plan_rows=50000)
+
+        assert await count_rows(db, FILTERED) == (50000, False)
+        db.scalar.assert_not_called()
+
+
+@pytest.mark.anyio
+class TestEstimateRows:
+    """Tests for estimate_rows."""
+
+    async def test_positional_parameters(self):
+        """Test that parameters are passed to the driver, not inlined."""
+
+        db = make_db(plan_rows=7, dialect=PGDialect_asyncpg())
+        stmt = select(Reservation.id).where(
+            Reservation.table_id == 3, Reservation.id.in_([1, 2])
+        )
+
+        assert await estimate_rows(db, stmt) == 7
+
+        sql, params = db.connection.return_value.exec_driver_sql.call_args[0]
+        assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT reservations.id")
+        assert "reservations.table_id = $1" in sql
+        assert params == (3, 1, 2)
+
+
+class TestSetTotal:
+    """Tests for set_total."""
+
+    @pytest.mark.parametrize("exact, flag", [(True, "true"), (False, "false")])
+    def test_headers(self, exact, flag):
+        """Test that the count and its exactness are returned in headers."""
+
+        response = Response()
+
+        set_total(response, 1500, exact)
+
+        assert response.headers[TOTAL_COUNT_HEADER] == "1500"
+        assert response.headers[TOTAL_EXACT_HEADER] == flag